@@ -258,6 +258,40 @@ CELERY_BEAT_SCHEDULE = {
             "expires": 240,
         },
     },
+    "backfill-checkin-prev-net-weight": {
+        "task": "declaracions.tasks.backfill_checkin_prev_net_weight_task",
+        "schedule": crontab(hour=0, minute=15),
+    },
+    "refresh-checkin-rollups": {
+        "task": "analysis.tasks.refresh_checkin_rollups_task",
+        "schedule": crontab(hour=0, minute=30),
+    },
+}
+
+# Analytics
+# How `annotate_revenue_on_checkins` finds each checkin's previous weight:
+# "window" runs one LAG over the filtered checkins, which sorts the whole set and
+# suits broad scans; "subquery" does an indexed LIMIT 1 lookup per row, which is
+# cheaper when a narrow filter selects few rows out of a large checkin table.
+# Compare both with EXPLAIN ANALYZE on production volumes before switching.
+REVENUE_ANNOTATION_STRATEGY = os.environ.get("REVENUE_ANNOTATION_STRATEGY", "window")
+
+# Report responses for closed date ranges are cached in the database so they
+# survive restarts and are shared between workers; create the table with
+# `python manage.py createcachetable`. Dashboard responses that include today
+# are kept for a minute in Redis.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "reports": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "analysis_report_cache",
+    },
+    "live_reports": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("REPORT_CACHE_REDIS_URL", default="redis://redis:6379/2"),
+    },
 }
 
 # External APIs and Tokens
@@ -60,9 +60,10 @@ def calculate_weeks_in_month(year):
     return weeks_in_month
 
 
-# Calculate weeks for the year 2024
-weeks_in_2024 = calculate_weeks_in_month(2024)
+if __name__ == "__main__":
+    # Calculate weeks for the year 2024
+    weeks_in_2024 = calculate_weeks_in_month(2024)
 
-# Display the result
-for month, weeks in weeks_in_2024.items():
-    print(f"{month}: {weeks} weeks")
+    # Display the result
+    for month, weeks in weeks_in_2024.items():
+        print(f"{month}: {weeks} weeks")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from analysis.rollups import refresh_checkin_rollups
+
+
+class Command(BaseCommand):
+    help = "Creates (if needed) and refreshes the checkin rollup materialized views."
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("Refreshing checkin rollups..."))
+        refresh_checkin_rollups()
+        self.stdout.write(self.style.SUCCESS("Checkin rollups refreshed."))
@@ -1,3 +1,57 @@
 from django.db import models
 
-# Create your models here.
+from analysis.rollups import CHECKIN_REVENUE_ROLLUP_VIEW
+
+
+class CheckinRevenueRollup(models.Model):
+    """
+    Read-only view over the `analysis_checkin_revenue_mv` materialized view: the
+    incremental weight and revenue of every successful checkin, as of
+    `refreshed_at`. Rows are recomputed by the `refresh_checkin_rollups`
+    management command.
+    """
+
+    id = models.UUIDField(primary_key=True)
+    checkin_time = models.DateTimeField()
+    station = models.ForeignKey(
+        "workstations.WorkStation",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        null=True,
+    )
+    employee = models.ForeignKey(
+        "users.CustomUser",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        null=True,
+    )
+    declaracion = models.ForeignKey(
+        "declaracions.Declaracion",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        null=True,
+    )
+    localJourney = models.ForeignKey(
+        "localcheckings.JourneyWithoutTruck",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        null=True,
+    )
+    exporter = models.ForeignKey(
+        "exporters.Exporter",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        null=True,
+    )
+    incremental_weight = models.DecimalField(max_digits=20, decimal_places=2)
+    revenue = models.DecimalField(max_digits=24, decimal_places=6)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = CHECKIN_REVENUE_ROLLUP_VIEW
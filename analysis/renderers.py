@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+import orjson
+from rest_framework.renderers import BaseRenderer
+
+
+def _orjson_default(value):
+    # orjson has no native Decimal support; the reports return revenue as
+    # JSON numbers, as DRF's JSONRenderer does with its default settings.
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Renders JSON with orjson instead of the standard library encoder that DRF's
+    JSONRenderer uses. Meant for the analytics endpoints, whose responses are
+    plain dicts and lists of numbers and labels.
+    """
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return orjson.dumps(
+            data,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
@@ -0,0 +1,98 @@
+from django.db import connection
+
+CHECKIN_REVENUE_ROLLUP_VIEW = "analysis_checkin_revenue_mv"
+
+# One row per successful checkin with its incremental weight and revenue. The
+# weight uses the same LAG rule as `annotate_revenue_on_checkins`: the weight
+# added since the previous successful checkin of the same declaracion / local
+# journey. Reports can filter by exact checkin_time and group by
+# employee/station/exporter with a plain SUM. Every row carries the start time of
+# the refresh that produced it, so readers can tell which check-ins changed since.
+CREATE_CHECKIN_REVENUE_ROLLUP_SQL = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {CHECKIN_REVENUE_ROLLUP_VIEW} AS
+WITH weighted AS (
+    SELECT
+        c.id,
+        c.checkin_time,
+        c.station_id,
+        c.employee_id,
+        c.declaracion_id,
+        c."localJourney_id",
+        c.unit_price,
+        c.rate,
+        GREATEST(
+            c.net_weight - LAG(c.net_weight, 1, 0) OVER (
+                PARTITION BY c."localJourney_id", c.declaracion_id
+                ORDER BY c.checkin_time
+            ),
+            0
+        ) AS incremental_weight
+    FROM declaracions_checkin c
+    WHERE c.status IN ('pass', 'paid', 'success')
+)
+SELECT
+    w.id,
+    w.checkin_time,
+    w.station_id,
+    w.employee_id,
+    w.declaracion_id,
+    w."localJourney_id",
+    COALESCE(d.exporter_id, j.exporter_id) AS exporter_id,
+    w.incremental_weight,
+    w.incremental_weight * w.unit_price * w.rate / 10000 AS revenue,
+    now() AS refreshed_at
+FROM weighted w
+LEFT JOIN declaracions_declaracion d ON d.id = w.declaracion_id
+LEFT JOIN localcheckings_journeywithouttruck j ON j.id = w."localJourney_id"
+"""
+
+# Views created before the refreshed_at column was added are rebuilt once.
+DROP_OUTDATED_CHECKIN_REVENUE_ROLLUP_SQL = f"""
+DO $$
+BEGIN
+    IF to_regclass('{CHECKIN_REVENUE_ROLLUP_VIEW}') IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = to_regclass('{CHECKIN_REVENUE_ROLLUP_VIEW}')
+          AND attname = 'refreshed_at'
+    ) THEN
+        DROP MATERIALIZED VIEW {CHECKIN_REVENUE_ROLLUP_VIEW};
+    END IF;
+END $$
+"""
+
+CREATE_CHECKIN_REVENUE_ROLLUP_INDEXES_SQL = (
+    f"CREATE UNIQUE INDEX IF NOT EXISTS {CHECKIN_REVENUE_ROLLUP_VIEW}_id "
+    f"ON {CHECKIN_REVENUE_ROLLUP_VIEW} (id)",
+    f"CREATE INDEX IF NOT EXISTS {CHECKIN_REVENUE_ROLLUP_VIEW}_checkin_time "
+    f"ON {CHECKIN_REVENUE_ROLLUP_VIEW} (checkin_time)",
+)
+
+
+def ensure_checkin_revenue_rollup():
+    """
+    Creates the per-checkin revenue rollup materialized view and its indexes if
+    they do not exist yet. Safe to call repeatedly.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_OUTDATED_CHECKIN_REVENUE_ROLLUP_SQL)
+        cursor.execute(CREATE_CHECKIN_REVENUE_ROLLUP_SQL)
+        for statement in CREATE_CHECKIN_REVENUE_ROLLUP_INDEXES_SQL:
+            cursor.execute(statement)
+
+
+def refresh_checkin_revenue_rollup():
+    """
+    Recomputes the per-checkin revenue rollup without blocking readers of the view.
+    """
+    ensure_checkin_revenue_rollup()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"REFRESH MATERIALIZED VIEW CONCURRENTLY {CHECKIN_REVENUE_ROLLUP_VIEW}"
+        )
+
+
+def refresh_checkin_rollups():
+    """
+    Refreshes every checkin rollup materialized view.
+    """
+    refresh_checkin_revenue_rollup()
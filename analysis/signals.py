@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from analysis.views.helpers.exporter_counts import invalidate_exporter_type_counts
+from exporters.models import Exporter
+
+
+@receiver(post_save, sender=Exporter)
+@receiver(post_delete, sender=Exporter)
+def invalidate_exporter_type_counts_on_change(sender, instance, **kwargs):
+    """
+    Drop the cached per-type exporter counts shown on the dashboards once the
+    write commits; a cache outage never fails the write itself.
+    """
+    transaction.on_commit(invalidate_exporter_type_counts)
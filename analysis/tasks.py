@@ -0,0 +1,22 @@
+import logging
+
+from celery import shared_task
+from django.db import close_old_connections
+
+from analysis.rollups import refresh_checkin_rollups
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(acks_late=True)
+def refresh_checkin_rollups_task():
+    """
+    Nightly refresh of the `analysis_checkin_revenue_mv` materialized view used
+    by the admin revenue reports.
+    """
+    close_old_connections()
+    try:
+        refresh_checkin_rollups()
+        logger.info("Checkin rollups refreshed")
+    finally:
+        close_old_connections()
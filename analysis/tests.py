@@ -1,3 +1,335 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from address.models import RegionOrCity, Woreda, ZoneOrSubcity
+from analysis.rollups import refresh_checkin_rollups
+from analysis.views.shared_officials_system_admin import (
+    admin_combined_taxpayer_report,
+    admin_top_regular_taxpayer_report,
+    admin_top_trucks_report,
+    admin_top_walkin_taxpayer_report,
+)
+from declaracions.models import Checkin, Declaracion
+from exporters.models import Exporter, TaxPayerType
+from localcheckings.models import JourneyWithoutTruck
+from trucks.models import Truck, TruckOwner
+from users.models import CustomUser, UserSession
+from utils import set_current_user
+from workstations.models import WorkStation
+
+# The checkin revenue rollup is a Postgres materialized view
+ROLLUPS_AVAILABLE = connection.vendor == "postgresql"
+
+
+def create_exporter(woreda, taxpayer_type, number):
+    return Exporter.objects.create(
+        first_name=f"Exporter{number}",
+        last_name="Test",
+        woreda=woreda,
+        type=taxpayer_type,
+        phone_number=f"09000000{number:02d}",
+        tin_number=f"{number:010d}",
+    )
+
+
+def create_truck(owner, plate_number):
+    return Truck.objects.create(
+        owner=owner,
+        plate_number=plate_number,
+        truck_brand="Volvo",
+        country_of_origin="Ethiopia",
+        truck_model="FH16",
+        year_of_manufacture=2020,
+        chassis_number=f"CH-{plate_number}",
+        engine_number=f"EN-{plate_number}",
+        color="White",
+        oil_type="Diesel",
+        horse_power=500,
+        engine_displacement=16000,
+        loading_capacity_kg=40000,
+    )
+
+
+class ReportTestData:
+    """
+    Check-ins of two regular exporters (three declaracions on two trucks) and
+    two walk-in exporters (three local journeys), each journey moving through
+    the stations in order so every incremental weight is known. Every check-in
+    is charged at unit_price 100 and rate 50, i.e. half a birr per kg.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        region = RegionOrCity.objects.create(name="Region")
+        zone = ZoneOrSubcity.objects.create(name="Zone", region=region)
+        woreda = Woreda.objects.create(name="Woreda", zone=zone)
+        # A journey checks in at most once per station
+        cls.stations = [
+            WorkStation.objects.create(
+                name=f"Station {number}",
+                machine_number=f"M-{number}",
+                woreda=woreda,
+                kebele="01",
+            )
+            for number in range(1, 5)
+        ]
+        regular = TaxPayerType.objects.create(name="regular")
+        walk_in = TaxPayerType.objects.create(name="walk in")
+        cls.regular_exporters = [
+            create_exporter(woreda, regular, 1),
+            create_exporter(woreda, regular, 2),
+        ]
+        cls.walkin_exporters = [
+            create_exporter(woreda, walk_in, 3),
+            create_exporter(woreda, walk_in, 4),
+        ]
+        owner = TruckOwner.objects.create(
+            first_name="Owner", last_name="Test", phone_number="0911000000"
+        )
+        cls.trucks = [create_truck(owner, "AA-1"), create_truck(owner, "AA-2")]
+
+        declaracion_a, declaracion_b, declaracion_c = (
+            Declaracion.objects.create(truck=truck, exporter=exporter)
+            for truck, exporter in [
+                (cls.trucks[0], cls.regular_exporters[0]),
+                (cls.trucks[0], cls.regular_exporters[0]),
+                (cls.trucks[1], cls.regular_exporters[1]),
+            ]
+        )
+        journey_1, journey_2, journey_3 = (
+            JourneyWithoutTruck.objects.create(exporter=exporter)
+            for exporter in [
+                cls.walkin_exporters[0],
+                cls.walkin_exporters[0],
+                cls.walkin_exporters[1],
+            ]
+        )
+
+        # Incremental weights: A 1000 + 500 + 0, B 200, C 800 + 100,
+        # journey 1 300 + 0 + 150, journey 2 100, journey 3 600
+        cls.checkins = {}
+        for name, station, journey, net_weight, checkin_status in [
+            ("a1", 0, {"declaracion": declaracion_a}, 1000, "success"),
+            ("a2", 1, {"declaracion": declaracion_a}, 1500, "paid"),
+            ("a3", 2, {"declaracion": declaracion_a}, 1400, "pass"),
+            ("a4", 3, {"declaracion": declaracion_a}, 5000, "pending"),
+            ("b1", 0, {"declaracion": declaracion_b}, 200, "success"),
+            ("c1", 0, {"declaracion": declaracion_c}, 800, "success"),
+            ("c2", 1, {"declaracion": declaracion_c}, 900, "success"),
+            ("j1", 0, {"localJourney": journey_1}, 300, "success"),
+            ("j2", 1, {"localJourney": journey_1}, 250, "success"),
+            ("j3", 2, {"localJourney": journey_1}, 400, "success"),
+            ("j4", 0, {"localJourney": journey_2}, 100, "success"),
+            ("j5", 0, {"localJourney": journey_3}, 600, "success"),
+        ]:
+            cls.checkins[name] = Checkin.objects.create(
+                station=cls.stations[station],
+                net_weight=Decimal(net_weight),
+                unit_price=100,
+                rate=Decimal(50),
+                status=checkin_status,
+                **journey,
+            )
+
+        year = timezone.localdate().year
+        cls.yearly_params = {
+            "selected_date_type": "yearly",
+            "start_date": f"{year}-01-01",
+            "end_date": f"{year}-12-31",
+        }
+
+    def get_report(self, view):
+        request = APIRequestFactory().get("/", self.yearly_params)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+
+@skipUnless(ROLLUPS_AVAILABLE, "The checkin rollups are Postgres materialized views")
+class AdminTopReportsTests(ReportTestData, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Changed well before the refresh, so every row is read from the rollup
+        Checkin.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        refresh_checkin_rollups()
+
+    def test_top_trucks_report(self):
+        with self.assertNumQueries(5):
+            report = self.get_report(admin_top_trucks_report)
+
+        self.assertEqual(
+            [
+                (
+                    row["plate_number"],
+                    row["owner_name"],
+                    row["total_checkins"],
+                    row["path_count"],
+                    float(row["total_kg"]),
+                    float(row["total_revenue"]),
+                )
+                for row in report
+            ],
+            [
+                ("AA-1", "Owner Test", 4, 2, 1700.0, 850.0),
+                ("AA-2", "Owner Test", 2, 1, 900.0, 450.0),
+            ],
+        )
+
+    def test_top_walkin_taxpayer_report(self):
+        with self.assertNumQueries(5):
+            report = self.get_report(admin_top_walkin_taxpayer_report)
+
+        self.assertEqual(
+            [
+                (
+                    row["exporter_name"],
+                    row["type"],
+                    row["total_path"],
+                    row["total_amount"],
+                    row["total_revenue"],
+                )
+                for row in report
+            ],
+            [
+                ("Exporter3 Test", "walk in", 2, 550.0, 275.0),
+                ("Exporter4 Test", "walk in", 1, 600.0, 300.0),
+            ],
+        )
+
+    def test_top_regular_taxpayer_report(self):
+        with self.assertNumQueries(5):
+            report = self.get_report(admin_top_regular_taxpayer_report)
+
+        self.assertEqual(
+            [
+                (
+                    row["tin_number"],
+                    row["type"],
+                    row["total_path"],
+                    row["total_amount"],
+                    row["total_revenue"],
+                )
+                for row in report
+            ],
+            [
+                ("0000000001", "regular", 2, 1700.0, 850.0),
+                ("0000000002", "regular", 1, 900.0, 450.0),
+            ],
+        )
+
+    def test_checkins_changed_since_the_refresh_are_read_live(self):
+        # Pay the pending check-in (+3600 kg) and add 100 kg to C's last one
+        pending = self.checkins["a4"]
+        pending.status = "paid"
+        pending.save()
+        edited = self.checkins["c2"]
+        edited.net_weight += 100
+        edited.save()
+
+        stale_reports = [
+            self.get_report(view)
+            for view in [
+                admin_top_trucks_report,
+                admin_top_regular_taxpayer_report,
+                admin_top_walkin_taxpayer_report,
+            ]
+        ]
+        refresh_checkin_rollups()
+        fresh_reports = [
+            self.get_report(view)
+            for view in [
+                admin_top_trucks_report,
+                admin_top_regular_taxpayer_report,
+                admin_top_walkin_taxpayer_report,
+            ]
+        ]
+
+        self.assertEqual(stale_reports, fresh_reports)
+        self.assertEqual(
+            [(row["total_path"], row["total_amount"]) for row in stale_reports[1]],
+            [(2, 5300.0), (1, 1000.0)],
+        )
+
+
+class AdminCombinedTaxpayerReportTests(ReportTestData, TestCase):
+    def test_totals_per_exporter(self):
+        with self.assertNumQueries(2):
+            report = self.get_report(admin_combined_taxpayer_report)
+
+        self.assertEqual(
+            [
+                (
+                    row["exporter_name"],
+                    row["total_amount"],
+                    row["total_revenue"],
+                    row["total_merchant_paths"],
+                    row["total_local_paths"],
+                )
+                for row in report
+            ],
+            [
+                ("Exporter1 Test", 1700.0, 850.0, 2, 0),
+                ("Exporter2 Test", 900.0, 450.0, 1, 0),
+                ("Exporter4 Test", 600.0, 300.0, 0, 1),
+                ("Exporter3 Test", 550.0, 275.0, 0, 2),
+            ],
+        )
+
+
+class TopExportersReportTests(ReportTestData, TestCase):
+    def setUp(self):
+        # Sign in the way the login view does: JWT cookies plus a session record
+        user = CustomUser.objects.create_user(
+            username="official", password="password", session_token="test-session"
+        )
+        UserSession.objects.create(user=user, session_token="test-session")
+        refresh = RefreshToken.for_user(user)
+        self.client.cookies["access"] = str(refresh.access_token)
+        self.client.cookies["refresh"] = str(refresh)
+        self.client.cookies["session"] = "test-session"
+        # The middleware keeps the signed-in user for audit logs; forget it
+        # before the next test rolls the user back
+        self.addCleanup(set_current_user, None)
+
+    def test_endpoint(self):
+        response = self.client.get(
+            reverse("top_exporters_report"),
+            {
+                "start_date": self.yearly_params["start_date"],
+                "end_date": self.yearly_params["end_date"],
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(
+            [
+                (row["tin_number"], row["total_path"], float(row["total_amount"]))
+                for row in report["merchant"]
+            ],
+            [("0000000001", 2, 1700.0), ("0000000002", 1, 900.0)],
+        )
+        self.assertEqual(
+            [
+                (row["exporter_name"], row["total_path"], float(row["total_revenue"]))
+                for row in report["local"]
+            ],
+            [("Exporter3 Test", 2, 275.0), ("Exporter4 Test", 1, 300.0)],
+        )
+
+    def test_invalid_date_range(self):
+        response = self.client.get(
+            reverse("top_exporters_report"),
+            {"start_date": "2024-02-01", "end_date": "2024-01-01"},
+        )
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 400)
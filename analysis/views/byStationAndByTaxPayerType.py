@@ -1,12 +1,11 @@
 from decimal import Decimal
 
-from django.db.models import ExpressionWrapper, F, FloatField, Sum
-from django.utils import timezone
 from django.utils.dateparse import parse_date
 from rest_framework import permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from analysis.views.helpers import PRICE_RATE_SCALE, annotate_previous_net_weight
 from declaracions.models import Checkin
 from workstations.models import WorkStation
 
@@ -18,77 +17,58 @@ def stationTaxpayer_revenue_report(request):
     end_date = parse_date(request.query_params.get("end_date"))
 
     data = {}
-    workstation = WorkStation.objects.all().prefetch_related("checkins")
-    for station in workstation:
+    totals_by_station = {}
+    workstations = list(WorkStation.objects.only("name"))
+    for station in workstations:
         data[station.name] = {
             "regular": {
                 "total_revenue": Decimal(0),
-                "total_amount": 0,
+                "total_amount": Decimal(0),
                 "transaction": 0,
             },
             "walkin": {
                 "total_revenue": Decimal(0),
-                "total_amount": 0,
+                "total_amount": Decimal(0),
                 "transaction": 0,
             },
         }
+        totals_by_station[station.pk] = data[station.name]
 
-        checkins = station.checkins.filter(
+    # The previous check-in's weight is resolved in the same query instead of one
+    # lookup per row
+    checkins = annotate_previous_net_weight(
+        Checkin.objects.filter(
+            station__isnull=False,
             checkin_time__gte=start_date,
             checkin_time__lte=end_date,
-            status__in=["pass", "paid", "success"],
+            status__in=Checkin.SUCCESSFUL_STATUSES,
         )
+    ).values_list(
+        "station_id",
+        "declaracion_id",
+        "net_weight",
+        "previous_net_weight",
+        "unit_price",
+        "rate",
+    )
 
-        for checkin in checkins:
-            total_amount = 0
-            total_revenue = Decimal(0)
-            is_regular = False
-            latest_checkin = None
+    for (
+        station_id,
+        declaracion_id,
+        net_weight,
+        previous_net_weight,
+        unit_price,
+        rate,
+    ) in checkins.iterator(chunk_size=2000):
+        weight = max(net_weight - (previous_net_weight or 0), 0)
 
-            if checkin.declaracion:
-                is_regular = True
-
-                latest_checkin = (
-                    Checkin.objects.filter(
-                        checkin_time__lt=checkin.checkin_time,
-                        declaracion=checkin.declaracion,
-                    )
-                    .order_by("-checkin_time")
-                    .first()
-                )
-
-            else:
-                is_regular = False
-                latest_checkin = (
-                    Checkin.objects.filter(
-                        checkin_time__lt=checkin.checkin_time,
-                        localJourney=checkin.localJourney,
-                    )
-                    .order_by("-checkin_time")
-                    .first()
-                )
-
-            weight = max(
-                checkin.net_weight
-                - (latest_checkin.net_weight if latest_checkin else 0),
-                0,
-            )
-
-            unit_price = Decimal(checkin.unit_price)
-            rate = Decimal(checkin.rate)
-            total_revenue = weight * (unit_price / 100) * (rate / 100)
-            total_amount = weight
-            if is_regular:
-                data[station.name]["regular"]["total_revenue"] += round(
-                    total_revenue, 2
-                )
-                data[station.name]["regular"]["total_amount"] += round(total_amount, 2)
-            else:
-                data[station.name]["walkin"]["total_revenue"] += round(total_revenue, 2)
-                data[station.name]["walkin"]["total_amount"] += round(total_amount, 2)
+        total_revenue = weight * unit_price * rate * PRICE_RATE_SCALE
+        station_totals = totals_by_station[station_id]
+        totals = station_totals["regular" if declaracion_id else "walkin"]
+        totals["total_revenue"] += round(total_revenue, 2)
+        totals["total_amount"] += round(weight, 2)
 
     # Prepare the report data
-    labels = WorkStation.objects.all()
-    labels = [station.name for station in labels]
+    labels = [station.name for station in workstations]
 
     return Response({"labels": labels, "data": data})
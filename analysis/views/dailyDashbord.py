@@ -1,19 +1,73 @@
-from collections import defaultdict
-from datetime import datetime, timedelta
+from decimal import Decimal
 
 #     return Response(response_data)
-from django.db.models import F, Sum
+from django.core.exceptions import ValidationError
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, ExtractMonth
 from django.utils import timezone
-from django.utils.dateparse import parse_date
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from analysis.views.helpers import hourly_data as hour_data
-from analysis.views.helpers import monthly_data as month_data
-from analysis.views.helpers import weekly_data as week_data
+from analysis.views.helpers import (
+    HOURLY_KEYS,
+    MONTHLY_KEYS,
+    PRICE_RATE_SCALE,
+    WEEKLY_KEYS,
+    annotate_previous_net_weight,
+    cache_live_report,
+    exporter_type_counts,
+    parse_and_validate_date_range,
+    week_of_month_range,
+)
 from declaracions.models import Checkin
-from exporters.models import Exporter
+
+# Check-ins of a local journey count as walk-in, the rest as regular
+WALK_IN_CHECKIN = Q(localJourney__isnull=False)
+
+# Label prefixes of the weekly_data / monthly_data keys, indexed by
+# ISO week day - 1 and month
+WEEKDAY_ABBREVIATIONS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTH_ABBREVIATIONS = (
+    None,
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+def successful_checkin_amounts(checkins):
+    """
+    Annotates the successful check-ins of `checkins` with their `amount`,
+    computed in SQL so callers can sum it per group in the database.
+
+    The first check-in of a journey is charged on its full net weight; later
+    ones on the positive difference from the previous check-in's weight.
+    """
+    charged_weight = Case(
+        When(previous_net_weight__isnull=True, then=F("net_weight")),
+        When(
+            net_weight__gt=F("previous_net_weight"),
+            then=F("net_weight") - F("previous_net_weight"),
+        ),
+        default=Value(Decimal(0)),
+        output_field=DecimalField(),
+    )
+    return annotate_previous_net_weight(
+        checkins.filter(status__in=Checkin.SUCCESSFUL_STATUSES)
+    ).annotate(
+        amount=charged_weight * F("unit_price") * F("rate") * PRICE_RATE_SCALE
+    )
 
 
 def calculate_amount_year(
@@ -27,31 +81,15 @@ def calculate_amount_year(
 ):
 
     # Filter Checkin objects for the requested year
-    daily_data = week_data.copy()
-    monthly_data = month_data.copy()
-    hourly_data = hour_data.copy()
+    daily_data = dict.fromkeys(WEEKLY_KEYS, 0.0)
+    monthly_data = dict.fromkeys(MONTHLY_KEYS, 0.0)
+    hourly_data = dict.fromkeys(HOURLY_KEYS, 0.0)
     all_checkins = []
     start_date = None
     end_date = None
     if new_Interval == "Weekly" and week is not None and month is not None:
-
-        first_day_of_month = datetime(int(requested_year), int(month), 1)
-        # Calculate the start of the specified week
-        week_start_day = first_day_of_month + timedelta(weeks=int(week) - 1)
-
-        # Adjust to the correct week day (Monday as start of the week)
-        week_start_day = week_start_day - timedelta(
-            days=week_start_day.weekday()
-        )  # Get to Monday of that week
-
-        # Determine the start and end dates for that week
-        start_date = timezone.make_aware(
-            week_start_day.replace(hour=0, minute=0, second=0)
-        )
-        end_date = timezone.make_aware(
-            week_start_day.replace(hour=23, minute=59, second=59) + timedelta(days=6)
-        )
-        print(start_date, end_date)
+        # Monday-to-Sunday week of the requested month
+        start_date, end_date = week_of_month_range(requested_year, month, week)
 
     if not requested_year:
         requested_year = timezone.now().year
@@ -65,71 +103,42 @@ def calculate_amount_year(
         all_checkins = Checkin.objects.filter(checkin_time__year=requested_year)
 
     if current_station:
-        print(current_station, "Current Staition")
         all_checkins = all_checkins.filter(station=current_station)
         if user.role.name == "controller":
             all_checkins = all_checkins.filter(employee=user)
 
-    for check_in in all_checkins:
-        amount = 0
-        print(check_in.status, "")
-        local = False
-        if check_in.status not in ["paid", "pass", "success"]:
-            continue
-        # Determine the previous check-in based on declaracion or localJourney
-        if check_in.declaracion:
-            previous_checkin = (
-                Checkin.objects.filter(
-                    declaracion=check_in.declaracion,
-                    checkin_time__lt=check_in.checkin_time,
-                )
-                .order_by("-checkin_time")
-                .first()
-            )
-            local = False
-        elif check_in.localJourney:
-            previous_checkin = (
-                Checkin.objects.filter(
-                    localJourney=check_in.localJourney,
-                    checkin_time__lt=check_in.checkin_time,
-                )
-                .order_by("-checkin_time")
-                .first()
-            )
-            local = True
-        else:
-            previous_checkin = None
-
-        # Calculate the amount based on the previous check-in
-        if previous_checkin:
-            weight_difference = check_in.net_weight - previous_checkin.net_weight
-            if weight_difference > 0:
-                amount = (
-                    weight_difference * check_in.unit_price / 100 * check_in.rate / 100
-                )
-        else:
-            amount = (
-                check_in.net_weight * check_in.unit_price / 100 * check_in.rate / 100
-            )
-
-        # Get the month from the check-in time
-        month = check_in.checkin_time.strftime("%b")  # Month in abbreviated format
-        day = check_in.checkin_time.strftime("%a")
-        hour = check_in.checkin_time.hour + 1
-        if local:
-            month += "_WalkIn"
-            day += "_WalkIn"
-            hour_key = f"{hour}h_WalkIn"
-
-        else:
-            month += "_Regular"
-            day += "_Regular"
-            hour_key = f"{hour}h_Regular"
+    # Sum the amounts per month (1-12), ISO week day (1-7) or hour (0-23), for
+    # each taxpayer type, in one grouped query for the requested interval
+    if new_Interval == "Weekly":
+        time_unit = ExtractIsoWeekDay("checkin_time")
+    elif new_Interval == "Daily":
+        time_unit = ExtractHour("checkin_time")
+    else:
+        time_unit = ExtractMonth("checkin_time")
+    unit_totals = (
+        successful_checkin_amounts(all_checkins)
+        .annotate(time_unit=time_unit)
+        .values("time_unit")
+        .annotate(
+            walk_in=Sum("amount", filter=WALK_IN_CHECKIN),
+            regular=Sum("amount", filter=~WALK_IN_CHECKIN),
+        )
+        .order_by()
+    )
 
-        # Add the amount to the corresponding month
-        monthly_data[month] += float(amount)
-        daily_data[day] += float(amount)
-        hourly_data[hour_key] += float(amount)
+    for totals in unit_totals:
+        unit = totals["time_unit"]
+        for suffix, amount in (
+            ("_WalkIn", totals["walk_in"]),
+            ("_Regular", totals["regular"]),
+        ):
+            amount = float(amount or 0)
+            if new_Interval == "Weekly":
+                daily_data[WEEKDAY_ABBREVIATIONS[unit - 1] + suffix] = amount
+            elif new_Interval == "Daily":
+                hourly_data[f"{unit + 1}h{suffix}"] = amount
+            else:
+                monthly_data[MONTH_ABBREVIATIONS[unit] + suffix] = amount
 
     # Sort months to ensure they are in the correct order
     if new_Interval == "Weekly":
@@ -154,62 +163,15 @@ def calculate_amount(
         all_checkins = all_checkins.filter(station=current_station)
         if user.role.name == "controller":
             all_checkins = all_checkins.filter(employee=user)
-    walk_in_amount = 0
-    regular_amount = 0
-    is_local = False
-
-    for check_in in all_checkins:
-        amount = 0
-        if not check_in.status in ["paid", "pass", "success"]:
-            continue
-        # Determine the previous check-in based on declaracion or localJourney
-        if check_in.declaracion:
-            previous_checkin = (
-                Checkin.objects.filter(
-                    declaracion=check_in.declaracion,
-                    checkin_time__lt=check_in.checkin_time,
-                )
-                .order_by("-checkin_time")
-                .first()
-            )
-            is_local = False
-        elif check_in.localJourney:
-            previous_checkin = (
-                Checkin.objects.filter(
-                    localJourney=check_in.localJourney,
-                    checkin_time__lt=check_in.checkin_time,
-                )
-                .order_by("-checkin_time")
-                .first()
-            )
-            is_local = True
-        else:
-            previous_checkin = None
-
-        # Calculate the amount based on the previous check-in
-        if previous_checkin:
-            weight_difference = check_in.net_weight - previous_checkin.net_weight
-            if weight_difference > 0:
-                amount = (
-                    weight_difference * check_in.unit_price / 100 * check_in.rate / 100
-                )
-            previous_checkin = None
-
-        else:
-            amount = (
-                check_in.net_weight * check_in.unit_price / 100 * check_in.rate / 100
-            )
-
-        if not is_local:
-            regular_amount += amount
-        else:
-            walk_in_amount += amount
-
-        # Get the month from the check-in time
-    return walk_in_amount, regular_amount
+    totals = successful_checkin_amounts(all_checkins).aggregate(
+        walk_in=Sum("amount", filter=WALK_IN_CHECKIN),
+        regular=Sum("amount", filter=~WALK_IN_CHECKIN),
+    )
+    return float(totals["walk_in"] or 0), float(totals["regular"] or 0)
 
 
 @api_view(["GET"])
+@cache_live_report
 def daily_revenue_report(request):
     year = request.query_params.get("year")
     month = request.query_params.get("month")
@@ -217,22 +179,7 @@ def daily_revenue_report(request):
     week = request.query_params.get("week")
     newInterval = request.query_params.get("newInterval")
 
-    start_date_str = request.query_params.get("start_date")
-    end_date_str = request.query_params.get("end_date")
-
-    end_date = parse_date(end_date_str) if end_date_str else datetime.now().date()
-
-    # If no start_date is provided, set it to one year before the end_date
-    start_date = (
-        parse_date(start_date_str)
-        if start_date_str
-        else (end_date - timedelta(days=365))
-    )
-
-    station_id = request.query_params.get("station_id")
-    controller_id = request.query_params.get("controller_id")
-    regular = Exporter.objects.filter(type__name="regular").count()
-    walk_in = Exporter.objects.filter(type__name="walk in").count()
+    exporter_counts = exporter_type_counts()
     current_station = request.user.current_station
 
     data = calculate_amount_year(
@@ -242,33 +189,25 @@ def daily_revenue_report(request):
     return Response(
         {
             "data": data,
-            "regular": regular,
-            "walk_in": walk_in,
+            "regular": exporter_counts["regular"],
+            "walk_in": exporter_counts["walk_in"],
         }
     )
 
 
 @api_view(["GET"])
+@cache_live_report
 def revenue_and_number(request):
 
-    start_date = request.query_params.get("start_date")
-    start_date = parse_date(start_date)
-    end_date = request.query_params.get("end_date")
-    end_date = parse_date(end_date)
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-
-    # Convert end_date to the end of the day (23:59:59)
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-    start_date = start_datetime
-    end_date = end_datetime
-    station_id = request.query_params.get("station_id")
-    controller_id = request.query_params.get("controller_id")
-    regular = Exporter.objects.filter(
-        type__name="regular", created_at__gte=start_date, created_at__lte=end_date
-    ).count()
-    walk_in = Exporter.objects.filter(
-        type__name="walk in", created_at__gte=start_date, created_at__lte=end_date
-    ).count()
+    # end_date is made inclusive (23:59:59) by the shared, cached parser
+    try:
+        start_date, end_date = parse_and_validate_date_range(
+            request.query_params.get("start_date"),
+            request.query_params.get("end_date"),
+        )
+    except ValidationError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    exporter_counts = exporter_type_counts(start_date, end_date)
     current_station = request.user.current_station
 
     walk_in_amount, regular_amount = calculate_amount(
@@ -279,7 +218,7 @@ def revenue_and_number(request):
         {
             "walk_in_amount": walk_in_amount,
             "regular_amount": regular_amount,
-            "regular": regular,
-            "walk_in": walk_in,
+            "regular": exporter_counts["regular"],
+            "walk_in": exporter_counts["walk_in"],
         }
     )
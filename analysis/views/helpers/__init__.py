@@ -1,3 +1,31 @@
-from .annotate_revenue_on_checkins import annotate_revenue_on_checkins
-from .date_info import hourly_data, monthly_data, weekly_data
-from .date_range_validator import parse_and_validate_date_range
+from .annotate_revenue_on_checkins import (
+    PRICE_RATE_SCALE,
+    annotate_groupable_revenue_on_checkins,
+    annotate_previous_net_weight,
+    annotate_revenue_on_checkins,
+    float_revenue_sum,
+)
+from .date_info import (
+    HOURLY_KEYS,
+    MONTHLY_KEYS,
+    WEEKLY_KEYS,
+    hourly_data,
+    monthly_data,
+    weekly_data,
+)
+from .date_range_validator import (
+    parse_and_validate_date_range,
+    week_of_month_range,
+    year_range,
+)
+from .exporter_counts import exporter_type_counts
+from .query_params import optional_uuid_param
+from .report_cache import cache_closed_range_report, cache_live_report
+from .revenue_rollup import checkin_revenue_sources, revenue_totals_by
+from .trend_buckets import (
+    EXTRACT_WEEKDAY_NAMES,
+    aggregate_trend_series,
+    get_trend_categories,
+    trend_bucket,
+    trend_time_unit,
+)
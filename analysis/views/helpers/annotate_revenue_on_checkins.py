@@ -1,7 +1,25 @@
 from decimal import Decimal
 
-from django.db.models import Case, DecimalField, F, Value, When, Window
-from django.db.models.functions import Lag
+from django.conf import settings
+from django.db.models import (
+    Case,
+    DecimalField,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import Cast, Coalesce, Lag
+
+from declaracions.models import Checkin
+
+# unit_price and rate are both applied as hundredths: (unit_price/100) * (rate/100).
+# One exact multiplication instead of two numeric divisions per row.
+PRICE_RATE_SCALE = Decimal("0.0001")
 
 
 def annotate_revenue_on_checkins(checkins_queryset):
@@ -13,7 +31,18 @@ def annotate_revenue_on_checkins(checkins_queryset):
         filtered_checkins = Checkin.objects.filter(...)
         revenue_qs = annotate_revenue_on_checkins(filtered_checkins)
         # revenue_qs now has .incremental_weight and .revenue attributes
+
+    The annotations are computed in SQL, so they need none of the check-in
+    columns loaded: when a report reads only a related name per row, pass e.g.
+    `checkins.select_related("station").only("station__name")` to join it in
+    the same query instead of fetching every column and each station.
+
+    With settings.REVENUE_ANNOTATION_STRATEGY = "subquery", the previous weight
+    comes from the correlated subquery of `annotate_groupable_revenue_on_checkins`
+    instead of the LAG window; the annotations are the same.
     """
+    if settings.REVENUE_ANNOTATION_STRATEGY == "subquery":
+        return annotate_groupable_revenue_on_checkins(checkins_queryset)
 
     window = Window(
         expression=Lag("net_weight", default=Decimal(0)),
@@ -44,11 +73,100 @@ def annotate_revenue_on_checkins(checkins_queryset):
         .annotate(
             # Finally, calculate the revenue on the database side
             revenue=(
-                F("incremental_weight")
-                * (F("unit_price") / Decimal(100))
-                * (F("rate") / Decimal(100))
+                F("incremental_weight") * F("unit_price") * F("rate") * PRICE_RATE_SCALE
             )
         )
     )
 
     return annotated_queryset
+
+
+def annotate_groupable_revenue_on_checkins(checkins_queryset):
+    """
+    Same annotations as `annotate_revenue_on_checkins` (previous_net_weight,
+    incremental_weight, revenue), but the previous weight is looked up with a
+    correlated subquery over the same filtered check-ins instead of a LAG window.
+
+    Postgres rejects aggregates over window functions, so use this variant when
+    the result is grouped, e.g. `.values("employee").annotate(Sum("revenue"))`.
+    Grouping by a field shared by all check-ins of a declaracion or local
+    journey (its truck or exporter) keeps each previous weight within the same
+    group, so the per-group sums equal those over the whole filtered queryset.
+    """
+    earlier_checkins = checkins_queryset.filter(
+        checkin_time__lt=OuterRef("checkin_time")
+    ).order_by("-checkin_time")
+
+    return (
+        checkins_queryset.annotate(
+            previous_net_weight=Coalesce(
+                Subquery(
+                    earlier_checkins.filter(
+                        declaracion=OuterRef("declaracion")
+                    ).values("net_weight")[:1]
+                ),
+                Subquery(
+                    earlier_checkins.filter(
+                        localJourney=OuterRef("localJourney")
+                    ).values("net_weight")[:1]
+                ),
+                Value(Decimal(0)),
+            )
+        )
+        .annotate(incremental_weight_raw=F("net_weight") - F("previous_net_weight"))
+        .annotate(
+            incremental_weight=Case(
+                When(incremental_weight_raw__lt=0, then=Value(Decimal(0))),
+                default=F("incremental_weight_raw"),
+                output_field=DecimalField(),
+            )
+        )
+        .annotate(
+            revenue=(
+                F("incremental_weight") * F("unit_price") * F("rate") * PRICE_RATE_SCALE
+            )
+        )
+    )
+
+
+def float_revenue_sum(field_name="revenue", **extra):
+    """
+    Sums `field_name` in double precision (0.0 when no rows match), for reports
+    that return the totals as JSON floats anyway: summing floats is cheaper than
+    NUMERIC arithmetic and spares the Decimal-to-float conversion of each total.
+    `extra` is passed to Sum, e.g. `filter=Q(...)`.
+    """
+    return Coalesce(
+        Sum(Cast(field_name, output_field=FloatField()), **extra), Value(0.0)
+    )
+
+
+def annotate_previous_net_weight(checkins):
+    """
+    Annotates each check-in with `previous_net_weight`: the net weight of the
+    latest earlier check-in of the same declaracion or local journey, at any
+    station and in any status (None when there is none).
+
+    The value is read from `Checkin.prev_net_weight`, which `Checkin.save()`
+    maintains at write time. Rows where it is still null (first check-ins, or
+    rows not yet backfilled) fall back to a correlated subquery in the same SQL
+    statement; COALESCE only evaluates it for those rows.
+    """
+    earlier_checkins = Checkin.objects.filter(
+        checkin_time__lt=OuterRef("checkin_time")
+    ).order_by("-checkin_time")
+    return checkins.annotate(
+        previous_net_weight=Coalesce(
+            F("prev_net_weight"),
+            Subquery(
+                earlier_checkins.filter(declaracion=OuterRef("declaracion")).values(
+                    "net_weight"
+                )[:1]
+            ),
+            Subquery(
+                earlier_checkins.filter(localJourney=OuterRef("localJourney")).values(
+                    "net_weight"
+                )[:1]
+            ),
+        )
+    )
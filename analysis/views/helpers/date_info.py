@@ -93,3 +93,9 @@ hourly_data = {
     "24h_Regular": 0.0,
     "24h_WalkIn": 0.0,
 }
+
+# Bucket keys of the series above, in display order. Reports start each call from
+# `dict.fromkeys(KEYS, 0.0)` instead of copying (and risking mutating) the dicts.
+WEEKLY_KEYS = tuple(weekly_data)
+MONTHLY_KEYS = tuple(monthly_data)
+HOURLY_KEYS = tuple(hourly_data)
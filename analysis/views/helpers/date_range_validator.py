@@ -1,8 +1,9 @@
 from calendar import monthrange
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 from django.core.exceptions import ValidationError
-from django.utils.timezone import make_aware
+from django.utils.timezone import get_current_timezone_name, make_aware
 
 
 def parse_and_validate_date_range(
@@ -13,7 +14,8 @@ def parse_and_validate_date_range(
 
     - Always validates format and logical order (start before end).
     - If `selected_date_type` is provided ('weekly', 'monthly', 'yearly'),
-      it enforces strict rules on the date range duration.
+      it enforces strict rules on the date range duration. Any other value is
+      rejected, so callers fail before running queries.
     - If `selected_date_type` is None, it allows any flexible date range.
 
     Raises:
@@ -25,9 +27,59 @@ def parse_and_validate_date_range(
     if not start_date_str or not end_date_str:
         raise ValidationError("start_date and end_date are required parameters.")
 
+    # Dashboards repeat the same few ranges, so parsed results are cached per
+    # active timezone (the returned aware datetimes are immutable).
+    return _parse_date_range(
+        start_date_str, end_date_str, selected_date_type, get_current_timezone_name()
+    )
+
+
+def week_of_month_range(year, month, week):
+    """
+    Returns the aware (start, inclusive end) datetimes of the Monday-to-Sunday
+    week containing day `1 + 7 * (week - 1)` of the given month.
+    """
+    week_start_day = datetime(int(year), int(month), 1) + timedelta(
+        weeks=int(week) - 1
+    )
+    week_start_day -= timedelta(days=week_start_day.weekday())  # Monday
+    start_date = make_aware(week_start_day)
+    inclusive_end_date = make_aware(
+        week_start_day + timedelta(days=6, hours=23, minutes=59, seconds=59)
+    )
+    return start_date, inclusive_end_date
+
+
+def year_range(year):
+    """
+    Returns the aware (start, inclusive end) datetimes of the calendar year
+    `year`, matching what `parse_and_validate_date_range` gives for
+    "<year>-01-01" to "<year>-12-31".
+    """
+    # Dashboards default to the current year, so the bounds are cached per year
+    # and active timezone like parsed ranges are.
+    return _year_range(int(year), get_current_timezone_name())
+
+
+@lru_cache(maxsize=8)
+def _year_range(year, tzname):
+    start_date = make_aware(datetime(year, 1, 1))
+    inclusive_end_date = make_aware(datetime(year, 12, 31, 23, 59, 59))
+    return start_date, inclusive_end_date
+
+
+def _parse_day(date_str):
+    """Parses a strict YYYY-MM-DD string into a naive midnight datetime."""
+    if len(date_str) != 10:
+        raise ValueError(date_str)
+    return datetime.fromisoformat(date_str)
+
+
+@lru_cache(maxsize=1024)
+def _parse_date_range(start_date_str, end_date_str, selected_date_type, tzname):
     try:
-        start_date = make_aware(datetime.strptime(start_date_str, "%Y-%m-%d"))
-        end_date = make_aware(datetime.strptime(end_date_str, "%Y-%m-%d"))
+        start_date = make_aware(_parse_day(start_date_str))
+        end_date = make_aware(_parse_day(end_date_str))
     except (ValueError, TypeError):
         raise ValidationError("Invalid date format. Use YYYY-MM-DD.")
 
@@ -39,6 +91,11 @@ def parse_and_validate_date_range(
 
     # --- Optional Strict Validation based on selected_date_type ---
     if selected_date_type:
+        if selected_date_type not in ("weekly", "monthly", "yearly"):
+            raise ValidationError(
+                "Invalid selected_date_type. Must be 'weekly', 'monthly', or 'yearly'."
+            )
+
         date_range_days = (end_date - start_date).days + 1
 
         if selected_date_type == "weekly" and date_range_days != 7:
@@ -0,0 +1,67 @@
+import logging
+
+from django.core.cache import caches
+from django.db.models import Count, Q
+
+from exporters.models import Exporter
+
+from .report_cache import LIVE_REPORT_CACHE_ALIAS
+
+logger = logging.getLogger(__name__)
+
+EXPORTER_TYPE_COUNTS_TIMEOUT = 300  # seconds
+
+# Bumped whenever an exporter is saved or deleted; every cached count carries the
+# version in its key, so one increment retires the ranged counts as well.
+EXPORTER_TYPE_COUNTS_VERSION_KEY = "exp_count:version"
+
+# Built once and shared by every count; aggregate() never mutates its filters
+REGULAR_EXPORTER_FILTER = Q(type__name="regular")
+WALK_IN_EXPORTER_FILTER = Q(type__name="walk in")
+
+
+def exporter_type_counts_cache_key(version, start_date=None, end_date=None):
+    if start_date is None and end_date is None:
+        return f"exp_count:v{version}"
+    return f"exp_count:v{version}:{start_date.isoformat()}:{end_date.isoformat()}"
+
+
+def invalidate_exporter_type_counts():
+    """
+    Retires every cached exporter type count, ranged or not. Cache errors are
+    logged rather than raised: the counts then expire on their own within
+    EXPORTER_TYPE_COUNTS_TIMEOUT.
+    """
+    report_cache = caches[LIVE_REPORT_CACHE_ALIAS]
+    try:
+        report_cache.add(EXPORTER_TYPE_COUNTS_VERSION_KEY, 1, timeout=None)
+        report_cache.incr(EXPORTER_TYPE_COUNTS_VERSION_KEY)
+    except Exception:
+        logger.exception("Could not invalidate the cached exporter type counts")
+
+
+def exporter_type_counts(start_date=None, end_date=None):
+    """
+    Returns {"regular": ..., "walk_in": ...}: the number of exporters of each
+    type, optionally limited to those created within [start_date, end_date].
+    Both counts come from one conditional aggregate and are kept for a few
+    minutes in the shared live report cache, so every worker sees the same
+    entry; saving or deleting an exporter retires all of them at once.
+    """
+
+    def count():
+        exporters = Exporter.objects.all()
+        if start_date is not None and end_date is not None:
+            exporters = exporters.filter(created_at__range=(start_date, end_date))
+        return exporters.aggregate(
+            regular=Count("pk", filter=REGULAR_EXPORTER_FILTER),
+            walk_in=Count("pk", filter=WALK_IN_EXPORTER_FILTER),
+        )
+
+    report_cache = caches[LIVE_REPORT_CACHE_ALIAS]
+    version = report_cache.get_or_set(EXPORTER_TYPE_COUNTS_VERSION_KEY, 1, None)
+    return report_cache.get_or_set(
+        exporter_type_counts_cache_key(version, start_date, end_date),
+        count,
+        EXPORTER_TYPE_COUNTS_TIMEOUT,
+    )
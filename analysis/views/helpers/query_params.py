@@ -0,0 +1,23 @@
+import uuid
+
+from django.core.exceptions import ValidationError
+
+# Values the frontend sends for an optional filter that has nothing selected
+UNSET_PARAM_VALUES = frozenset({"", "null", "undefined", "None"})
+
+
+def optional_uuid_param(query_params, name):
+    """
+    Returns the optional UUID query parameter `name` (e.g. "station_id") as a
+    `uuid.UUID`, or None when it is absent or one of UNSET_PARAM_VALUES.
+
+    Raises:
+        ValidationError: If the parameter is set but is not a valid UUID.
+    """
+    value = query_params.get(name)
+    if value is None or value in UNSET_PARAM_VALUES:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise ValidationError(f"Invalid {name}. Expected a UUID.")
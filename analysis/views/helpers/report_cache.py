@@ -0,0 +1,100 @@
+import hashlib
+from datetime import date
+from functools import wraps
+
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+REPORT_CACHE_ALIAS = "reports"
+REPORT_CACHE_TIMEOUT = 60 * 60  # seconds
+
+LIVE_REPORT_CACHE_ALIAS = "live_reports"
+LIVE_REPORT_CACHE_TIMEOUT = 60  # seconds
+
+
+def report_cache_key(view_name, query_params, *extra):
+    """
+    Builds the cache key of a report response from the view name and its query
+    parameters, in a stable order so equivalent query strings share an entry.
+    `extra` values (e.g. the requesting user) are folded into the key as well.
+    """
+    params = "&".join(
+        f"{name}={value}"
+        for name in sorted(query_params)
+        for value in query_params.getlist(name)
+    )
+    key_source = "|".join([params, *map(str, extra)])
+    digest = hashlib.md5(key_source.encode(), usedforsecurity=False).hexdigest()
+    return f"report:{view_name}:{digest}"
+
+
+def _is_closed_range(end_date_str):
+    try:
+        end_date = date.fromisoformat(end_date_str)
+    except (TypeError, ValueError):
+        return False
+    return end_date < timezone.localdate()
+
+
+def cache_closed_range_report(view_func):
+    """
+    Caches the response data of a read-only report view for
+    REPORT_CACHE_TIMEOUT seconds, keyed on the view and its query parameters.
+
+    Only ranges whose `end_date` is before today are cached; today's figures
+    keep changing as check-ins arrive, so those requests always hit the
+    database. Error responses are never cached.
+    """
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not _is_closed_range(request.query_params.get("end_date")):
+            return view_func(request, *args, **kwargs)
+
+        report_cache = caches[REPORT_CACHE_ALIAS]
+        key = report_cache_key(view_func.__name__, request.query_params)
+        data = report_cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            report_cache.set(key, response.data, REPORT_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
+
+
+def cache_live_report(view_func):
+    """
+    Caches the response data of a read-only dashboard view for
+    LIVE_REPORT_CACHE_TIMEOUT seconds, whatever the date range, so dashboards
+    refreshing with the same parameters skip the database in between.
+
+    These views narrow the data to the requesting user (e.g. a controller's own
+    check-ins or their current station), so the key includes the user, their
+    role and their current station alongside the query parameters. Error
+    responses are never cached.
+    """
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        user = request.user
+        role = getattr(getattr(user, "role", None), "name", None)
+        current_station_id = getattr(user, "current_station_id", None)
+        report_cache = caches[LIVE_REPORT_CACHE_ALIAS]
+        key = report_cache_key(
+            view_func.__name__, request.query_params, user.pk, role, current_station_id
+        )
+        data = report_cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            report_cache.set(key, response.data, LIVE_REPORT_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
@@ -0,0 +1,104 @@
+from calendar import month_name
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+from django.db.models.functions import ExtractDay, ExtractIsoWeekDay, ExtractMonth
+
+WEEKDAY_NAMES = (
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+
+# Day names indexed by the ExtractWeekDay value (1 = Sunday ... 7 = Saturday)
+EXTRACT_WEEKDAY_NAMES = (None, WEEKDAY_NAMES[6], *WEEKDAY_NAMES[:6])
+
+
+def _weekly_categories(start_date, inclusive_end_date):
+    return list(WEEKDAY_NAMES)
+
+
+def _monthly_categories(start_date, inclusive_end_date):
+    days_in_range = (inclusive_end_date.date() - start_date.date()).days + 1
+    num_weeks = (days_in_range + 6) // 7  # Ceiling division
+    return [f"Week {i}" for i in range(1, num_weeks + 1)]
+
+
+def _yearly_categories(start_date, inclusive_end_date):
+    return [month_name[i] for i in range(1, 13)]
+
+
+# selected_date_type -> (categories builder, 1-based time unit extract, units per bucket)
+# ISO week days run 1=Monday ... 7=Sunday; days 1-7 of a month are "Week 1", etc.
+TREND_BUCKETS = {
+    "weekly": (_weekly_categories, ExtractIsoWeekDay, 1),
+    "monthly": (_monthly_categories, ExtractDay, 7),
+    "yearly": (_yearly_categories, ExtractMonth, 1),
+}
+
+
+def get_trend_categories(selected_date_type, start_date, inclusive_end_date):
+    """
+    Returns the category labels of a weekly/monthly/yearly trend report, in the
+    order the series data must follow.
+    """
+    build_categories, _, _ = TREND_BUCKETS[selected_date_type]
+    return build_categories(start_date, inclusive_end_date)
+
+
+def trend_time_unit(selected_date_type, field_name):
+    """
+    Returns a database expression extracting the 1-based time unit (ISO week day,
+    day of month or month) of `field_name` for the given `selected_date_type`.
+    """
+    _, extract, _ = TREND_BUCKETS[selected_date_type]
+    return extract(field_name)
+
+
+def trend_bucket(selected_date_type, time_unit):
+    """
+    Maps a time unit produced by `trend_time_unit` to its index in the
+    categories list.
+    """
+    _, _, units_per_bucket = TREND_BUCKETS[selected_date_type]
+    return (int(time_unit) - 1) // units_per_bucket
+
+
+def aggregate_trend_series(
+    queryset, selected_date_type, categories, time_field, value_field, series_filters
+):
+    """
+    Sums `value_field` per category bucket and per series in a single aggregate
+    query. `series_filters` maps each series name to the Q selecting its rows.
+
+    Works on querysets annotated with window functions (such as
+    `annotate_revenue_on_checkins`), which Postgres cannot GROUP BY directly.
+
+    Returns:
+        dict: {series name: [Decimal total per category, in category order]}
+    """
+    _, extract, units_per_bucket = TREND_BUCKETS[selected_date_type]
+    queryset = queryset.annotate(time_unit=extract(time_field))
+
+    aggregates = {}
+    for series_index, series_filter in enumerate(series_filters.values()):
+        for bucket in range(len(categories)):
+            first_unit = bucket * units_per_bucket + 1
+            last_unit = first_unit + units_per_bucket - 1
+            aggregates[f"series_{series_index}_{bucket}"] = Sum(
+                value_field,
+                filter=series_filter & Q(time_unit__range=(first_unit, last_unit)),
+            )
+    totals = queryset.aggregate(**aggregates)
+
+    return {
+        name: [
+            totals[f"series_{series_index}_{bucket}"] or Decimal(0)
+            for bucket in range(len(categories))
+        ]
+        for series_index, name in enumerate(series_filters)
+    }
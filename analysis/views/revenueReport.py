@@ -1,139 +1,157 @@
+import json
 from decimal import Decimal
+from itertools import islice
 
-from django.utils import timezone
-from django.utils.dateparse import parse_date
-from rest_framework import permissions
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from analysis.views.helpers import (
+    annotate_revenue_on_checkins,
+    parse_and_validate_date_range,
+)
 from declaracions.models import Checkin
 
-from ..serializers import RevenueSerializer
+# Check-ins fetched and serialized per round while streaming the report
+REPORT_CHUNK_SIZE = 2000
+
+CENTS = Decimal("0.01")
+
+
+def _format_amount(revenue):
+    """
+    Renders a revenue as a 2-decimal string, the format the report's former
+    DecimalField(decimal_places=2) serializer field produced (half-even
+    rounding, without a detour through float).
+    """
+    return str(revenue.quantize(CENTS))
+
+
+def _report_row(checkin):
+    """
+    Formats one revenue-annotated check-in as a report row, or returns None when
+    it belongs to neither a declaracion nor a local journey.
+    """
+    if checkin.declaracion:
+        declaracion = checkin.declaracion
+        return {
+            "tin_number": (
+                declaracion.exporter.tin_number if declaracion.exporter else None
+            ),
+            "exporter_first_name": (
+                declaracion.exporter.first_name if declaracion.exporter else None
+            ),
+            "exporter_last_name": (
+                declaracion.exporter.last_name if declaracion.exporter else None
+            ),
+            "commodity_name": (
+                declaracion.commodity.name if declaracion.commodity else None
+            ),
+            "payment_method": (
+                checkin.payment_method.name if checkin.payment_method else None
+            ),
+            "amount": _format_amount(checkin.revenue),
+        }
+    if checkin.localJourney:
+        local_journey = checkin.localJourney
+        return {
+            "tin_number": (
+                local_journey.exporter.unique_id if local_journey.exporter else None
+            ),
+            "exporter_first_name": (
+                local_journey.exporter.first_name if local_journey.exporter else None
+            ),
+            "exporter_last_name": (
+                local_journey.exporter.last_name if local_journey.exporter else None
+            ),
+            "commodity_name": (
+                local_journey.commodity.name if local_journey.commodity else None
+            ),
+            "payment_method": (
+                checkin.payment_method.name if checkin.payment_method else None
+            ),
+            "amount": _format_amount(checkin.revenue),
+        }
+    return None
+
+
+def _stream_report_rows(checkins):
+    """
+    Yields the report as a JSON array, serializing REPORT_CHUNK_SIZE check-ins at
+    a time so memory stays flat however many check-ins match.
+    """
+    rows = filter(
+        None, map(_report_row, checkins.iterator(chunk_size=REPORT_CHUNK_SIZE))
+    )
+    separator = ""
+    yield "["
+    while chunk := list(islice(rows, REPORT_CHUNK_SIZE)):
+        # Same compact, non-ASCII-escaped output as DRF's JSONRenderer
+        serialized = json.dumps(chunk, ensure_ascii=False, separators=(",", ":"))
+        yield separator + serialized[1:-1]
+        separator = ","
+    yield "]"
 
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def revenue_report(request):
-    start_date = parse_date(request.query_params.get("start_date"))
-    end_date = parse_date(request.query_params.get("end_date"))
+    start_date_str = request.query_params.get("start_date")
+    end_date_str = request.query_params.get("end_date")
     station_id = request.query_params.get("station_id")
     controller_id = request.query_params.get("controller_id")
 
+    # Both bounds are optional, but an unparsable date is rejected instead of
+    # silently dropping the filter
     filters = {}
-    if start_date:
-        filters["checkin_time__gte"] = timezone.make_aware(
-            timezone.datetime.combine(start_date, timezone.datetime.min.time())
-        )
-    if end_date:
-        filters["checkin_time__lte"] = timezone.make_aware(
-            timezone.datetime.combine(end_date, timezone.datetime.max.time())
-        )
+    try:
+        if start_date_str:
+            filters["checkin_time__gte"], _ = parse_and_validate_date_range(
+                start_date_str, start_date_str
+            )
+        if end_date_str:
+            _, filters["checkin_time__lte"] = parse_and_validate_date_range(
+                end_date_str, end_date_str
+            )
+    except ValidationError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     if station_id and station_id != "null":
         filters["station_id"] = station_id
     if controller_id and controller_id != "null":
         filters["employee_id"] = controller_id
     filters["status"] = "success"
 
-    checkins = Checkin.objects.filter(**filters).select_related(
-        "declaracion",
-        "declaracion__exporter",
-        "declaracion__commodity",
-        "payment_method",
-        "localJourney",
-        "localJourney__exporter",
-        "localJourney__commodity",
-    )
-
-    revenue_data = []
-    for checkin in checkins:
-        # Find the latest checkin for the same declaracion or localJourney
-        latest_checkin = (
-            checkins.filter(
-                checkin_time__lt=checkin.checkin_time,
-                localJourney=checkin.localJourney if checkin.localJourney else None,
-                declaracion=checkin.declaracion if checkin.declaracion else None,
-            )
-            .order_by("-checkin_time")
-            .first()
+    # Join the related rows the report reads, but load only the columns used. The
+    # previous check-in's weight comes from the LAG window of the revenue helper.
+    checkins = annotate_revenue_on_checkins(
+        Checkin.objects.filter(**filters)
+        .select_related(
+            "declaracion__exporter",
+            "declaracion__commodity",
+            "payment_method",
+            "localJourney__exporter",
+            "localJourney__commodity",
         )
-
-        # Calculate weight based on the difference from the latest checkin
-        weight = (
-            max(checkin.net_weight - latest_checkin.net_weight, 0)
-            if latest_checkin
-            else checkin.net_weight
+        .only(
+            "checkin_time",
+            "net_weight",
+            "unit_price",
+            "rate",
+            "payment_method__name",
+            "declaracion__exporter__tin_number",
+            "declaracion__exporter__first_name",
+            "declaracion__exporter__last_name",
+            "declaracion__commodity__name",
+            "localJourney__exporter__unique_id",
+            "localJourney__exporter__first_name",
+            "localJourney__exporter__last_name",
+            "localJourney__commodity__name",
         )
-        weight = Decimal(weight)
-        unit_price = Decimal(checkin.unit_price)
-        rate = Decimal(checkin.rate)
-        revenue = weight * (unit_price / Decimal(100)) * (rate / Decimal(100))
-
-        revenue_data.append({"checkin_time": checkin.checkin_time, "revenue": revenue})
-
-    # Prepare data for serialization
-    report_data = []
-    for revenue_entry in revenue_data:
-        checkin_time = revenue_entry["checkin_time"]
-        revenue = revenue_entry["revenue"]
-        checkin = checkins.get(checkin_time=checkin_time)
-
-        if checkin.declaracion:
-            declaracion = checkin.declaracion
-            report_data.append(
-                {
-                    "tin_number": (
-                        declaracion.exporter.tin_number
-                        if declaracion.exporter
-                        else None
-                    ),
-                    "exporter_first_name": (
-                        declaracion.exporter.first_name
-                        if declaracion.exporter
-                        else None
-                    ),
-                    "exporter_last_name": (
-                        declaracion.exporter.last_name if declaracion.exporter else None
-                    ),
-                    "commodity_name": (
-                        declaracion.commodity.name if declaracion.commodity else None
-                    ),
-                    "payment_method": (
-                        checkin.payment_method.name if checkin.payment_method else None
-                    ),
-                    "amount": round(float(revenue), 2),
-                }
-            )
-        elif checkin.localJourney:
-            local_journey = checkin.localJourney
-            report_data.append(
-                {
-                    "tin_number": (
-                        local_journey.exporter.unique_id
-                        if local_journey.exporter
-                        else None
-                    ),
-                    "exporter_first_name": (
-                        local_journey.exporter.first_name
-                        if local_journey.exporter
-                        else None
-                    ),
-                    "exporter_last_name": (
-                        local_journey.exporter.last_name
-                        if local_journey.exporter
-                        else None
-                    ),
-                    "commodity_name": (
-                        local_journey.commodity.name
-                        if local_journey.commodity
-                        else None
-                    ),
-                    "payment_method": (
-                        checkin.payment_method.name if checkin.payment_method else None
-                    ),
-                    "amount": round(float(revenue), 2),
-                }
-            )
+    )
 
-    serializer = RevenueSerializer(data=report_data, many=True)
-    serializer.is_valid(raise_exception=True)
-    return Response(serializer.data)
+    return StreamingHttpResponse(
+        _stream_report_rows(checkins), content_type="application/json"
+    )
@@ -1,12 +1,12 @@
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import timedelta
 
 from django.core.exceptions import ValidationError
-from django.db.models import Case, CharField, Q, Sum
+from django.db.models import Case, CharField, F, Q
 from django.db.models import Value as V
 from django.db.models import When
 from django.db.models.functions import (
-    Coalesce,
+    Cast,
+    Concat,
     ExtractHour,
     ExtractMonth,
     ExtractWeekDay,
@@ -14,21 +14,63 @@ from django.db.models.functions import (
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    permission_classes,
+    renderer_classes,
+)
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from analysis.renderers import ORJSONRenderer
 from analysis.views.helpers import (
-    annotate_revenue_on_checkins,
+    HOURLY_KEYS,
+    MONTHLY_KEYS,
+    WEEKLY_KEYS,
+    annotate_groupable_revenue_on_checkins,
+    cache_live_report,
+    exporter_type_counts,
+    float_revenue_sum,
+    optional_uuid_param,
     parse_and_validate_date_range,
+    week_of_month_range,
+    year_range,
 )
-from analysis.views.helpers.date_info import hourly_data, monthly_data, weekly_data
 from declaracions.models import Checkin
-from exporters.models import Exporter
+
+# Labels of the 1-based ExtractWeekDay (1 = Sunday) and ExtractMonth values
+WEEKDAY_LABELS = ("Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat")
+MONTH_LABELS = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+def _label_case(field_name, labels):
+    """Maps the 1-based integer `field_name` to its entry of `labels` in SQL."""
+    return Case(
+        *[
+            When(**{field_name: number}, then=V(label))
+            for number, label in enumerate(labels, start=1)
+        ],
+        output_field=CharField(),
+    )
 
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@renderer_classes([ORJSONRenderer])
+@cache_live_report
 def daily_hourly_monthly_revenue_breakdown(request):
     """
     Provides a breakdown of revenue for 'Regular' and 'Walk-in' taxpayers,
@@ -77,44 +119,27 @@ def daily_hourly_monthly_revenue_breakdown(request):
     actual_end_date = None
 
     try:
+        station_id = optional_uuid_param(request.query_params, "station_id")
+        controller_id = optional_uuid_param(request.query_params, "controller_id")
+
         if new_interval == "Daily" and date_str:
-            # For a single day, uses the 'date' parameter
-            parsed_date = parse_date(date_str)
-            if not parsed_date:
-                raise ValidationError("Invalid 'date' format. Use YYYY-MM-DD.")
-            actual_start_date = timezone.make_aware(
-                datetime.combine(parsed_date, datetime.min.time())
-            )
-            actual_end_date = timezone.make_aware(
-                datetime.combine(parsed_date, datetime.max.time())
+            # For a single day, uses the 'date' parameter as both range ends
+            actual_start_date, actual_end_date = parse_and_validate_date_range(
+                date_str, date_str
             )
         elif new_interval == "Weekly" and year_str and month_str and week_str:
-            # For a specific week within a month/year
-            requested_year_int = int(year_str)
-            month_int = int(month_str)
-            week_int = int(week_str)
-
-            first_day_of_month = datetime(requested_year_int, month_int, 1)
-            week_start_day = first_day_of_month + timedelta(weeks=week_int - 1)
-            week_start_day = week_start_day - timedelta(
-                days=week_start_day.weekday()
-            )  # Adjust to Monday of that week
-
-            actual_start_date = timezone.make_aware(
-                week_start_day.replace(hour=0, minute=0, second=0)
-            )
-            actual_end_date = timezone.make_aware(
-                week_start_day.replace(hour=23, minute=59, second=59)
-                + timedelta(days=6)
+            # For a specific (Monday-to-Sunday) week within a month/year
+            actual_start_date, actual_end_date = week_of_month_range(
+                year_str, month_str, week_str
             )
+        elif not start_date_param and not end_date_param:
+            # No range given: fall back to the current year (matching original
+            # calculate_amount_year's default), built directly instead of being
+            # formatted as strings and parsed back
+            actual_start_date, actual_end_date = year_range(timezone.now().year)
         else:
             # Default to using start_date/end_date query parameters.
-            # If not provided, fallback to current year (matching original calculate_amount_year's default)
-            if not start_date_param and not end_date_param:
-                current_year = timezone.now().year
-                start_date_param = f"{current_year}-01-01"
-                end_date_param = f"{current_year}-12-31"
-            elif not start_date_param and end_date_param:
+            if not start_date_param and end_date_param:
                 # If only end_date is provided, assume 1 year before it (matching original logic)
                 parsed_end_date = parse_date(end_date_param)
                 if not parsed_end_date:
@@ -131,22 +156,22 @@ def daily_hourly_monthly_revenue_breakdown(request):
     except (ValueError, TypeError, ValidationError) as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    station_id = request.query_params.get("station_id")
-    controller_id = request.query_params.get("controller_id")
-
     # 2. Build base filter criteria for check-ins
     base_checkin_filters = Q(
         checkin_time__range=[actual_start_date, actual_end_date],
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
     )
 
-    if station_id and station_id != "null":
+    if station_id is not None:
         base_checkin_filters &= Q(station_id=station_id)
 
-    # Apply user-specific filtering for controllers, or general controller_id filter
-    if request.user.is_authenticated and request.user.role.name == "controller":
+    # Apply user-specific filtering for controllers, or general controller_id filter.
+    # The role is resolved once; anonymous users and users without a role have
+    # no role name.
+    role_name = getattr(getattr(request.user, "role", None), "name", None)
+    if role_name == "controller":
         base_checkin_filters &= Q(employee=request.user)
-    elif controller_id and controller_id != "null":
+    elif controller_id is not None:
         base_checkin_filters &= Q(employee_id=controller_id)
 
     checkins_query = Checkin.objects.filter(base_checkin_filters)
@@ -154,133 +179,67 @@ def daily_hourly_monthly_revenue_breakdown(request):
     if not checkins_query.exists():
         return Response({"data": {}, "regular": 0, "walk_in": 0})
 
-    # 3. Annotate check-ins with incremental revenue and taxpayer type
+    # 3. Annotate check-ins with incremental revenue and taxpayer type (the
+    # groupable variant, since the rows are summed per time bucket below)
     checkins_with_revenue = (
-        annotate_revenue_on_checkins(checkins_query)
+        annotate_groupable_revenue_on_checkins(checkins_query)
         .annotate(
+            # Test the check-in's own FK columns; no join to the journey tables.
+            # The declaracion_or_localJourney_not_both constraint guarantees
+            # exactly one is set, so every row is either Regular or WalkIn.
             taxpayer_type=Case(
-                When(declaracion__isnull=False, then=V("Regular")),
-                When(localJourney__isnull=False, then=V("WalkIn")),
-                default=V(
-                    "Unknown"
-                ),  # Should ideally not hit 'Unknown' if data is clean
+                When(declaracion_id__isnull=False, then=V("Regular")),
+                default=V("WalkIn"),
                 output_field=CharField(),
             )
         )
-        .filter(taxpayer_type__in=["Regular", "WalkIn"])
-    )  # Filter out 'Unknown' types if any
-
-    aggregated_data_result = {}
+    )
 
     if new_interval == "Weekly":
-        # Group by day of the week (DB: 1=Sun, ..., 7=Sat) and taxpayer type
-        aggregated_query = (
-            checkins_with_revenue.annotate(
-                db_day_of_week=ExtractWeekDay("checkin_time")
-            )
-            .values("db_day_of_week", "taxpayer_type")
-            .annotate(total_revenue=Coalesce(Sum("revenue"), Decimal(0)))
-            .order_by("db_day_of_week", "taxpayer_type")
-        )
-
-        # Initialize from template
-        aggregated_data_result = weekly_data.copy()
-
-        # Map DB weekday (1-7) to Python weekday (0-6) and then to label
-        # DB: 1=Sun, 2=Mon, 3=Tue, 4=Wed, 5=Thu, 6=Fri, 7=Sat
-        # Python: 0=Mon, 1=Tue, 2=Wed, 3=Thu, 4=Fri, 5=Sat, 6=Sun
-        db_day_to_label_map = {
-            1: "Sun",
-            2: "Mon",
-            3: "Tue",
-            4: "Wed",
-            5: "Thu",
-            6: "Fri",
-            7: "Sat",
-        }
-
-        for item in aggregated_query:
-            day_label = db_day_to_label_map.get(item["db_day_of_week"])
-            taxpayer_cat = item["taxpayer_type"]
-            total_rev = item["total_revenue"]
-
-            if day_label:
-                key = f"{day_label}_{taxpayer_cat}"
-                aggregated_data_result[key] += float(
-                    total_rev
-                )  # Use += for cases where multiple entries might aggregate to same key
-
+        # Day of the week (DB: 1=Sun, ..., 7=Sat), e.g. "Mon_Regular"
+        time_unit = ExtractWeekDay("checkin_time")
+        bucket_label = _label_case("time_unit", WEEKDAY_LABELS)
+        bucket_keys = WEEKLY_KEYS
     elif new_interval == "Daily":  # This originally meant hourly data for a single day
-        # Group by hour (DB: 0-23) and taxpayer type
-        aggregated_query = (
-            checkins_with_revenue.annotate(hour_of_day=ExtractHour("checkin_time"))
-            .values("hour_of_day", "taxpayer_type")
-            .annotate(total_revenue=Coalesce(Sum("revenue"), Decimal(0)))
-            .order_by("hour_of_day", "taxpayer_type")
+        # Hour of the day (DB: 0-23, shown as 1-24), e.g. "9h_WalkIn"
+        time_unit = ExtractHour("checkin_time")
+        bucket_label = Concat(
+            Cast(F("time_unit") + 1, output_field=CharField()), V("h")
         )
-
-        # Initialize from template
-        aggregated_data_result = hourly_data.copy()
-
-        for item in aggregated_query:
-            db_hour = item["hour_of_day"]
-            taxpayer_cat = item["taxpayer_type"]
-            total_rev = item["total_revenue"]
-
-            display_hour = db_hour + 1  # Convert 0-23 to 1-24
-            key = f"{display_hour}h_{taxpayer_cat}"
-            if key in aggregated_data_result:  # Defensive check
-                aggregated_data_result[key] += float(total_rev)
-
+        bucket_keys = HOURLY_KEYS
     else:  # Default is monthly data (originally yearly)
-        # Group by month (DB: 1=Jan, ..., 12=Dec) and taxpayer type
-        aggregated_query = (
-            checkins_with_revenue.annotate(month_of_year=ExtractMonth("checkin_time"))
-            .values("month_of_year", "taxpayer_type")
-            .annotate(total_revenue=Coalesce(Sum("revenue"), Decimal(0)))
-            .order_by("month_of_year", "taxpayer_type")
+        # Month of the year (DB: 1=Jan, ..., 12=Dec), e.g. "Jan_Regular"
+        time_unit = ExtractMonth("checkin_time")
+        bucket_label = _label_case("time_unit", MONTH_LABELS)
+        bucket_keys = MONTHLY_KEYS
+
+    # Group by the final "<bucket>_<taxpayer type>" key, built by the database
+    aggregated_query = (
+        checkins_with_revenue.annotate(time_unit=time_unit)
+        .annotate(
+            key=Concat(
+                bucket_label, V("_"), F("taxpayer_type"), output_field=CharField()
+            )
         )
+        .values("key")
+        .annotate(total_revenue=float_revenue_sum())
+        .values_list("key", "total_revenue")
+    )
 
-        # Initialize from template
-        aggregated_data_result = monthly_data.copy()
-        month_num_to_label_map = {
-            1: "Jan",
-            2: "Feb",
-            3: "Mar",
-            4: "Apr",
-            5: "May",
-            6: "Jun",
-            7: "Jul",
-            8: "Aug",
-            9: "Sep",
-            10: "Oct",
-            11: "Nov",
-            12: "Dec",
-        }
-
-        for item in aggregated_query:
-            db_month = item["month_of_year"]
-            taxpayer_cat = item["taxpayer_type"]
-            total_rev = item["total_revenue"]
-
-            month_label = month_num_to_label_map.get(db_month)
-            if month_label:
-                key = f"{month_label}_{taxpayer_cat}"
-                aggregated_data_result[key] += float(total_rev)
+    # Start every bucket of the interval's template at 0
+    aggregated_data_result = dict.fromkeys(bucket_keys, 0.0)
+    for key, total_revenue in aggregated_query.iterator(chunk_size=500):
+        if key in aggregated_data_result:  # Defensive check
+            aggregated_data_result[key] += total_revenue
 
     # 4. Count regular and walk-in exporters within the determined date range
     # These counts are based on the 'created_at' field of Exporter, not check-ins.
-    regular_exporters_count = Exporter.objects.filter(
-        type__name="regular", created_at__range=[actual_start_date, actual_end_date]
-    ).count()
-    walk_in_exporters_count = Exporter.objects.filter(
-        type__name="walk in", created_at__range=[actual_start_date, actual_end_date]
-    ).count()
+    exporter_counts = exporter_type_counts(actual_start_date, actual_end_date)
 
     response_data = {
         "data": aggregated_data_result,
-        "regular": regular_exporters_count,
-        "walk_in": walk_in_exporters_count,
+        "regular": exporter_counts["regular"],
+        "walk_in": exporter_counts["walk_in"],
     }
 
     return Response(response_data)
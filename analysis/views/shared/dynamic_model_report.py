@@ -70,14 +70,18 @@ def dynamic_model_report(request, model_name):
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     # 2. Determine the model and serializer class based on model_name
+    # related_fields are the foreign keys each serializer dereferences per row
     model = None
     serializer_class = None
+    related_fields = ()
     if model_name == "drivers":
         model = Driver
         serializer_class = DriverSerializer
+        related_fields = ("register_by", "register_place")
     elif model_name == "exporters":
         model = Exporter
         serializer_class = ExporterSerializer
+        related_fields = ("register_by", "register_place", "type")
     else:
         return Response(
             {"error": "Invalid model name. Choose 'drivers' or 'exporters'."},
@@ -96,8 +100,9 @@ def dynamic_model_report(request, model_name):
         # Assuming 'register_by_id' is the field for controller ID on Driver/Exporter
         filters["register_by_id"] = controller_id
 
-    # 4. Filter the queryset
-    queryset = model.objects.filter(**filters)
+    # 4. Filter the queryset, joining the related rows the serializer reads so
+    # a page is fetched in one query instead of one extra query per FK per row
+    queryset = model.objects.filter(**filters).select_related(*related_fields)
 
     # 5. Apply pagination
     paginator = CustomLimitOffsetPagination()
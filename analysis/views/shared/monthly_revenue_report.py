@@ -1,15 +1,23 @@
-from decimal import Decimal
+from datetime import timedelta
 
 from django.core.exceptions import ValidationError
-from django.db.models import F, Q, Sum
-from django.db.models.functions import Coalesce, ExtractDay
+from django.db.models import Q
+from django.db.models.functions import TruncDate
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    permission_classes,
+    renderer_classes,
+)
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from analysis.renderers import ORJSONRenderer
 from analysis.views.helpers import (
-    annotate_revenue_on_checkins,
+    annotate_groupable_revenue_on_checkins,
+    cache_closed_range_report,
+    float_revenue_sum,
+    optional_uuid_param,
     parse_and_validate_date_range,
 )
 from declaracions.models import Checkin
@@ -17,6 +25,8 @@ from declaracions.models import Checkin
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@renderer_classes([ORJSONRenderer])
+@cache_closed_range_report
 def monthly_revenue_report(request):
     """
     Generates a daily revenue report for a specified date range, with optional
@@ -24,9 +34,9 @@ def monthly_revenue_report(request):
     revenue trends day-by-day within a month-like period.
 
     This view uses `parse_and_validate_date_range` to handle date inputs and
-    `annotate_revenue_on_checkins` to efficiently calculate incremental revenue
-    at the database level. It then aggregates this revenue by each day within
-    the selected period.
+    `annotate_groupable_revenue_on_checkins` to efficiently calculate incremental
+    revenue at the database level. It then aggregates this revenue by each day
+    within the selected period in the same query.
 
     Query Parameters:
     - start_date (str, YYYY-MM-DD): The start date for filtering check-ins. Required.
@@ -35,8 +45,9 @@ def monthly_revenue_report(request):
     - controller_id (int, optional): Filters check-ins by a specific employee (controller) ID.
 
     Returns:
-        Response: A dictionary containing 'labels' (days of the month, formatted as "DD")
-        and 'data' (corresponding total daily revenue).
+        Response: A dictionary containing 'labels' (days of the month, formatted as "DD",
+        or "MM-DD" when the range spans several months) and 'data' (corresponding
+        total daily revenue).
         Example:
         {
             "labels": ["01", "02", "03", ...],
@@ -48,11 +59,11 @@ def monthly_revenue_report(request):
     """
     start_date_str = request.query_params.get("start_date")
     end_date_str = request.query_params.get("end_date")
-    station_id = request.query_params.get("station_id")
-    controller_id = request.query_params.get("controller_id")
 
-    # 1. Date Validation and Parsing using the helper function
+    # 1. Filter and date validation and parsing using the helper functions
     try:
+        station_id = optional_uuid_param(request.query_params, "station_id")
+        controller_id = optional_uuid_param(request.query_params, "controller_id")
         start_date, inclusive_end_date = parse_and_validate_date_range(
             start_date_str, end_date_str
         )
@@ -62,53 +73,54 @@ def monthly_revenue_report(request):
     # 2. Build filter criteria for the base queryset
     filters = Q(
         checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
     )
-    if station_id and station_id != "null":
+    if station_id is not None:
         filters &= Q(station_id=station_id)
-    if controller_id and controller_id != "null":
+    if controller_id is not None:
         filters &= Q(employee_id=controller_id)
 
     base_checkins_query = Checkin.objects.filter(filters)
 
-    if not base_checkins_query.exists():
-        return Response({"labels": [], "data": []})
-
-    # 3. Annotate check-ins with incremental weight and revenue using the helper function
-    checkins_with_revenue = annotate_revenue_on_checkins(base_checkins_query)
-
-    # 4. Aggregate revenue by day of the month using Python
-    # checkins_with_revenue is annotated with 'revenue'. 
-    # Use ExtractDay just for extracting the specific field, but no Sum.
-    checkins_with_revenue = checkins_with_revenue.annotate(day_of_month=ExtractDay("checkin_time"))
+    # 3. Annotate check-ins with incremental weight and revenue using the helper
+    # function (the groupable variant, since the rows are summed per day below)
+    checkins_with_revenue = annotate_groupable_revenue_on_checkins(base_checkins_query)
+
+    # 4. Aggregate revenue by calendar date directly in the database (keyed on the
+    # full date so the same day number of different months stays apart)
+    daily_aggregates = (
+        checkins_with_revenue.annotate(day=TruncDate("checkin_time"))
+        .values("day")
+        .annotate(total_revenue=float_revenue_sum())
+        .order_by("day")
+        .values_list("day", "total_revenue")
+    )
 
-    # We will iterate and fill revenue_by_day_dict later.
+    # No successful check-ins in the period: the grouped query returns no rows,
+    # so there's no need for a separate existence probe beforehand.
+    daily_aggregates = list(daily_aggregates)
+    if not daily_aggregates:
+        return Response({"labels": [], "data": []})
 
     # Prepare labels and data, ensuring all days in the range are represented
     # even if they have no revenue.
-    all_days_in_range = []
-    current_date = start_date.date()
-    while current_date <= inclusive_end_date.date():
-        all_days_in_range.append(current_date.day)
-        current_date += F(
-            "timedelta(days=1)"
-        )  # Using F for database calculation might be faster
-
-    # Create a dictionary to hold revenue for each day, initialized to 0
-    revenue_by_day_dict = {
-        day: Decimal(0) for day in sorted(list(set(all_days_in_range)))
+    num_days = (inclusive_end_date.date() - start_date.date()).days + 1
+    revenue_by_day = {
+        start_date.date() + timedelta(days=offset): 0.0 for offset in range(num_days)
     }
 
-    for checkin in checkins_with_revenue:
-        day = checkin.day_of_month
-        rev = checkin.revenue or Decimal(0)
-        if day in revenue_by_day_dict:
-            revenue_by_day_dict[day] += rev
+    for day, total_revenue in daily_aggregates:
+        if day in revenue_by_day:  # Defensive check
+            revenue_by_day[day] = total_revenue
 
-    labels = [f"{day:02}" for day in sorted(revenue_by_day_dict.keys())]
-    data = [
-        float(revenue_by_day_dict[day]) for day in sorted(revenue_by_day_dict.keys())
-    ]
+    # Day numbers alone are ambiguous once the range crosses a month boundary
+    spans_months = (start_date.year, start_date.month) != (
+        inclusive_end_date.year,
+        inclusive_end_date.month,
+    )
+    label_format = "%m-%d" if spans_months else "%d"
+    labels = [day.strftime(label_format) for day in revenue_by_day]
+    data = list(revenue_by_day.values())
 
     response_data = {"labels": labels, "data": data}
 
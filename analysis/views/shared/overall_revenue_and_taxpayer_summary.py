@@ -1,29 +1,37 @@
 from collections import defaultdict
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Case, CharField, DecimalField, Q, Sum
+from django.db.models import Case, CharField, DecimalField, Q
 from django.db.models import Value as V
 from django.db.models import When
-from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    permission_classes,
+    renderer_classes,
+)
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from analysis.renderers import ORJSONRenderer
 from analysis.views.helpers import (
     annotate_revenue_on_checkins,
+    cache_live_report,
+    exporter_type_counts,
+    float_revenue_sum,
+    optional_uuid_param,
     parse_and_validate_date_range,
 )
 from declaracions.models import Checkin
-from exporters.models import Exporter
 
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@renderer_classes([ORJSONRenderer])
+@cache_live_report
 def overall_revenue_and_taxpayer_summary(request):
     """
     Provides a summary of total revenue split between 'Regular' and 'Walk-in' taxpayers,
@@ -57,11 +65,11 @@ def overall_revenue_and_taxpayer_summary(request):
     """
     start_date_str = request.query_params.get("start_date")
     end_date_str = request.query_params.get("end_date")
-    station_id = request.query_params.get("station_id")
-    controller_id = request.query_params.get("controller_id")
 
-    # 1. Date Validation and Parsing using the helper function
+    # 1. Filter and date validation and parsing using the helper functions
     try:
+        station_id = optional_uuid_param(request.query_params, "station_id")
+        controller_id = optional_uuid_param(request.query_params, "controller_id")
         start_date, inclusive_end_date = parse_and_validate_date_range(
             start_date_str, end_date_str
         )
@@ -71,73 +79,54 @@ def overall_revenue_and_taxpayer_summary(request):
     # 2. Build base filter criteria for check-ins
     base_checkin_filters = Q(
         checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
     )
 
-    if station_id and station_id != "null":
+    if station_id is not None:
         base_checkin_filters &= Q(station_id=station_id)
 
-    # Apply user-specific filtering for controllers, or general controller_id filter
-    # The original view used request.user.current_station and request.user.role.name
-    # Assuming request.user is authenticated if these are expected.
-    if request.user.is_authenticated:
-        if request.user.role.name == "controller":
-            # If the logged-in user is a controller, filter by their employee ID
-            base_checkin_filters &= Q(employee=request.user)
-        # If user is not a controller, but a controller_id is provided, filter by that.
-        elif controller_id and controller_id != "null":
-            base_checkin_filters &= Q(employee_id=controller_id)
-    elif (
-        controller_id and controller_id != "null"
-    ):  # If user is anonymous, but controller_id is provided
+    # Apply user-specific filtering for controllers, or general controller_id filter.
+    # The role is resolved once; anonymous users and users without a role have
+    # no role name.
+    role_name = getattr(getattr(request.user, "role", None), "name", None)
+    if role_name == "controller":
+        # If the logged-in user is a controller, filter by their employee ID
+        base_checkin_filters &= Q(employee=request.user)
+    elif controller_id is not None:
         base_checkin_filters &= Q(employee_id=controller_id)
 
     checkins_query = Checkin.objects.filter(base_checkin_filters)
 
-    walk_in_amount = Decimal(0)
-    regular_amount = Decimal(0)
-
-    if checkins_query.exists():
-        # 3. Annotate check-ins with incremental revenue and taxpayer type
-        checkins_with_revenue = (
-            annotate_revenue_on_checkins(checkins_query)
-            .annotate(
-                taxpayer_type=Case(
-                    When(declaracion__isnull=False, then=V("Regular")),
-                    When(localJourney__isnull=False, then=V("WalkIn")),
-                    default=V("Unknown"),
-                    output_field=CharField(),
-                )
+    # 3. Annotate check-ins with incremental revenue and taxpayer type
+    checkins_with_revenue = (
+        annotate_revenue_on_checkins(checkins_query)
+        .annotate(
+            # Test the check-in's own FK columns; no join to the journey tables.
+            # The declaracion_or_localJourney_not_both constraint guarantees
+            # exactly one is set, so every row is either Regular or WalkIn.
+            taxpayer_type=Case(
+                When(declaracion_id__isnull=False, then=V("Regular")),
+                default=V("WalkIn"),
+                output_field=CharField(),
             )
-            .filter(taxpayer_type__in=["Regular", "WalkIn"])
-        )  # Only consider valid taxpayer types
-
-        # 4. Aggregate total revenue by taxpayer type (Python)
-        for checkin in checkins_with_revenue:
-            rev = checkin.revenue or Decimal(0)
-            t_type = checkin.taxpayer_type
-            
-            if t_type == "WalkIn":
-                walk_in_amount += rev
-            elif t_type == "Regular":
-                regular_amount += rev
-
-    # 5. Count regular and walk-in exporters within the specified date range (based on created_at)
-    regular_exporters_count = Exporter.objects.filter(
-        type__name="regular", created_at__range=[start_date, inclusive_end_date]
-    ).count()
-    walk_in_exporters_count = Exporter.objects.filter(
-        type__name="walk in", created_at__range=[start_date, inclusive_end_date]
-    ).count()
+        )
+    )
+
+    # 4. Aggregate total revenue by taxpayer type in one conditional aggregate
+    revenue_totals = checkins_with_revenue.aggregate(
+        walk_in_amount=float_revenue_sum(filter=Q(taxpayer_type="WalkIn")),
+        regular_amount=float_revenue_sum(filter=Q(taxpayer_type="Regular")),
+    )
+
+    # 5. Count regular and walk-in exporters created within the date range
+    exporter_counts = exporter_type_counts(start_date, inclusive_end_date)
 
     # 6. Format the response data (structure preserved for frontend)
     response_data = {
-        "walk_in_amount": float(walk_in_amount),
-        "regular_amount": float(regular_amount),
-        "regular": regular_exporters_count,
-        "walk_in": walk_in_exporters_count,
+        "walk_in_amount": revenue_totals["walk_in_amount"],
+        "regular_amount": revenue_totals["regular_amount"],
+        "regular": exporter_counts["regular"],
+        "walk_in": exporter_counts["walk_in"],
     }
 
     return Response(response_data)
-
-    return Response(response_data)
@@ -1,29 +1,60 @@
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Count, Sum
+from django.db.models import CharField, Count, DecimalField, F, Sum
+from django.db.models import Value as V
+from django.db.models.functions import Coalesce, Concat, Round
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from declaracions.models import Checkin
 
-from ..helpers import annotate_revenue_on_checkins, parse_and_validate_date_range
+from ..helpers import (
+    annotate_groupable_revenue_on_checkins,
+    cache_closed_range_report,
+    optional_uuid_param,
+    parse_and_validate_date_range,
+)
+
+# Value of a total with nothing to sum
+ZERO = Decimal("0.00")
+
+
+def _exporter_name(exporter_path):
+    """The "<first name> <last name>" of the exporter at `exporter_path`, in SQL."""
+    return Concat(
+        F(f"{exporter_path}__first_name"),
+        V(" "),
+        F(f"{exporter_path}__last_name"),
+        output_field=CharField(),
+    )
+
+
+def _rounded_revenue_sum():
+    """Total revenue rounded to 2 decimals by the database, 0 when empty."""
+    return Coalesce(Round(Sum("revenue"), 2), V(ZERO), output_field=DecimalField())
+
+
+def _weight_sum():
+    """Total incremental weight, 0 when empty."""
+    return Coalesce(Sum("incremental_weight"), V(ZERO), output_field=DecimalField())
 
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
+@cache_closed_range_report
 def top_exporters_report(request):
     """
     Generates a report of the top 10 "merchant" (declaration-based) and top 10
     "local" (walk-in) exporters, ranked by their path/journey count.
     """
-    station_id = request.query_params.get("station_id")
-    controller_id = request.query_params.get("controller_id")
     start_date_str = request.query_params.get("start_date")
     end_date_str = request.query_params.get("end_date")
 
     try:
+        station_id = optional_uuid_param(request.query_params, "station_id")
+        controller_id = optional_uuid_param(request.query_params, "controller_id")
         start_date, end_date = parse_and_validate_date_range(
             start_date_str, end_date_str
         )
@@ -32,41 +63,45 @@ def top_exporters_report(request):
 
     base_filters = {
         "checkin_time__range": [start_date, end_date],
-        "status__in": ["pass", "paid", "success"],
+        "status__in": Checkin.SUCCESSFUL_STATUSES,
     }
-    if station_id and station_id != "null":
+    if station_id is not None:
         base_filters["station_id"] = station_id
-    if controller_id and controller_id != "null":
+    if controller_id is not None:
         base_filters["employee_id"] = controller_id
 
-    merchant_filters = {**base_filters, "declaracion__exporter__isnull": False}
+    merchant_filters = {**base_filters, "declaracion__exporter_id__isnull": False}
     top_merchants = (
-        annotate_revenue_on_checkins(Checkin.objects.filter(**merchant_filters))
+        annotate_groupable_revenue_on_checkins(
+            Checkin.objects.filter(**merchant_filters)
+        )
+        .annotate(exporter_name=_exporter_name("declaracion__exporter"))
         .values(
             "declaracion__exporter__tin_number",
             "declaracion__exporter__type__name",
-            "declaracion__exporter__first_name",
-            "declaracion__exporter__last_name",
+            "exporter_name",
         )
         .annotate(
-            total_revenue=Sum("revenue"),
-            total_amount=Sum("incremental_weight"),
+            total_revenue=_rounded_revenue_sum(),
+            total_amount=_weight_sum(),
             total_path=Count("declaracion_id", distinct=True),
         )
         .order_by("-total_path")[:10]
     )
 
-    local_filters = {**base_filters, "localJourney__exporter__isnull": False}
+    local_filters = {**base_filters, "localJourney__exporter_id__isnull": False}
     top_locals = (
-        annotate_revenue_on_checkins(Checkin.objects.filter(**local_filters))
+        annotate_groupable_revenue_on_checkins(
+            Checkin.objects.filter(**local_filters)
+        )
+        .annotate(exporter_name=_exporter_name("localJourney__exporter"))
         .values(
             "localJourney__exporter__type__name",
-            "localJourney__exporter__first_name",
-            "localJourney__exporter__last_name",
+            "exporter_name",
         )
         .annotate(
-            total_revenue=Sum("revenue"),
-            total_amount=Sum("incremental_weight"),
+            total_revenue=_rounded_revenue_sum(),
+            total_amount=_weight_sum(),
             total_path=Count("localJourney_id", distinct=True),
         )
         .order_by("-total_path")[:10]
@@ -77,9 +112,9 @@ def top_exporters_report(request):
         report_data["local"].append(
             {
                 "type": exporter["localJourney__exporter__type__name"],
-                "exporter_name": f"{exporter['localJourney__exporter__first_name']} {exporter['localJourney__exporter__last_name']}",
-                "total_amount": exporter["total_amount"] or 0,
-                "total_revenue": round(exporter["total_revenue"] or Decimal(0), 2),
+                "exporter_name": exporter["exporter_name"],
+                "total_amount": exporter["total_amount"],
+                "total_revenue": exporter["total_revenue"],
                 "total_path": exporter["total_path"],
             }
         )
@@ -89,9 +124,9 @@ def top_exporters_report(request):
             {
                 "tin_number": exporter["declaracion__exporter__tin_number"],
                 "type": exporter["declaracion__exporter__type__name"],
-                "exporter_name": f"{exporter['declaracion__exporter__first_name']} {exporter['declaracion__exporter__last_name']}",
-                "total_amount": exporter["total_amount"] or 0,
-                "total_revenue": round(exporter["total_revenue"] or Decimal(0), 2),
+                "exporter_name": exporter["exporter_name"],
+                "total_amount": exporter["total_amount"],
+                "total_revenue": exporter["total_revenue"],
                 "total_path": exporter["total_path"],
             }
         )
@@ -1,31 +1,44 @@
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Count, Sum
+from django.db.models import Count, DecimalField, Sum
+from django.db.models import Value as V
+from django.db.models.functions import Coalesce
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.serializers import TopTrucksSerializer
 from declaracions.models import Checkin
+from trucks.models import Truck
 
-from ..helpers import annotate_revenue_on_checkins, parse_and_validate_date_range
+from ..helpers import (
+    annotate_groupable_revenue_on_checkins,
+    cache_closed_range_report,
+    optional_uuid_param,
+    parse_and_validate_date_range,
+)
+
+# Totals are reported with 2 decimals
+ZERO = Decimal("0.00")
 
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
+@cache_closed_range_report
 def top_trucks_report(request):
     """
     Generates a report of the top 10 most active trucks based on check-in count
     within a given date range. It can be filtered by station and controller.
-    This view efficiently calculates all metrics using a single, optimized database query.
+    The ranking is computed on the truck FK alone; names and revenue/weight totals
+    are then fetched for the 10 selected trucks only.
     """
     start_date_str = request.query_params.get("start_date")
     end_date_str = request.query_params.get("end_date")
-    station_id = request.query_params.get("station_id")
-    controller_id = request.query_params.get("controller_id")
 
     try:
+        station_id = optional_uuid_param(request.query_params, "station_id")
+        controller_id = optional_uuid_param(request.query_params, "controller_id")
         start_date, end_date = parse_and_validate_date_range(
             start_date_str, end_date_str
         )
@@ -34,38 +47,58 @@ def top_trucks_report(request):
 
     filters = {
         "checkin_time__range": [start_date, end_date],
-        "status__in": ["pass", "paid", "success"],
-        "declaracion__truck__isnull": False,
+        "status__in": Checkin.SUCCESSFUL_STATUSES,
+        "declaracion__truck_id__isnull": False,
     }
-    if station_id and station_id != "null":
+    if station_id is not None:
         filters["station_id"] = station_id
-    if controller_id and controller_id != "null":
+    if controller_id is not None:
         filters["employee_id"] = controller_id
 
     base_checkins = Checkin.objects.filter(**filters)
-    checkins_with_revenue = annotate_revenue_on_checkins(base_checkins)
 
-    truck_stats = (
-        checkins_with_revenue.values(
-            "declaracion__truck__id",
-            "declaracion__truck__plate_number",
-            "declaracion__truck__truck_brand",
-            "declaracion__truck__owner__first_name",
-            "declaracion__truck__owner__last_name",
-        )
+    # 1. Rank trucks on the check-in counts alone, grouped by the truck FK column
+    top_trucks = list(
+        base_checkins.values("declaracion__truck_id")
         .annotate(
-            total_revenue=Sum("revenue"),
-            total_kg=Sum("incremental_weight"),
             total_checkins=Count("id"),
             path_count=Count("declaracion_id", distinct=True),
         )
         .order_by("-total_checkins", "-path_count")[:10]
     )
+    top_truck_ids = [truck["declaracion__truck_id"] for truck in top_trucks]
+
+    # 2. Fetch the descriptive columns and revenue/weight totals of those trucks
+    truck_details = {
+        truck["id"]: truck
+        for truck in Truck.objects.filter(id__in=top_truck_ids).values(
+            "id", "plate_number", "truck_brand", "owner__first_name", "owner__last_name"
+        )
+    }
+    truck_totals = {
+        truck["declaracion__truck_id"]: truck
+        for truck in annotate_groupable_revenue_on_checkins(
+            base_checkins.filter(declaracion__truck_id__in=top_truck_ids)
+        )
+        .values("declaracion__truck_id")
+        .annotate(
+            total_revenue=Coalesce(
+                Sum("revenue"), V(ZERO), output_field=DecimalField()
+            ),
+            total_kg=Coalesce(
+                Sum("incremental_weight"), V(ZERO), output_field=DecimalField()
+            ),
+        )
+    }
 
     report_data = []
-    for truck in truck_stats:
-        owner_first_name = truck["declaracion__truck__owner__first_name"]
-        owner_last_name = truck["declaracion__truck__owner__last_name"]
+    for truck_counts in top_trucks:
+        truck_id = truck_counts["declaracion__truck_id"]
+        truck = truck_details[truck_id]
+        totals = truck_totals[truck_id]
+
+        owner_first_name = truck["owner__first_name"]
+        owner_last_name = truck["owner__last_name"]
         owner_name = (
             f"{owner_first_name} {owner_last_name}"
             if owner_first_name and owner_last_name
@@ -74,16 +107,15 @@ def top_trucks_report(request):
 
         report_data.append(
             {
-                "plate_number": truck["declaracion__truck__plate_number"],
-                "make": truck["declaracion__truck__truck_brand"] or "Unknown",
+                "plate_number": truck["plate_number"],
+                "make": truck["truck_brand"] or "Unknown",
                 "owner_name": owner_name,
-                "total_checkins": truck["total_checkins"],
-                "path_count": truck["path_count"],
-                "total_kg": round(truck["total_kg"] or 0, 2),
-                "total_revenue": round(truck["total_revenue"] or Decimal(0), 2),
+                "total_checkins": truck_counts["total_checkins"],
+                "path_count": truck_counts["path_count"],
+                "total_kg": totals["total_kg"].quantize(ZERO),
+                "total_revenue": totals["total_revenue"].quantize(ZERO),
             }
         )
 
-    serializer = TopTrucksSerializer(data=report_data, many=True)
-    serializer.is_valid(raise_exception=True)
-    return Response(serializer.data)
+    # The rows are built server-side, so serialize for output only (no validation)
+    return Response(TopTrucksSerializer(report_data, many=True).data)
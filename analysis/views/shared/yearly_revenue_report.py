@@ -1,5 +1,4 @@
 from django.core.exceptions import ValidationError
-from django.db.models import Sum
 from django.db.models.functions import TruncMonth
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -8,7 +7,12 @@ from rest_framework.response import Response
 
 from declaracions.models import Checkin
 
-from ..helpers import annotate_revenue_on_checkins, parse_and_validate_date_range
+from ..helpers import (
+    annotate_groupable_revenue_on_checkins,
+    float_revenue_sum,
+    optional_uuid_param,
+    parse_and_validate_date_range,
+)
 
 
 @api_view(["GET"])
@@ -20,10 +24,10 @@ def yearly_revenue_report(request):
     """
     start_date_str = request.query_params.get("start_date")
     end_date_str = request.query_params.get("end_date")
-    station_id = request.query_params.get("station_id")
-    controller_id = request.query_params.get("controller_id")
 
     try:
+        station_id = optional_uuid_param(request.query_params, "station_id")
+        controller_id = optional_uuid_param(request.query_params, "controller_id")
         start_date, end_date = parse_and_validate_date_range(
             start_date_str, end_date_str
         )
@@ -31,39 +35,33 @@ def yearly_revenue_report(request):
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     filters = {
-        "status__in": ["pass", "paid", "success"],
+        "status__in": Checkin.SUCCESSFUL_STATUSES,
         "checkin_time__range": [start_date, end_date],
     }
-    if station_id and station_id != "null":
+    if station_id is not None:
         filters["station_id"] = station_id
-    if controller_id and controller_id != "null":
+    if controller_id is not None:
         filters["employee_id"] = controller_id
 
     base_queryset = Checkin.objects.filter(**filters)
-    checkins_with_revenue = annotate_revenue_on_checkins(base_queryset)
+    # The groupable variant, since the rows are summed per month below
+    checkins_with_revenue = annotate_groupable_revenue_on_checkins(base_queryset)
 
-    # Aggregate in Python
-    # Use a dictionary to sum revenue by month string e.g. "2023-11"
-    monthly_map = defaultdict(Decimal)
-
-    # We need to extract month from checkin_time in python or annotation
-    # TruncMonth in annotation is fine as it doesn't aggregate.
-    checkins_with_revenue = checkins_with_revenue.annotate(month=TruncMonth("checkin_time"))
-
-    for checkin in checkins_with_revenue:
-        # TruncMonth returns a datetime/date object
-        m_str = checkin.month.strftime("%Y-%m")
-        rev = checkin.revenue or Decimal(0)
-        monthly_map[m_str] += rev
-    
-    # Sort keys to ensure chronological order
-    sorted_months = sorted(monthly_map.keys())
+    # Aggregate in the database: one row per month, in chronological order
+    monthly_totals = (
+        checkins_with_revenue.annotate(month=TruncMonth("checkin_time"))
+        .values("month")
+        .annotate(total_revenue=float_revenue_sum())
+        .order_by("month")
+        .values_list("month", "total_revenue")
+    )
 
+    # Labels such as "2023-11"
     labels = []
     data = []
-    for m_str in sorted_months:
-        labels.append(m_str)
-        data.append(monthly_map[m_str])
+    for month, total_revenue in monthly_totals:
+        labels.append(month.strftime("%Y-%m"))
+        data.append(total_revenue)
 
     response_data = {"labels": labels, "data": data}
 
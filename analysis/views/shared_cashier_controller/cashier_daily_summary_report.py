@@ -1,9 +1,8 @@
 from datetime import timedelta
 from decimal import Decimal
 
-from django.db.models import Case, CharField, Count, DecimalField, F, Q, Sum
-from django.db.models import Value as V
-from django.db.models import When
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
 from django.db.models.functions import Coalesce
 from django.utils.timezone import now
 from rest_framework import permissions, status
@@ -27,8 +26,8 @@ def cashier_daily_summary_report(request):
     This report includes total revenue, total incremental weight (kg), and the count
     of checked-in taxpayers, broken down into 'Regular' (Declaracion-based) and
     'Walk-in' (LocalJourney-based) categories. It efficiently calculates incremental
-    weight and revenue using `annotate_revenue_on_checkins` and performs all
-    aggregations at the database level.
+    weight and revenue using `annotate_revenue_on_checkins` and computes all
+    metrics in a single aggregate query.
 
     Query Parameters:
     - station_id (int): The ID of the workstation (cashier station) for which to generate the report. Required.
@@ -53,8 +52,15 @@ def cashier_daily_summary_report(request):
             {"error": "station_id is required"}, status=status.HTTP_400_BAD_REQUEST
         )
 
-    # Validate if station exists (correctly checking against WorkStation model)
-    station_exists = WorkStation.objects.filter(id=station_id).exists()
+    # Validate if station exists (correctly checking against WorkStation model).
+    # Stations rarely change, so a found station is cached for a few minutes; a
+    # miss is never cached, so a newly created station is found right away.
+    station_cache_key = f"workstation_exists:{station_id}"
+    station_exists = cache.get(station_cache_key, False)
+    if not station_exists:
+        station_exists = WorkStation.objects.filter(id=station_id).exists()
+        if station_exists:
+            cache.set(station_cache_key, True, 300)
     if not station_exists:
         return Response(
             {"error": "Workstation not found"}, status=status.HTTP_404_NOT_FOUND
@@ -65,102 +71,40 @@ def cashier_daily_summary_report(request):
 
     # 1. Build base filter criteria for check-ins
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__gte=time_threshold,
         station_id=station_id,  # Filter by station_id
     )
 
     checkins_query = Checkin.objects.filter(base_checkins_filters)
 
-    if not checkins_query.exists():
-        # Return all zero values if no check-ins found
-        response_data = [
-            {"label": "Total Revenue", "amount": "0.0"},
-            {"label": "Revenue From Walk-in", "amount": "0.0"},
-            {"label": "Revenue From Regular", "amount": "0.0"},
-            {"label": "Total kg", "amount": "0.0"},
-            {"label": "Total kg From Walk-in", "amount": "0.0"},
-            {"label": "Total kg From Regular", "amount": "0.0"},
-            {"label": "Total Checked in Tax Payers", "amount": "0"},
-            {"label": "Total Checked in Walk-in Tax Payers", "amount": "0"},
-            {"label": "Total Checked in Regular Tax Payers", "amount": "0"},
-        ]
-        return Response(response_data)
-
-    # 2. Annotate check-ins with incremental weight, revenue, and taxpayer type
-    checkins_with_data = (
-        annotate_revenue_on_checkins(checkins_query)
-        .annotate(
-            taxpayer_type=Case(
-                When(declaracion__isnull=False, then=V("Regular")),
-                When(localJourney__isnull=False, then=V("Walk-in")),
-                default=V("Unknown"),  # Should be rare if data is clean
-                output_field=CharField(),
-            )
-        )
-        .filter(taxpayer_type__in=["Regular", "Walk-in"])
-    )  # Only consider valid taxpayer types
-
-    # 3. Perform aggregation in Python
-    # Initialize accumulators
-    total_rev = Decimal(0)
-    total_weight = Decimal(0)
-    rev_reg = Decimal(0)
-    rev_walk = Decimal(0)
-    weight_reg = Decimal(0)
-    weight_walk = Decimal(0)
-    
-    unique_exporters_all = set()
-    unique_exporters_regular = set()
-    unique_exporters_walkin = set()
-
-    for checkin in checkins_with_data:
-        rev = checkin.revenue or Decimal(0)
-        weight = checkin.incremental_weight or Decimal(0)
-        t_type = checkin.taxpayer_type
-        
-        # Collect explicit exporter ID if available (either from declaracion or localJourney)
-        # Note: checkin.taxpayer_type is set by the annotation, so we know which relation to check
-        # BUT getting the ID directly via relation traversal in loop is fine.
-        # Ideally checkin.declaracion_id or checkin.localJourney_id is faster if we only needed checkin ID,
-        # but we need Exporter ID.
-        # We can also check both since one will be null.
-        exporter_id = None
-        if checkin.declaracion_id and checkin.declaracion.exporter_id:
-            exporter_id = checkin.declaracion.exporter_id
-        elif checkin.localJourney_id and checkin.localJourney.exporter_id:
-            exporter_id = checkin.localJourney.exporter_id
-            
-        if exporter_id:
-            unique_exporters_all.add(exporter_id)
-            if t_type == "Regular":
-                unique_exporters_regular.add(exporter_id)
-            elif t_type == "Walk-in":
-                unique_exporters_walkin.add(exporter_id)
-
-        total_rev += rev
-        total_weight += weight
-        
-        if t_type == "Regular":
-            rev_reg += rev
-            weight_reg += weight
-        elif t_type == "Walk-in":
-            rev_walk += rev
-            weight_walk += weight
-
-    aggregates = {
-        "total_revenue_overall": total_rev,
-        "total_weight_overall": total_weight,
-        "revenue_regular_sum": rev_reg,
-        "revenue_walkin_sum": rev_walk,
-        "weight_regular_sum": weight_reg,
-        "weight_walkin_sum": weight_walk,
-    }
-
-    # 4. Count distinct taxpayers (exporters) - Python
-    checkedin_tax_payers = len(unique_exporters_all)
-    tax_payers_regular = len(unique_exporters_regular)
-    tax_payers_walkin = len(unique_exporters_walkin)
+    # 2. Annotate check-ins with incremental weight, revenue and the exporter,
+    # which comes from the declaracion (Regular) or local journey (Walk-in)
+    checkins_with_data = annotate_revenue_on_checkins(checkins_query).annotate(
+        exporter_key=Coalesce("declaracion__exporter_id", "localJourney__exporter_id")
+    )
+
+    # 3. Compute every metric in one aggregate query
+    regular = Q(declaracion__isnull=False)
+    walkin = Q(localJourney__isnull=False)
+    totals = checkins_with_data.aggregate(
+        total_revenue_overall=Sum("revenue"),
+        revenue_regular_sum=Sum("revenue", filter=regular),
+        revenue_walkin_sum=Sum("revenue", filter=walkin),
+        total_weight_overall=Sum("incremental_weight"),
+        weight_regular_sum=Sum("incremental_weight", filter=regular),
+        weight_walkin_sum=Sum("incremental_weight", filter=walkin),
+        checkedin_tax_payers=Count("exporter_key", distinct=True),
+        tax_payers_regular=Count("exporter_key", distinct=True, filter=regular),
+        tax_payers_walkin=Count("exporter_key", distinct=True, filter=walkin),
+    )
+    # Sums are None when there are no check-ins in the window
+    aggregates = {key: value or Decimal(0) for key, value in totals.items()}
+
+    # 4. Distinct taxpayer (exporter) counts
+    checkedin_tax_payers = totals["checkedin_tax_payers"]
+    tax_payers_regular = totals["tax_payers_regular"]
+    tax_payers_walkin = totals["tax_payers_walkin"]
 
     # 5. Prepare the response data (structure preserved for frontend)
     response_data = [
@@ -1,15 +1,17 @@
-from calendar import month_name
 from datetime import datetime, timedelta
 
 from django.core.exceptions import ValidationError
 from django.db.models import Count, Q
-from django.db.models.functions import ExtractDay, ExtractMonth, ExtractWeekDay
-from django.utils.timezone import make_aware
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
-from analysis.views.helpers import parse_and_validate_date_range
+from analysis.views.helpers import (
+    get_trend_categories,
+    parse_and_validate_date_range,
+    trend_bucket,
+    trend_time_unit,
+)
 from drivers.models import Driver
 
 
@@ -83,113 +85,26 @@ def cashier_drivers_registered_trends_report(request):
         created_at__range=[start_date, inclusive_end_date],
     )
 
-    categories = []
-    # Initialize a dictionary to hold aggregated counts, ensuring all periods are covered
-    # This will map a category label (e.g., "Monday", "Week 1", "January") to its count.
-    counts_map = {}
-
-    # 3. Group and aggregate data based on selected_date_type
-    if selected_date_type == "weekly":
-        categories = [
-            "Monday",
-            "Tuesday",
-            "Wednesday",
-            "Thursday",
-            "Friday",
-            "Saturday",
-            "Sunday",
-        ]
-        # Initialize counts_map to 0 for all categories
-        for cat in categories:
-            counts_map[cat] = 0
-
-        # DB's ExtractWeekDay is 1=Sunday, 2=Monday, ..., 7=Saturday
-        # We need to map it to our 'categories' list which starts with Monday (index 0)
-        db_day_to_category_map = {
-            2: "Monday",
-            3: "Tuesday",
-            4: "Wednesday",
-            5: "Thursday",
-            6: "Friday",
-            7: "Saturday",
-            1: "Sunday",
-        }
-
-        grouped_data = (
-            drivers_query.annotate(
-                time_unit=ExtractWeekDay("created_at")  # 1=Sun, 2=Mon...7=Sat
-            )
-            .values("time_unit")
-            .annotate(count=Count("id"))
-            .order_by("time_unit")
-        )
-
-        for entry in grouped_data:
-            day_label = db_day_to_category_map.get(entry["time_unit"])
-            if day_label:
-                counts_map[day_label] = entry["count"]
-
-    elif selected_date_type == "monthly":
-        # For 'monthly', parse_and_validate_date_range ensures a full calendar month.
-        # We need to calculate the number of weeks in that month.
-        days_in_month = (inclusive_end_date.date() - start_date.date()).days + 1
-        num_weeks = (days_in_month + 6) // 7  # Ceiling division
-        categories = [f"Week {i}" for i in range(1, num_weeks + 1)]
-        # Initialize counts_map to 0 for all categories
-        for cat in categories:
-            counts_map[cat] = 0
-
-        # Group by week number within the month
-        grouped_data = (
-            drivers_query.annotate(
-                # Calculate week number relative to the start of the month (1-indexed)
-                # For example, day 1-7 is week 1, day 8-14 is week 2, etc.
-                week_of_month=((ExtractDay("created_at") - 1) // 7)
-                + 1
-            )
-            .values("week_of_month")
-            .annotate(count=Count("id"))
-            .order_by("week_of_month")
-        )
-
-        for entry in grouped_data:
-            week_num = entry["week_of_month"]
-            week_label = f"Week {week_num}"
-            if (
-                week_label in categories
-            ):  # Ensure the week label is valid for our defined categories
-                counts_map[week_label] = entry["count"]
-
-    elif selected_date_type == "yearly":
-        categories = [month_name[i] for i in range(1, 13)]
-        # Initialize counts_map to 0 for all categories
-        for cat in categories:
-            counts_map[cat] = 0
-
-        # Group by month of the year
-        grouped_data = (
-            drivers_query.annotate(month_num=ExtractMonth("created_at"))
-            .values("month_num")
-            .annotate(count=Count("id"))
-            .order_by("month_num")
-        )
-
-        for entry in grouped_data:
-            month_label = month_name[entry["month_num"]]
-            if month_label:
-                counts_map[month_label] = entry["count"]
+    # 3. Group and aggregate data by the time unit of the selected_date_type,
+    # then fold the counts into the category buckets
+    categories = get_trend_categories(
+        selected_date_type, start_date, inclusive_end_date
+    )
+    series_data_list = [0] * len(categories)
 
-    else:
-        return Response(
-            {
-                "error": "Invalid selected_date_type. Must be 'weekly', 'monthly', or 'yearly'."
-            },
-            status=status.HTTP_400_BAD_REQUEST,
+    grouped_data = (
+        drivers_query.annotate(
+            time_unit=trend_time_unit(selected_date_type, "created_at")
         )
+        .values_list("time_unit")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
 
-    # 4. Build series data, ensuring all categories are present with 0 if no data
-    # The 'data' list must follow the order of 'categories'.
-    series_data_list = [counts_map.get(category, 0) for category in categories]
+    for time_unit, count in grouped_data:
+        bucket = trend_bucket(selected_date_type, time_unit)
+        if 0 <= bucket < len(categories):
+            series_data_list[bucket] += count
 
     series = [{"name": "Drivers Registered", "data": series_data_list}]
 
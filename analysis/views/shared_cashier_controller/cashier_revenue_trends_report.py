@@ -1,23 +1,15 @@
-from calendar import month_name
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Case, CharField, DecimalField, F, Q, Sum
-from django.db.models import Value as V
-from django.db.models import When
-from django.db.models.functions import (
-    Coalesce,
-    ExtractDay,
-    ExtractMonth,
-    ExtractWeekDay,
-)
+from django.db.models import Q
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
+    aggregate_trend_series,
     annotate_revenue_on_checkins,
+    get_trend_categories,
     parse_and_validate_date_range,
 )
 from declaracions.models import Checkin
@@ -92,122 +84,35 @@ def cashier_revenue_trends_report(request):
 
     # 2. Define the base filters for check-ins
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
         station_id=station_id,
     )
 
     checkins_query = Checkin.objects.filter(base_checkins_filters)
 
-    # Initialize categories and data maps for early return or if no data
-    categories = []
-    if selected_date_type == "weekly":
-        categories = [
-            "Monday",
-            "Tuesday",
-            "Wednesday",
-            "Thursday",
-            "Friday",
-            "Saturday",
-            "Sunday",
-        ]
-    elif selected_date_type == "monthly":
-        # Calculate max_weeks based on days in the filtered range
-        days_in_range = (inclusive_end_date.date() - start_date.date()).days + 1
-        num_weeks = (days_in_range + 6) // 7  # Ceiling division
-        categories = [f"Week {i}" for i in range(1, num_weeks + 1)]
-    elif selected_date_type == "yearly":
-        categories = [month_name[i] for i in range(1, 13)]
-
-    if not checkins_query.exists():
-        # Return empty data, but with correct categories for the frontend to render structure
-        return Response(
-            {
-                "series": [
-                    {"name": "Regular", "data": [0.0] * len(categories)},
-                    {"name": "Walk-in", "data": [0.0] * len(categories)},
-                ],
-                "categories": categories,
-            }
-        )
-
-    # 3. Annotate check-ins with incremental revenue and taxpayer type
-    checkins_with_data = (
-        annotate_revenue_on_checkins(checkins_query)
-        .annotate(
-            taxpayer_type=Case(
-                When(declaracion__isnull=False, then=V("Regular")),
-                When(localJourney__isnull=False, then=V("Walk-in")),
-                default=V("Unknown"),
-                output_field=CharField(),
-            )
-        )
-        .filter(taxpayer_type__in=["Regular", "Walk-in"])
-    )  # Ensure we only consider these types
-
-    # Initialize maps to ensure all categories are present with 0 values
-    regular_data_map = {category: Decimal(0) for category in categories}
-    walkin_data_map = {category: Decimal(0) for category in categories}
-
-    # 4. Perform aggregation in Python
-    
-    if selected_date_type == "weekly":
-        checkins_with_data = checkins_with_data.annotate(
-            weekday_num=ExtractWeekDay("checkin_time")
-        )
-        db_map = {
-            2: "Monday", 3: "Tuesday", 4: "Wednesday",
-            5: "Thursday", 6: "Friday", 7: "Saturday", 1: "Sunday"
-        }
-        for checkin in checkins_with_data:
-            day_label = db_map.get(checkin.weekday_num)
-            if day_label:
-                rev = checkin.revenue or Decimal(0)
-                if checkin.taxpayer_type == "Regular":
-                    regular_data_map[day_label] += rev
-                elif checkin.taxpayer_type == "Walk-in":
-                    walkin_data_map[day_label] += rev
-
-    elif selected_date_type == "monthly":
-        checkins_with_data = checkins_with_data.annotate(
-            day_of_month=ExtractDay("checkin_time")
-        )
-        for checkin in checkins_with_data:
-            week_num = ((checkin.day_of_month - 1) // 7) + 1
-            week_label = f"Week {week_num}"
-            if week_label in categories:
-                rev = checkin.revenue or Decimal(0)
-                if checkin.taxpayer_type == "Regular":
-                    regular_data_map[week_label] += rev
-                elif checkin.taxpayer_type == "Walk-in":
-                    walkin_data_map[week_label] += rev
-
-    elif selected_date_type == "yearly":
-        checkins_with_data = checkins_with_data.annotate(
-            month_num=ExtractMonth("checkin_time")
-        )
-        for checkin in checkins_with_data:
-            m_num = checkin.month_num
-            if 1 <= m_num <= 12:
-                month_label = month_name[m_num]
-                if month_label:
-                    rev = checkin.revenue or Decimal(0)
-                    if checkin.taxpayer_type == "Regular":
-                        regular_data_map[month_label] += rev
-                    elif checkin.taxpayer_type == "Walk-in":
-                        walkin_data_map[month_label] += rev
-
-    # 5. Build series data, ensuring order matches categories and converting Decimals to floats
-    regular_series = [
-        float(regular_data_map.get(category, Decimal(0))) for category in categories
-    ]
-    walkin_series = [
-        float(walkin_data_map.get(category, Decimal(0))) for category in categories
-    ]
+    # 3. Sum the incremental revenue per time bucket for each taxpayer type; the
+    # buckets for the selected_date_type come from the shared trend table and
+    # an empty range simply yields zeros
+    categories = get_trend_categories(
+        selected_date_type, start_date, inclusive_end_date
+    )
+    series_totals = aggregate_trend_series(
+        annotate_revenue_on_checkins(checkins_query),
+        selected_date_type,
+        categories,
+        time_field="checkin_time",
+        value_field="revenue",
+        series_filters={
+            "Regular": Q(declaracion__isnull=False),
+            "Walk-in": Q(localJourney__isnull=False),
+        },
+    )
 
+    # 4. Build series data, converting Decimals to floats
     series = [
-        {"name": "Regular", "data": regular_series},
-        {"name": "Walk-in", "data": walkin_series},
+        {"name": name, "data": [float(total) for total in totals]}
+        for name, totals in series_totals.items()
     ]
 
     return Response({"series": series, "categories": categories})
@@ -62,29 +62,17 @@ def controller_daily_summary_report(request):
 
     # 1. Build base filter criteria for check-ins
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__gte=time_threshold,
         employee_id=controller_id,
     )
 
+    # No check-ins in the window simply leaves every total below at zero
     checkins_query = Checkin.objects.filter(base_checkins_filters)
 
-    if not checkins_query.exists():
-        # Return all zero values if no check-ins found
-        response_data = [
-            {"label": "Total Revenue", "amount": "0.0"},
-            {"label": "Revenue From Walk-in", "amount": "0.0"},
-            {"label": "Revenue From Regular", "amount": "0.0"},
-            {"label": "Total kg", "amount": "0.0"},
-            {"label": "Total kg From Walk-in", "amount": "0.0"},
-            {"label": "Total kg From Regular", "amount": "0.0"},
-            {"label": "Total Checked in Tax Payers", "amount": "0"},
-            {"label": "Total Checked in Walk-in Tax Payers", "amount": "0"},
-            {"label": "Total Checked in Regular Tax Payers", "amount": "0"},
-        ]
-        return Response(response_data)
-
-    # 2. Annotate check-ins with incremental weight, revenue, and taxpayer type
+    # 2. Annotate check-ins with incremental weight, revenue, taxpayer type and the
+    # exporter, which comes from the declaracion (Regular) or local journey
+    # (Walk-in); rows are read as plain tuples, without building model instances
     checkins_with_data = (
         annotate_revenue_on_checkins(checkins_query)
         .annotate(
@@ -93,10 +81,14 @@ def controller_daily_summary_report(request):
                 When(localJourney__isnull=False, then=V("Walk-in")),
                 default=V("Unknown"),  # Should be rare if data is clean
                 output_field=CharField(),
-            )
+            ),
+            exporter_key=Coalesce(
+                "declaracion__exporter_id", "localJourney__exporter_id"
+            ),
         )
-        .filter(taxpayer_type__in=["Regular", "Walk-in"])
-    )  # Only consider valid taxpayer types
+        .filter(taxpayer_type__in=["Regular", "Walk-in"])  # Only valid types
+        .values_list("revenue", "incremental_weight", "taxpayer_type", "exporter_key")
+    )
 
     # 3. Perform aggregation in Python
     # Initialize accumulators
@@ -111,18 +103,13 @@ def controller_daily_summary_report(request):
     unique_exporters_regular = set()
     unique_exporters_walkin = set()
 
-    for checkin in checkins_with_data:
-        rev = checkin.revenue or Decimal(0)
-        weight = checkin.incremental_weight or Decimal(0)
-        t_type = checkin.taxpayer_type
-        
+    for rev, weight, t_type, exporter_id in checkins_with_data.iterator(
+        chunk_size=2000
+    ):
+        rev = rev or Decimal(0)
+        weight = weight or Decimal(0)
+
         # Collect exporter ID
-        exporter_id = None
-        if checkin.declaracion_id and checkin.declaracion.exporter_id:
-            exporter_id = checkin.declaracion.exporter_id
-        elif checkin.localJourney_id and checkin.localJourney.exporter_id:
-            exporter_id = checkin.localJourney.exporter_id
-            
         if exporter_id:
             unique_exporters_all.add(exporter_id)
             if t_type == "Regular":
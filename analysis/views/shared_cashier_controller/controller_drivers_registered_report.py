@@ -6,12 +6,14 @@ from django.db.models import Case, CharField, Count, F, Q
 from django.db.models import Value as V
 from django.db.models import When
 from django.db.models.functions import ExtractDay, ExtractMonth, ExtractWeekDay
-from django.utils.timezone import make_aware
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
-from analysis.views.helpers import parse_and_validate_date_range
+from analysis.views.helpers import (
+    EXTRACT_WEEKDAY_NAMES,
+    parse_and_validate_date_range,
+)
 from drivers.models import Driver
 
 
@@ -105,16 +107,6 @@ def controller_drivers_registered_report(request):
             counts_map[cat] = 0
 
         # DB's ExtractWeekDay is 1=Sunday, 2=Monday, ..., 7=Saturday
-        # We need to map it to our 'categories' list which starts with Monday (index 0)
-        db_day_to_category_map = {
-            2: "Monday",
-            3: "Tuesday",
-            4: "Wednesday",
-            5: "Thursday",
-            6: "Friday",
-            7: "Saturday",
-            1: "Sunday",
-        }
 
         grouped_data = (
             drivers_query.annotate(
@@ -126,7 +118,7 @@ def controller_drivers_registered_report(request):
         )
 
         for entry in grouped_data:
-            day_label = db_day_to_category_map.get(entry["time_unit"])
+            day_label = EXTRACT_WEEKDAY_NAMES[entry["time_unit"]]
             if day_label:
                 counts_map[day_label] = entry["count"]
 
@@ -1,23 +1,15 @@
-from calendar import month_name, monthrange
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Case, CharField, DecimalField, F, Q, Sum
-from django.db.models import Value as V
-from django.db.models import When
-from django.db.models.functions import (
-    Coalesce,
-    ExtractDay,
-    ExtractMonth,
-    ExtractWeekDay,
-)
+from django.db.models import Q
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
+    aggregate_trend_series,
     annotate_revenue_on_checkins,
+    get_trend_categories,
     parse_and_validate_date_range,
 )
 from declaracions.models import Checkin
@@ -86,178 +78,34 @@ def controller_incremental_weight_trends(request):
 
     # 2. Define the base filters for check-ins
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
         employee_id=controller_id,
     )
 
     checkins_query = Checkin.objects.filter(base_checkins_filters)
 
-    if not checkins_query.exists():
-        # Initialize empty series and categories based on type
-        categories_output = []
-        if selected_date_type == "weekly":
-            categories_output = [
-                "Monday",
-                "Tuesday",
-                "Wednesday",
-                "Thursday",
-                "Friday",
-                "Saturday",
-                "Sunday",
-            ]
-        elif selected_date_type == "monthly":
-            # Determine max_weeks based on days in selected month, or days in range if flexible
-            days_in_range = (inclusive_end_date.date() - start_date.date()).days + 1
-            max_weeks = (days_in_range + 6) // 7  # Roughly ceil(days_in_range / 7)
-            categories_output = [f"Week {i}" for i in range(1, max_weeks + 1)]
-        elif selected_date_type == "yearly":
-            categories_output = [month_name[i] for i in range(1, 13)]
-
-        return Response(
-            {
-                "series": [
-                    {"name": "Regular", "data": [0.0] * len(categories_output)},
-                    {"name": "Walk-in", "data": [0.0] * len(categories_output)},
-                ],
-                "categories": categories_output,
-            }
-        )
-
-    # 3. Annotate check-ins with incremental weight and taxpayer type
-    checkins_with_data = (
-        annotate_revenue_on_checkins(checkins_query)
-        .annotate(
-            taxpayer_type=Case(
-                When(declaracion__isnull=False, then=V("Regular")),
-                When(localJourney__isnull=False, then=V("Walk-in")),
-                default=V("Unknown"),
-                output_field=CharField(),
-            )
-        )
-        .filter(taxpayer_type__in=["Regular", "Walk-in"])
-    )  # Ensure we only consider these types
-
-    # Initialize data containers for aggregation
-    categories = []
-    regular_data_map = {}
-    walkin_data_map = {}
-
-    if selected_date_type == "weekly":
-        categories = [
-            "Monday",
-            "Tuesday",
-            "Wednesday",
-            "Thursday",
-            "Friday",
-            "Saturday",
-            "Sunday",
-        ]
-        # DB's ExtractWeekDay is 1=Sunday, 2=Monday, ..., 7=Saturday
-        # We need to map it to 0=Monday, ..., 6=Sunday for correct categories indexing
-        # Or, just use the DB's weekday and map labels at the end. Let's map for final output.
-        db_day_to_category_map = {
-            2: "Monday",
-            3: "Tuesday",
-            4: "Wednesday",
-            5: "Thursday",
-            6: "Friday",
-            7: "Saturday",
-            1: "Sunday",
-        }
-
-        # Initialize maps to ensure all categories are present with 0 values
-        for cat in categories:
-            regular_data_map[cat] = Decimal(0)
-            walkin_data_map[cat] = Decimal(0)
-
-        # Fetch annotated data and aggregate in Python to avoid window function issues
-        annotated_rows = checkins_with_data.annotate(
-            time_unit=ExtractWeekDay("checkin_time")
-        ).values("time_unit", "taxpayer_type", "incremental_weight")
-
-        for item in annotated_rows:
-            day_label = db_day_to_category_map.get(item["time_unit"])
-            if day_label:
-                weight = item["incremental_weight"] or Decimal(0)
-                if item["taxpayer_type"] == "Regular":
-                    regular_data_map[day_label] += weight
-                elif item["taxpayer_type"] == "Walk-in":
-                    walkin_data_map[day_label] += weight
-
-    elif selected_date_type == "monthly":
-        # Calculate week numbers relative to the start_date of the month
-        # This will create categories like 'Week 1', 'Week 2', etc.
-        # We need to determine the total number of weeks in the range for categories.
-        days_in_range = (inclusive_end_date.date() - start_date.date()).days + 1
-        num_weeks = (days_in_range + 6) // 7  # Ceiling division to get number of weeks
-        categories = [f"Week {i}" for i in range(1, num_weeks + 1)]
-
-        # This `week_of_range` calculation aims to emulate the original logic
-        # (checkin.checkin_time.day - 1) // 7 + 1, but applied to the days within the filtered range.
-        # A simpler way, if the date range is a full month, is week of month.
-        # Given parse_and_validate_date_range will ensure a full month for 'monthly',
-        # we can use week of month directly.
-        # Week numbers in Django's ExtractWeek are for week of year, not week of month.
-        # A custom annotation for week of month: ((ExtractDay('checkin_time') - 1) // 7) + 1
-
-        # Initialize maps to ensure all categories are present with 0 values
-        for cat in categories:
-            regular_data_map[cat] = Decimal(0)
-            walkin_data_map[cat] = Decimal(0)
-
-        # Fetch annotated data and aggregate in Python to avoid window function issues
-        annotated_rows = checkins_with_data.annotate(
-            # Calculate week number relative to the start of the month (1-indexed)
-            week_of_month=((ExtractDay("checkin_time") - 1) // 7) + 1
-        ).values("week_of_month", "taxpayer_type", "incremental_weight")
-
-        for item in annotated_rows:
-            week_num = item["week_of_month"]
-            week_label = f"Week {week_num}"
-            if (
-                week_label in categories
-            ):  # Ensure it's a valid week within our defined categories
-                weight = item["incremental_weight"] or Decimal(0)
-                if item["taxpayer_type"] == "Regular":
-                    regular_data_map[week_label] += weight
-                elif item["taxpayer_type"] == "Walk-in":
-                    walkin_data_map[week_label] += weight
-
-    elif selected_date_type == "yearly":
-        categories = [month_name[i] for i in range(1, 13)]
-        # Initialize maps to ensure all categories are present with 0 values
-        for cat in categories:
-            regular_data_map[cat] = Decimal(0)
-            walkin_data_map[cat] = Decimal(0)
-
-        # Fetch annotated data and aggregate in Python to avoid window function issues
-        annotated_rows = checkins_with_data.annotate(
-            time_unit=ExtractMonth("checkin_time")
-        ).values("time_unit", "taxpayer_type", "incremental_weight")
-
-        for item in annotated_rows:
-            month_label = month_name[item["time_unit"]]  # 1=Jan, 12=Dec
-            if month_label:
-                weight = item["incremental_weight"] or Decimal(0)
-                if item["taxpayer_type"] == "Regular":
-                    regular_data_map[month_label] += weight
-                elif item["taxpayer_type"] == "Walk-in":
-                    walkin_data_map[month_label] += weight
-
-    # Build series data, ensuring order matches categories
-    regular_series = [
-        float(regular_data_map.get(category, Decimal(0))) for category in categories
-    ]
-    walkin_series = [
-        float(walkin_data_map.get(category, Decimal(0))) for category in categories
-    ]
+    # 3. Sum the incremental weight per time bucket for each taxpayer type in a
+    # single aggregate query (an empty range simply yields zeros)
+    categories = get_trend_categories(
+        selected_date_type, start_date, inclusive_end_date
+    )
+    series_totals = aggregate_trend_series(
+        annotate_revenue_on_checkins(checkins_query),
+        selected_date_type,
+        categories,
+        time_field="checkin_time",
+        value_field="incremental_weight",
+        series_filters={
+            "Regular": Q(declaracion__isnull=False),
+            "Walk-in": Q(localJourney__isnull=False),
+        },
+    )
 
+    # 4. Build series data, ensuring order matches categories and converting Decimals to floats
     series = [
-        {"name": "Regular", "data": regular_series},
-        {"name": "Walk-in", "data": walkin_series},
+        {"name": name, "data": [float(total) for total in totals]}
+        for name, totals in series_totals.items()
     ]
 
     return Response({"series": series, "categories": categories})
-
-    return Response({"series": series, "categories": categories})
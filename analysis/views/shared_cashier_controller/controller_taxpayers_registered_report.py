@@ -7,12 +7,14 @@ from django.db.models import Case, CharField, Count, F, Q
 from django.db.models import Value as V
 from django.db.models import When
 from django.db.models.functions import ExtractDay, ExtractMonth, ExtractWeekDay
-from django.utils.timezone import make_aware
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
-from analysis.views.helpers import parse_and_validate_date_range
+from analysis.views.helpers import (
+    EXTRACT_WEEKDAY_NAMES,
+    parse_and_validate_date_range,
+)
 from exporters.models import Exporter
 
 
@@ -107,16 +109,6 @@ def controller_taxpayers_registered_report(request):
 
         # Mapping DB ExtractWeekDay (1=Sun, 2=Mon...7=Sat) to Python's weekday for categories.index
         # or simply use the DB's weekday and map labels in the end.
-        # Let's map for final output to match `categories`
-        db_day_to_category_map = {
-            2: "Monday",
-            3: "Tuesday",
-            4: "Wednesday",
-            5: "Thursday",
-            6: "Friday",
-            7: "Saturday",
-            1: "Sunday",
-        }
 
         # Query and aggregate at database level
         grouped_data = (
@@ -129,7 +121,7 @@ def controller_taxpayers_registered_report(request):
         )
 
         for entry in grouped_data:
-            day_label = db_day_to_category_map.get(entry["time_unit"])
+            day_label = EXTRACT_WEEKDAY_NAMES[entry["time_unit"]]
             if day_label:
                 if entry["type__name"] == "regular":
                     regular_counts_map[day_label] = entry["count"]
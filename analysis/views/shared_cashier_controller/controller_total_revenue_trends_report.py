@@ -1,23 +1,15 @@
-from calendar import month_name
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Case, CharField, DecimalField, F, Q, Sum
-from django.db.models import Value as V
-from django.db.models import When
-from django.db.models.functions import (
-    Coalesce,
-    ExtractDay,
-    ExtractMonth,
-    ExtractWeekDay,
-)
+from django.db.models import Q
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
+    aggregate_trend_series,
     annotate_revenue_on_checkins,
+    get_trend_categories,
     parse_and_validate_date_range,
 )
 from declaracions.models import Checkin
@@ -90,92 +82,29 @@ def controller_total_revenue_trends_report(request):
 
     # 2. Define the base filters for check-ins
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
         employee_id=controller_id,
     )
 
     checkins_query = Checkin.objects.filter(base_checkins_filters)
 
-    # Initialize categories (labels) and data map for early return or if no data
-    labels = []  # Renamed from 'categories' to match the desired output key
-    if selected_date_type == "weekly":
-        labels = [
-            "Monday",
-            "Tuesday",
-            "Wednesday",
-            "Thursday",
-            "Friday",
-            "Saturday",
-            "Sunday",
-        ]
-    elif selected_date_type == "monthly":
-        days_in_range = (inclusive_end_date.date() - start_date.date()).days + 1
-        num_weeks = (days_in_range + 6) // 7  # Ceiling division
-        labels = [f"Week {i}" for i in range(1, num_weeks + 1)]
-    elif selected_date_type == "yearly":
-        labels = [month_name[i] for i in range(1, 13)]
-
-    if not checkins_query.exists():
-        return Response(
-            {
-                "series": [{"name": "Revenue", "data": [0.0] * len(labels)}],
-                "labels": labels,
-            }
-        )
-
-    # 3. Annotate check-ins with incremental revenue using the helper function
-    checkins_with_revenue = annotate_revenue_on_checkins(checkins_query)
-
-    # Initialize revenue map to ensure all labels are present with 0 values
-    revenue_data_map = {label: Decimal(0) for label in labels}
-
-    # 4. Perform database aggregation based on selected_date_type
-    # 4. Perform aggregation in Python
-    if selected_date_type == "weekly":
-        checkins_with_revenue = checkins_with_revenue.annotate(
-            weekday_num=ExtractWeekDay("checkin_time")
-        )
-        db_map = {
-            2: "Monday", 3: "Tuesday", 4: "Wednesday",
-            5: "Thursday", 6: "Friday", 7: "Saturday", 1: "Sunday"
-        }
-        for checkin in checkins_with_revenue:
-            day_label = db_map.get(checkin.weekday_num)
-            rev = checkin.revenue or Decimal(0)
-            if day_label:
-                revenue_data_map[day_label] += rev
-
-    elif selected_date_type == "monthly":
-        checkins_with_revenue = checkins_with_revenue.annotate(
-            day_of_month=ExtractDay("checkin_time")
-        )
-        for checkin in checkins_with_revenue:
-            week_num = ((checkin.day_of_month - 1) // 7) + 1
-            week_label = f"Week {week_num}"
-            rev = checkin.revenue or Decimal(0)
-            if week_label in labels:
-                revenue_data_map[week_label] += rev
-
-    elif selected_date_type == "yearly":
-        checkins_with_revenue = checkins_with_revenue.annotate(
-            month_num=ExtractMonth("checkin_time")
-        )
-        for checkin in checkins_with_revenue:
-            m_num = checkin.month_num
-            rev = checkin.revenue or Decimal(0)
-            if 1 <= m_num <= 12:
-                month_label = month_name[m_num]
-                if month_label:
-                    revenue_data_map[month_label] += rev
+    # 3. Sum the incremental revenue per time bucket in a single aggregate query
+    # (an empty range simply yields zeros)
+    labels = get_trend_categories(selected_date_type, start_date, inclusive_end_date)
+    series_totals = aggregate_trend_series(
+        annotate_revenue_on_checkins(checkins_query),
+        selected_date_type,
+        labels,
+        time_field="checkin_time",
+        value_field="revenue",
+        series_filters={"Revenue": Q()},
+    )
 
-    # 5. Build series data, ensuring order matches labels and converting Decimals to floats
-    series_data_list = [
-        float(revenue_data_map.get(label, Decimal(0))) for label in labels
+    # 4. Build series data, ensuring order matches labels and converting Decimals to floats
+    series = [
+        {"name": name, "data": [float(total) for total in totals]}
+        for name, totals in series_totals.items()
     ]
 
-    series = [{"name": "Revenue", "data": series_data_list}]
-
-    return Response({"series": series, "labels": labels})
-
     return Response({"series": series, "labels": labels})
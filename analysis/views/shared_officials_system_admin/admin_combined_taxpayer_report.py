@@ -220,18 +220,29 @@
 #     return Response(final_report)
 
 
-from collections import defaultdict
-from datetime import datetime, timedelta
 from decimal import Decimal
 
-from django.db.models import Q
-from django.utils.timezone import make_aware
+from django.db.models import (
+    Case,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import parse_and_validate_date_range
 from declaracions.models import Checkin
+from exporters.models import Exporter
 
 
 @api_view(["GET"])
@@ -254,105 +265,84 @@ def admin_combined_taxpayer_report(request):
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    checkin_filters = Q(
-        status__in=["pass", "paid", "success"],
+    period_checkins = Checkin.objects.filter(
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
-        declaracion__exporter__isnull=False,
-    ) | Q(
-        status__in=["pass", "paid", "success"],
-        checkin_time__range=[start_date, inclusive_end_date],
-        localJourney__exporter__isnull=False,
     )
-
-    # Get checkins with related data to avoid N+1 queries
-    checkins = (
-        Checkin.objects.filter(checkin_filters)
-        .select_related("declaracion__exporter__type", "localJourney__exporter__type")
-        .order_by("declaracion_id", "localJourney_id", "checkin_time")
+    checkins = period_checkins.filter(
+        Q(declaracion__exporter__isnull=False)
+        | Q(localJourney__exporter__isnull=False)
     )
 
-    # Dictionary to store aggregated data by exporter
-    exporter_data = defaultdict(
-        lambda: {
-            "total_revenue": Decimal("0"),
-            "total_amount": Decimal("0"),
-            "merchant_paths": set(),
-            "local_paths": set(),
-            "first_name": "",
-            "last_name": "",
-            "tin_number": "",
-            "unique_id": "",
-            "type_name": "",
-        }
+    # Previous weight of the same journey within the period, looked up as a
+    # correlated subquery so the whole report is a single GROUP BY query
+    earlier_checkins = period_checkins.filter(
+        checkin_time__lt=OuterRef("checkin_time")
+    ).order_by("-checkin_time")
+    checkins = checkins.annotate(
+        previous_net_weight=Coalesce(
+            Subquery(
+                earlier_checkins.filter(declaracion=OuterRef("declaracion")).values(
+                    "net_weight"
+                )[:1]
+            ),
+            Subquery(
+                earlier_checkins.filter(localJourney=OuterRef("localJourney")).values(
+                    "net_weight"
+                )[:1]
+            ),
+            Value(Decimal(0)),
+        ),
+        exporter_key=Coalesce("declaracion__exporter_id", "localJourney__exporter_id"),
+    ).annotate(
+        incremental_weight=Case(
+            When(
+                net_weight__gt=F("previous_net_weight"),
+                then=F("net_weight") - F("previous_net_weight"),
+            ),
+            default=Value(Decimal(0)),
+            output_field=DecimalField(),
+        )
     )
 
-    # Track previous weights for each journey to calculate incremental weight
-    previous_weights = {}
-
-    for checkin in checkins:
-        # Determine exporter and journey info
-        if checkin.declaracion and checkin.declaracion.exporter:
-            exporter = checkin.declaracion.exporter
-            journey_key = f"decl_{checkin.declaracion_id}"
-            journey_type = "merchant"
-        elif checkin.localJourney and checkin.localJourney.exporter:
-            exporter = checkin.localJourney.exporter
-            journey_key = f"local_{checkin.localJourney_id}"
-            journey_type = "local"
-        else:
-            continue  # Skip if no exporter
-
-        exporter_id = exporter.id
-
-        # Initialize exporter data if this is the first time we see this exporter
-        if not exporter_data[exporter_id]["first_name"]:
-            exporter_data[exporter_id].update(
-                {
-                    "first_name": exporter.first_name or "",
-                    "last_name": exporter.last_name or "",
-                    "tin_number": exporter.tin_number or "",
-                    "unique_id": exporter.unique_id or "",
-                    "type_name": exporter.type.name if exporter.type else "",
-                }
-            )
-
-        # Calculate incremental weight
-        previous_weight = previous_weights.get(journey_key, Decimal("0"))
-        current_weight = checkin.net_weight or Decimal("0")
-        incremental_weight = max(current_weight - previous_weight, Decimal("0"))
-
-        # Update previous weight for next iteration
-        previous_weights[journey_key] = current_weight
-
-        # Calculate revenue for this checkin
-        unit_price = checkin.unit_price or Decimal("0")
-        rate = checkin.rate or Decimal("0")
-        revenue = (
-            incremental_weight * (unit_price / Decimal("100")) * (rate / Decimal("100"))
+    # Revenue = weight * (unit_price / 100) * (rate / 100), summed by the database
+    revenue = ExpressionWrapper(
+        F("incremental_weight") * F("unit_price") * F("rate"),
+        output_field=DecimalField(max_digits=20, decimal_places=4),
+    ) / Value(Decimal("10000"))
+
+    exporter_totals = list(
+        checkins.values("exporter_key")
+        .annotate(
+            total_amount=Sum("incremental_weight"),
+            total_revenue=Sum(revenue),
+            total_merchant_paths=Count("declaracion", distinct=True),
+            total_local_paths=Count("localJourney", distinct=True),
         )
+        .order_by()
+    )
 
-        # Aggregate data
-        exporter_data[exporter_id]["total_revenue"] += revenue
-        exporter_data[exporter_id]["total_amount"] += incremental_weight
-
-        # Track unique paths
-        if journey_type == "merchant" and checkin.declaracion_id:
-            exporter_data[exporter_id]["merchant_paths"].add(checkin.declaracion_id)
-        elif journey_type == "local" and checkin.localJourney_id:
-            exporter_data[exporter_id]["local_paths"].add(checkin.localJourney_id)
+    exporters = (
+        Exporter.objects.select_related("type")
+        .only("first_name", "last_name", "tin_number", "unique_id", "type__name")
+        .in_bulk([row["exporter_key"] for row in exporter_totals])
+    )
 
     # Convert to final report format
     final_report = []
-    for exporter_id, data in exporter_data.items():
+    for row in exporter_totals:
+        exporter = exporters[row["exporter_key"]]
+        first_name = exporter.first_name or ""
+        last_name = exporter.last_name or ""
         final_report.append(
             {
-                "TIN/uniqe_id": f"{data['tin_number']}/{data['unique_id']}",
-                "type": data["type_name"],
-                "exporter_name": f"{data['first_name']} {data['last_name']}".strip(),
-                "total_amount": float(data["total_amount"]),
-                "total_revenue": round(float(data["total_revenue"]), 2),
-                "total_merchant_paths": len(data["merchant_paths"]),
-                "total_local_paths": len(data["local_paths"]),
+                "TIN/uniqe_id": f"{exporter.tin_number or ''}/{exporter.unique_id or ''}",
+                "type": exporter.type.name if exporter.type else "",
+                "exporter_name": f"{first_name} {last_name}".strip(),
+                "total_amount": float(row["total_amount"] or 0),
+                "total_revenue": round(float(row["total_revenue"] or 0), 2),
+                "total_merchant_paths": row["total_merchant_paths"],
+                "total_local_paths": row["total_local_paths"],
             }
         )
 
@@ -6,7 +6,6 @@ from django.core.exceptions import ValidationError
 from django.db.models import F, Q, Sum
 from django.db.models import Value as V
 from django.db.models.functions import Coalesce
-from django.utils.timezone import make_aware
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -87,7 +86,7 @@ def admin_each_station_regular_total_revenue_report(request):
     # Filters for successful check-ins within the date range, linked to a station,
     # and specifically those with an associated 'declaracion' (indicating regular taxpayer).
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
         station__isnull=False,  # Ensure check-ins are linked to a station
         declaracion__isnull=False,  # This is the key for "Regular" revenue
@@ -104,7 +103,9 @@ def admin_each_station_regular_total_revenue_report(request):
         return Response({"data": [0.0] * len(labels), "labels": labels})
 
     # 3. Annotate check-ins with incremental revenue using the helper
-    checkins_with_revenue = annotate_revenue_on_checkins(checkins_query)
+    checkins_with_revenue = annotate_revenue_on_checkins(
+        checkins_query.select_related("station").only("station__name")
+    )
 
     # Initialize a dictionary to hold total "Regular" revenue for each station, initialized to 0
     # station_revenues_map: { "Station Name": Decimal(0) }
@@ -112,7 +113,7 @@ def admin_each_station_regular_total_revenue_report(request):
 
     # 4. Perform aggregation in Python
     # We iterate over the queryset and sum up the revenue for each station manually.
-    for checkin in checkins_with_revenue:
+    for checkin in checkins_with_revenue.iterator(chunk_size=2000):
         # annotations from annotate_revenue_on_checkins
         revenue = checkin.revenue or Decimal(0)
         # Ensure we have a station (robustness)
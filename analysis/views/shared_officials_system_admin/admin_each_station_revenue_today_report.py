@@ -60,7 +60,7 @@ def admin_each_station_revenue_today_report(request):
     # 2. Filter check-ins within the last 24 hours for successful statuses
     base_checkins_query = Checkin.objects.filter(
         checkin_time__range=[start_time, end_time],
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         station__isnull=False,  # Ensure check-ins are linked to a station
     )
 
@@ -74,7 +74,7 @@ def admin_each_station_revenue_today_report(request):
     # 4. Perform a single database aggregation for all required metrics per station
     # 4. Perform aggregation in Python
     # Checkin query is already executed when iterating
-    for checkin in checkins_with_revenue:
+    for checkin in checkins_with_revenue.iterator(chunk_size=2000):
         # annotations: revenue, incremental_weight
         # station is fetched via filter
         if checkin.station_id:
@@ -1,25 +1,13 @@
-from calendar import month_name
-from datetime import datetime, timedelta
-from decimal import Decimal
-
 from django.core.exceptions import ValidationError
-from django.db.models import Case, DecimalField, F, Q, Sum
-from django.db.models import Value as V
-from django.db.models.functions import (
-    Coalesce,
-    ExtractDay,
-    ExtractMonth,
-    ExtractWeekDay,
-)
-from django.utils.timezone import (  # parse_and_validate_date_range already handles this
-    make_aware,
-)
+from django.db.models import Q
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
+    aggregate_trend_series,
     annotate_revenue_on_checkins,
+    get_trend_categories,
     parse_and_validate_date_range,
 )
 from declaracions.models import Checkin
@@ -90,7 +78,7 @@ def admin_each_station_revenue_trends_report(request):
 
     # 2. Base filters for check-ins
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
         station__isnull=False,  # Ensure check-ins are linked to a station
     )
@@ -98,106 +86,35 @@ def admin_each_station_revenue_trends_report(request):
     checkins_query = Checkin.objects.filter(base_checkins_filters)
 
     # Get all workstation names for consistent `labels` output
-    all_stations = WorkStation.objects.all().order_by("name")
-
-    categories = []
-    if selected_date_type == "weekly":
-        categories = [
-            "Monday",
-            "Tuesday",
-            "Wednesday",
-            "Thursday",
-            "Friday",
-            "Saturday",
-            "Sunday",
-        ]
-    elif selected_date_type == "monthly":
-        days_in_range = (inclusive_end_date.date() - start_date.date()).days + 1
-        num_weeks = (days_in_range + 6) // 7  # Ceiling division
-        categories = [f"Week {i}" for i in range(1, num_weeks + 1)]
-    elif selected_date_type == "yearly":
-        categories = [month_name[i] for i in range(1, 13)]
-
-    if not checkins_query.exists():
-        # Return empty data, but with correct categories for the frontend to render structure
-        empty_series = []
-        for station in all_stations:
-            empty_series.append({"name": station.name, "data": [0.0] * len(categories)})
-        return Response({"series": empty_series, "categories": categories})
-
-    # 3. Annotate check-ins with incremental revenue using the helper
-    checkins_with_revenue = annotate_revenue_on_checkins(checkins_query)
-
-    # Initialize a nested dictionary to hold revenue per station per category
-    # station_revenue_map: { "Station Name": { "Category Label": Decimal(0), ... } }
-    station_revenue_map = {
-        station.name: {category: Decimal(0) for category in categories}
-        for station in all_stations
-    }
+    all_stations = WorkStation.objects.only("name").order_by("name")
+    station_ids_by_name = {}
+    for station in all_stations:
+        station_ids_by_name.setdefault(station.name, []).append(station.pk)
 
-    # 4. Perform aggregation in Python
-    # We iterate through the queryset (which has revenue annotated) and accumulate
-    # totals into our nested dictionary structure based on the date type.
+    # 3. Sum the incremental revenue per station and time bucket in a single
+    # aggregate query (an empty range simply yields zeros)
+    categories = get_trend_categories(
+        selected_date_type, start_date, inclusive_end_date
+    )
+    station_totals = aggregate_trend_series(
+        annotate_revenue_on_checkins(checkins_query),
+        selected_date_type,
+        categories,
+        time_field="checkin_time",
+        value_field="revenue",
+        series_filters={
+            name: Q(station_id__in=station_ids)
+            for name, station_ids in station_ids_by_name.items()
+        },
+    )
 
-    if selected_date_type == "weekly":
-        # Annotate with week day to easily map to categories
-        checkins_with_revenue = checkins_with_revenue.annotate(
-            weekday_num=ExtractWeekDay("checkin_time")
-        )
-        # DB: 1=Sunday, 2=Monday... 7=Saturday
-        db_map = {
-            2: "Monday", 3: "Tuesday", 4: "Wednesday",
-            5: "Thursday", 6: "Friday", 7: "Saturday", 1: "Sunday"
+    # 4. Build series data, ensuring all categories are present with 0 if no data
+    series = [
+        {
+            "name": station.name,
+            "data": [float(total) for total in station_totals[station.name]],
         }
-        for checkin in checkins_with_revenue:
-            rev = checkin.revenue or Decimal(0)
-            day_label = db_map.get(checkin.weekday_num)
-            if checkin.station and day_label:
-                s_name = checkin.station.name
-                if s_name in station_revenue_map:
-                    station_revenue_map[s_name][day_label] += rev
-
-    elif selected_date_type == "monthly":
-        # Annotate with day of month to calculate week number
-        checkins_with_revenue = checkins_with_revenue.annotate(
-            day_of_month=ExtractDay("checkin_time")
-        )
-        for checkin in checkins_with_revenue:
-            rev = checkin.revenue or Decimal(0)
-            # Week number calculation: ((day-1) // 7) + 1
-            week_num = ((checkin.day_of_month - 1) // 7) + 1
-            week_label = f"Week {week_num}"
-            
-            if checkin.station and week_label in categories:
-                s_name = checkin.station.name
-                if s_name in station_revenue_map:
-                    station_revenue_map[s_name][week_label] += rev
-
-    elif selected_date_type == "yearly":
-        # Annotate with month number
-        checkins_with_revenue = checkins_with_revenue.annotate(
-            month_num=ExtractMonth("checkin_time")
-        )
-        for checkin in checkins_with_revenue:
-            rev = checkin.revenue or Decimal(0)
-            m_num = checkin.month_num
-            # month_name array: index 0 is empty string, 1=Jan
-            if 1 <= m_num <= 12:
-                month_label = month_name[m_num]
-                if checkin.station:
-                    s_name = checkin.station.name
-                    if s_name in station_revenue_map:
-                        station_revenue_map[s_name][month_label] += rev
-
-    # 5. Build series data, ensuring all categories are present with 0 if no data
-    series = []
-    for station in all_stations:
-        station_name = station.name
-        # Get data for this station, ensuring it matches the order of 'categories'
-        data_for_station = [
-            float(station_revenue_map[station_name].get(category, Decimal(0)))
-            for category in categories
-        ]
-        series.append({"name": station_name, "data": data_for_station})
+        for station in all_stations
+    ]
 
     return Response({"series": series, "categories": categories})
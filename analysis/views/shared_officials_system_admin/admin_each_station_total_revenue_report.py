@@ -8,9 +8,6 @@ from django.core.exceptions import ValidationError
 from django.db.models import F, Q, Sum
 from django.db.models import Value as V
 from django.db.models.functions import Coalesce
-from django.utils.timezone import (  # parse_and_validate_date_range already handles this
-    make_aware,
-)
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -89,7 +86,7 @@ def admin_each_station_total_revenue_report(request):
 
     # 2. Base filters for check-ins
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
         station__isnull=False,  # Ensure check-ins are linked to a station
     )
@@ -105,7 +102,9 @@ def admin_each_station_total_revenue_report(request):
         return Response({"data": [0.0] * len(labels), "labels": labels})
 
     # 3. Annotate check-ins with incremental revenue using the helper
-    checkins_with_revenue = annotate_revenue_on_checkins(checkins_query)
+    checkins_with_revenue = annotate_revenue_on_checkins(
+        checkins_query.select_related("station").only("station__name")
+    )
 
     # Initialize a dictionary to hold total revenue for each station, initialized to 0
     # station_revenues_map: { "Station Name": Decimal(0) }
@@ -113,7 +112,7 @@ def admin_each_station_total_revenue_report(request):
 
     # 4. Perform aggregation in Python
     # Sum revenue manually
-    for checkin in checkins_with_revenue:
+    for checkin in checkins_with_revenue.iterator(chunk_size=2000):
         rev = checkin.revenue or Decimal(0)
         if checkin.station:
             s_name = checkin.station.name
@@ -127,4 +126,3 @@ def admin_each_station_total_revenue_report(request):
     ]
 
     return Response({"data": data_list, "labels": labels})
-    return Response({"data": data_list, "labels": labels})
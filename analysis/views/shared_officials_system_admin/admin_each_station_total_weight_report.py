@@ -11,9 +11,6 @@ from django.db.models.functions import (
     ExtractMonth,
     ExtractWeekDay,
 )
-from django.utils.timezone import (  # parse_and_validate_date_range already handles this
-    make_aware,
-)
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -89,7 +86,7 @@ def admin_each_station_total_weight_report(request):
 
     # 2. Base filters for check-ins
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
         station__isnull=False,  # Ensure check-ins are linked to a station
     )
@@ -105,7 +102,9 @@ def admin_each_station_total_weight_report(request):
         return Response({"data": [0.0] * len(labels), "labels": labels})
 
     # 3. Annotate check-ins with incremental weight (total_amount) using the helper
-    checkins_with_weight = annotate_revenue_on_checkins(checkins_query)
+    checkins_with_weight = annotate_revenue_on_checkins(
+        checkins_query.select_related("station").only("station__name")
+    )
 
     # Initialize a dictionary to hold total weight for each station, initialized to 0
     # station_weights_map: { "Station Name": Decimal(0) }
@@ -113,7 +112,7 @@ def admin_each_station_total_weight_report(request):
 
     # 4. Perform aggregation in Python
     # Sum incremental_weight manually
-    for checkin in checkins_with_weight:
+    for checkin in checkins_with_weight.iterator(chunk_size=2000):
         # incremental_weight is annotated by annotate_revenue_on_checkins
         weight = checkin.incremental_weight or Decimal(0)
         if checkin.station:
@@ -127,4 +126,3 @@ def admin_each_station_total_weight_report(request):
     ]
 
     return Response({"data": data_list, "labels": labels})
-    return Response({"data": data_list, "labels": labels})
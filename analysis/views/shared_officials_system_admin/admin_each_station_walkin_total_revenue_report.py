@@ -11,7 +11,6 @@ from django.db.models.functions import (
     ExtractMonth,
     ExtractWeekDay,
 )
-from django.utils.timezone import make_aware
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -89,7 +88,7 @@ def admin_each_station_walkin_total_revenue_report(request):
     # Filters for successful check-ins within the date range, linked to a station,
     # and specifically those with no associated 'declaracion' (indicating walk-in/local journey).
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
         station__isnull=False,  # Ensure check-ins are linked to a station
         declaracion__isnull=True,  # This is the key for "Walk-in" revenue
@@ -107,7 +106,9 @@ def admin_each_station_walkin_total_revenue_report(request):
         return Response({"data": [0.0] * len(labels), "labels": labels})
 
     # 3. Annotate check-ins with incremental revenue using the helper
-    checkins_with_revenue = annotate_revenue_on_checkins(checkins_query)
+    checkins_with_revenue = annotate_revenue_on_checkins(
+        checkins_query.select_related("station").only("station__name")
+    )
 
     # Initialize a dictionary to hold total "Walk-in" revenue for each station, initialized to 0
     # station_revenues_map: { "Station Name": Decimal(0) }
@@ -115,7 +116,7 @@ def admin_each_station_walkin_total_revenue_report(request):
 
     # 4. Perform aggregation in Python
     # Sum revenue manually
-    for checkin in checkins_with_revenue:
+    for checkin in checkins_with_revenue.iterator(chunk_size=2000):
         rev = checkin.revenue or Decimal(0)
         if checkin.station:
             s_name = checkin.station.name
@@ -6,12 +6,14 @@ from django.db.models import Case, Count, F, Q
 from django.db.models import Value as V
 from django.db.models import When
 from django.db.models.functions import ExtractDay, ExtractMonth, ExtractWeekDay
-from django.utils.timezone import make_aware
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
-from analysis.views.helpers import parse_and_validate_date_range
+from analysis.views.helpers import (
+    EXTRACT_WEEKDAY_NAMES,
+    parse_and_validate_date_range,
+)
 from drivers.models import Driver
 from workstations.models import WorkStation
 
@@ -128,15 +130,6 @@ def admin_registered_drivers_each_station_report(request):
 
     if selected_date_type == "weekly":
         # DB's ExtractWeekDay is 1=Sunday, 2=Monday, ..., 7=Saturday
-        db_day_to_category_map = {
-            2: "Monday",
-            3: "Tuesday",
-            4: "Wednesday",
-            5: "Thursday",
-            6: "Friday",
-            7: "Saturday",
-            1: "Sunday",
-        }
 
         grouped_data = (
             drivers_query.annotate(time_unit=ExtractWeekDay("created_at"))
@@ -147,7 +140,7 @@ def admin_registered_drivers_each_station_report(request):
 
         for entry in grouped_data:
             station_name = entry["register_place__name"]
-            day_label = db_day_to_category_map.get(entry["time_unit"])
+            day_label = EXTRACT_WEEKDAY_NAMES[entry["time_unit"]]
             if station_name in station_data_map and day_label:
                 station_data_map[station_name][day_label] = entry["count"]
 
@@ -205,5 +198,3 @@ def admin_registered_drivers_each_station_report(request):
         series.append({"name": station_name, "data": data_for_station})
 
     return Response({"series": series, "categories": categories})
-
-    return Response({"series": series, "categories": categories})
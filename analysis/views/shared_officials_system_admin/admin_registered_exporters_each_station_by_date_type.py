@@ -6,14 +6,14 @@ from django.db.models import Case, Count, F, Q
 from django.db.models import Value as V
 from django.db.models import When
 from django.db.models.functions import ExtractDay, ExtractMonth, ExtractWeekDay
-from django.utils.timezone import (  # parse_and_validate_date_range already handles this
-    make_aware,
-)
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
-from analysis.views.helpers import parse_and_validate_date_range
+from analysis.views.helpers import (
+    EXTRACT_WEEKDAY_NAMES,
+    parse_and_validate_date_range,
+)
 from exporters.models import Exporter
 from workstations.models import WorkStation
 
@@ -126,16 +126,6 @@ def admin_registered_exporters_each_station_by_date_type(request):
     aggregated_data = None
     if selected_date_type == "weekly":
         # DB's ExtractWeekDay is 1=Sunday, 2=Monday, ..., 7=Saturday
-        # Map it to our 'labels' list which starts with Monday (index 0)
-        db_day_to_label_map = {
-            2: "Monday",
-            3: "Tuesday",
-            4: "Wednesday",
-            5: "Thursday",
-            6: "Friday",
-            7: "Saturday",
-            1: "Sunday",
-        }
         aggregated_query = (
             exporters_query.annotate(time_unit=ExtractWeekDay("created_at"))
             .values("register_place__name", "time_unit")
@@ -145,7 +135,7 @@ def admin_registered_exporters_each_station_by_date_type(request):
         # Convert DB's time_unit to a string label for mapping
         processed_data = []
         for item in aggregated_query:
-            label = db_day_to_label_map.get(item["time_unit"])
+            label = EXTRACT_WEEKDAY_NAMES[item["time_unit"]]
             if label:
                 processed_data.append(
                     {
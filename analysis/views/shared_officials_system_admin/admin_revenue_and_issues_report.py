@@ -6,7 +6,6 @@ from django.db.models import Case, Count, F, Q, Subquery, Sum
 from django.db.models import Value as V
 from django.db.models import When
 from django.db.models.functions import Coalesce, Concat
-from django.utils.timezone import make_aware
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -186,7 +185,7 @@ def admin_revenue_and_issues_report(request):
 
     common_filters = Q(
         checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         employee__isnull=False,
         station__isnull=False,
     )
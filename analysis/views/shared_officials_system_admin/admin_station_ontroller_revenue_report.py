@@ -1,24 +1,15 @@
-from calendar import month_name
-from datetime import datetime, timedelta
-from decimal import Decimal
-
 from django.core.exceptions import ValidationError
-from django.db.models import Case, CharField, DecimalField, F, Q, Sum
+from django.db.models import F, Q
 from django.db.models import Value as V
-from django.db.models import When
-from django.db.models.functions import (
-    Coalesce,
-    Concat,
-    ExtractDay,
-    ExtractMonth,
-    ExtractWeekDay,
-)
+from django.db.models.functions import Coalesce, Concat
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
+    aggregate_trend_series,
     annotate_revenue_on_checkins,
+    get_trend_categories,
     parse_and_validate_date_range,
 )
 from declaracions.models import Checkin
@@ -118,7 +109,7 @@ def admin_station_ontroller_revenue_report(request):
 
     # 3. Base filters for check-ins related to the station and date range
     base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         checkin_time__range=[start_date, inclusive_end_date],
         station=station,  # Filter by the found station object
         employee__isnull=False,  # Ensure check-ins are linked to an employee
@@ -126,24 +117,9 @@ def admin_station_ontroller_revenue_report(request):
 
     checkins_query = Checkin.objects.filter(base_checkins_filters)
 
-    # Initialize categories for output structure
-    categories = []
-    if selected_date_type == "weekly":
-        categories = [
-            "Monday",
-            "Tuesday",
-            "Wednesday",
-            "Thursday",
-            "Friday",
-            "Saturday",
-            "Sunday",
-        ]
-    elif selected_date_type == "monthly":
-        days_in_range = (inclusive_end_date.date() - start_date.date()).days + 1
-        num_weeks = (days_in_range + 6) // 7
-        categories = [f"Week {i}" for i in range(1, num_weeks + 1)]
-    elif selected_date_type == "yearly":
-        categories = [month_name[i] for i in range(1, 13)]
+    categories = get_trend_categories(
+        selected_date_type, start_date, inclusive_end_date
+    )
 
     # If no check-ins, return empty data with correct categories structure
     if not checkins_query.exists():
@@ -187,60 +163,17 @@ def admin_station_ontroller_revenue_report(request):
         .order_by("full_name")  # Ensure consistent order
     )
 
-    # Initialize a dictionary to store aggregated revenue per employee and time category
-    # { "Employee Name": { "Category1": Decimal(0), "Category2": Decimal(0), ... } }
-    employee_revenue_by_category = {
-        name: {cat: Decimal(0) for cat in categories}
-        for name in all_employees_at_station_names
-    }
-
-    # 5. Perform database aggregation based on selected_date_type
-    # 5. Perform aggregation in Python
-    # Iterate query and sum up revenue into `employee_revenue_by_category`
-
-    if selected_date_type == "weekly":
-        checkins_with_revenue = checkins_with_revenue.annotate(
-            weekday_num=ExtractWeekDay("checkin_time")
-        )
-        # 1=Sun ... 7=Sat
-        db_map = {
-            2: "Monday", 3: "Tuesday", 4: "Wednesday",
-            5: "Thursday", 6: "Friday", 7: "Saturday", 1: "Sunday"
-        }
-        for checkin in checkins_with_revenue:
-            emp_name = checkin.employee_full_name  # Annotated in step 4
-            day_label = db_map.get(checkin.weekday_num)
-            rev = checkin.revenue or Decimal(0)
-            
-            if emp_name in employee_revenue_by_category and day_label:
-                employee_revenue_by_category[emp_name][day_label] += rev
-
-    elif selected_date_type == "monthly":
-        checkins_with_revenue = checkins_with_revenue.annotate(
-            day_of_month=ExtractDay("checkin_time")
-        )
-        for checkin in checkins_with_revenue:
-            emp_name = checkin.employee_full_name
-            week_num = ((checkin.day_of_month - 1) // 7) + 1
-            week_label = f"Week {week_num}"
-            rev = checkin.revenue or Decimal(0)
-
-            if emp_name in employee_revenue_by_category and week_label in categories:
-                employee_revenue_by_category[emp_name][week_label] += rev
-
-    elif selected_date_type == "yearly":
-        checkins_with_revenue = checkins_with_revenue.annotate(
-            month_num=ExtractMonth("checkin_time")
-        )
-        for checkin in checkins_with_revenue:
-            emp_name = checkin.employee_full_name
-            m_num = checkin.month_num
-            rev = checkin.revenue or Decimal(0)
-            
-            if 1 <= m_num <= 12:
-                month_label = month_name[m_num]
-                if emp_name in employee_revenue_by_category and month_label:
-                    employee_revenue_by_category[emp_name][month_label] += rev
+    # 5. Sum the revenue per employee and time bucket in a single aggregate query
+    employee_revenue_by_category = aggregate_trend_series(
+        checkins_with_revenue,
+        selected_date_type,
+        categories,
+        time_field="checkin_time",
+        value_field="revenue",
+        series_filters={
+            name: Q(employee_full_name=name) for name in all_employees_at_station_names
+        },
+    )
 
     # 6. Format response `series`
     series = []
@@ -248,8 +181,7 @@ def admin_station_ontroller_revenue_report(request):
         employee_name
     ) in all_employees_at_station_names:  # Iterate through sorted employee names
         data_for_employee = [
-            float(employee_revenue_by_category[employee_name].get(category, Decimal(0)))
-            for category in categories
+            float(total) for total in employee_revenue_by_category[employee_name]
         ]
         series.append({"name": employee_name, "data": data_for_employee})
 
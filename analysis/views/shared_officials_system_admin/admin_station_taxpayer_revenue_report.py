@@ -89,7 +89,7 @@ def admin_station_taxpayer_revenue_report(request):
     # 3. Filter base check-ins for the date range and successful status
     base_checkins_query = Checkin.objects.filter(
         checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         station__isnull=False,  # Ensure check-ins are linked to a station
     )
 
@@ -99,7 +99,9 @@ def admin_station_taxpayer_revenue_report(request):
 
     # 4. Annotate check-ins with incremental weight, revenue, and taxpayer type
     checkins_with_data = (
-        annotate_revenue_on_checkins(base_checkins_query)
+        annotate_revenue_on_checkins(
+            base_checkins_query.select_related("station").only("station__name")
+        )
         .annotate(
             taxpayer_type=Case(
                 When(declaracion__isnull=False, then=V("regular")),
@@ -112,32 +114,22 @@ def admin_station_taxpayer_revenue_report(request):
     )  # Only consider valid taxpayer types
 
     # 5. Aggregate revenue and incremental weight per station and taxpayer type (Python)
-    for checkin in checkins_with_data:
+    for checkin in checkins_with_data.iterator(chunk_size=2000):
         # Checkin has annotated fields from steps above
         s_name = checkin.station.name if checkin.station else None
         t_type = checkin.taxpayer_type
-        
-        if s_name and t_type in ["regular", "walkin"]:
-            rev = checkin.revenue or Decimal(0)
-            weight = checkin.incremental_weight or Decimal(0)
-            
-            if s_name in data:
-                 data[s_name][t_type]["total_revenue"] += rev
-                 data[s_name][t_type]["total_amount"] += weight
-
-    # 6. Populate the `data` dictionary with the aggregated results
-    for item in station_taxpayer_aggregates:
-        station_name = item["station__name"]
-        taxpayer_type = item["taxpayer_type"]
-
-        if station_name in data and taxpayer_type in data[station_name]:
-            data[station_name][taxpayer_type]["total_revenue"] = round(
-                item["total_revenue_sum"], 2
-            )
-            data[station_name][taxpayer_type]["total_amount"] = round(
-                item["total_amount_sum"], 2
+
+        if s_name in data and t_type in ["regular", "walkin"]:
+            data[s_name][t_type]["total_revenue"] += checkin.revenue or Decimal(0)
+            data[s_name][t_type]["total_amount"] += (
+                checkin.incremental_weight or Decimal(0)
             )
-            # data[station_name][taxpayer_type]["transaction"] = item["transaction_count"] # If needed
+
+    # 6. Round the aggregated totals in the `data` dictionary
+    for station_data in data.values():
+        for taxpayer_data in station_data.values():
+            taxpayer_data["total_revenue"] = round(taxpayer_data["total_revenue"], 2)
+            taxpayer_data["total_amount"] = round(taxpayer_data["total_amount"], 2)
 
     # 7. Return the response (frontend compatible)
     return Response({"labels": labels, "data": data})
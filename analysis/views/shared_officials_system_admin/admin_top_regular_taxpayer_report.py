@@ -1,16 +1,14 @@
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Count, F, Q, Sum, Value
-from django.db.models.functions import Coalesce
+from django.db.models import Count
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
-    annotate_revenue_on_checkins,
     parse_and_validate_date_range,
+    revenue_totals_by,
 )
 from declaracions.models import Checkin
 from exporters.models import Exporter
@@ -27,8 +25,9 @@ def admin_top_regular_taxpayer_report(request):
     For each of these top taxpayers, the report provides their total revenue
     and total incremental weight (amount) derived from their check-ins during
     the period. This view leverages `parse_and_validate_date_range` for robust
-    date handling and `annotate_revenue_on_checkins` for efficient database-level
-    calculation of incremental revenue and weight, replacing manual Python loops.
+    date handling. Declaration counts are read from the check-ins; weight and
+    revenue are summed per exporter from the checkin revenue rollup and the
+    check-ins changed since its last refresh.
 
     Query Parameters:
     - selected_date_type (str): Specifies the date range validation type ('weekly', 'monthly', 'yearly'). Required.
@@ -83,88 +82,60 @@ def admin_top_regular_taxpayer_report(request):
     except ValidationError as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    # 2. Build the base queryset for relevant "regular" check-ins
-    base_regular_checkins_query = Checkin.objects.filter(
-        checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
+    # 2. Filters for the relevant "regular" check-ins
+    regular_filters = dict(
         declaracion__isnull=False,  # Filter for declaration-based check-ins only (regular)
         declaracion__exporter__isnull=False,  # Ensure an exporter is linked
     )
 
-    if not base_regular_checkins_query.exists():
+    # 3. Count unique declarations per exporter
+    path_counts = (
+        Checkin.objects.filter(
+            checkin_time__range=[start_date, inclusive_end_date],
+            status__in=Checkin.SUCCESSFUL_STATUSES,
+            **regular_filters,
+        )
+        .values("declaracion__exporter")
+        .annotate(total_path=Count("declaracion_id", distinct=True))
+        .order_by()
+    )
+
+    # 4. Weight and revenue per exporter over the same check-ins, from the rollup
+    exporter_totals = revenue_totals_by(
+        "declaracion__exporter", start_date, inclusive_end_date, **regular_filters
+    )
+
+    # 5. Rank exporters by unique declarations, then revenue, and keep the top 10
+    top_exporters = sorted(
+        (
+            {**exporter_totals[row["declaracion__exporter"]], **row}
+            for row in path_counts
+        ),
+        key=lambda totals: (-totals["total_path"], -totals["total_revenue"]),
+    )[:10]
+
+    if not top_exporters:
         return Response([])
 
-    # 3. Annotate check-ins with incremental weight and revenue using the helper
-    checkins_with_revenue_and_weight = annotate_revenue_on_checkins(
-        base_regular_checkins_query
+    exporters = (
+        Exporter.objects.select_related("type")
+        .only("tin_number", "first_name", "last_name", "type__name")
+        .in_bulk([row["declaracion__exporter"] for row in top_exporters])
     )
 
-    # 4. Aggregate data for top "Regular" taxpayers (Python)
-    taxpayer_stats_map = {}
-
-    for checkin in checkins_with_revenue_and_weight:
-        # Access relationship fields.
-        decl = checkin.declaracion
-        exporter = decl.exporter
-        
-        if not exporter:
-            continue
-            
-        e_id = exporter.id
-        
-        if e_id not in taxpayer_stats_map:
-            # Safely get type name
-            t_name = "Unknown"
-            if exporter.type:
-                t_name = exporter.type.name
-                
-            taxpayer_stats_map[e_id] = {
-                "first_name": exporter.first_name,
-                "last_name": exporter.last_name,
-                "tin_number": exporter.tin_number,
-                "type_name": t_name,
-                "total_revenue": Decimal(0),
-                "total_amount": Decimal(0),
-                "path_set": set() # track unique declaracion_ids
-            }
-            
-        rev = checkin.revenue or Decimal(0)
-        weight = checkin.incremental_weight or Decimal(0)
-        
-        taxpayer_stats_map[e_id]["total_revenue"] += rev
-        taxpayer_stats_map[e_id]["total_amount"] += weight
-        taxpayer_stats_map[e_id]["path_set"].add(decl.id)
-
-    # Convert to list
-    stats_list = []
-    for e_id, stats in taxpayer_stats_map.items():
-        stats["total_path"] = len(stats["path_set"])
-        if stats["total_path"] > 0:
-            stats_list.append(stats)
-            
-    # Order by total_path (desc), then total_revenue (desc)
-    stats_list.sort(key=lambda x: (x["total_path"], x["total_revenue"]), reverse=True)
-    
-    # Take top 10
-    top_regular_taxpayers_data = stats_list[:10]
-
-    # 5. Prepare the report data in the required format
+    # 6. Prepare the report data in the required format
     report_data = []
-    for item in top_regular_taxpayers_data:
-        # The original code had category logic here, but it wasn't used in the final
-        # output structure for 'admin_top_regular_taxpayer_report'.
-        # Keeping the format exactly as requested by the user.
+    for totals in top_exporters:
+        exporter = exporters[totals["declaracion__exporter"]]
         report_data.append(
             {
-                "tin_number": item["tin_number"],
-                "type": item["type_name"],
-                "exporter_name": f"{item['first_name']} {item['last_name']}".strip(),
-                "total_amount": float(round(item["total_amount"], 2)),
-                "total_revenue": float(round(item["total_revenue"], 2)),
-                "total_path": item["total_path"],
+                "tin_number": exporter.tin_number,
+                "type": exporter.type.name if exporter.type else "Unknown",
+                "exporter_name": f"{exporter.first_name} {exporter.last_name}".strip(),
+                "total_amount": float(round(totals["total_amount"], 2)),
+                "total_revenue": float(round(totals["total_revenue"], 2)),
+                "total_path": totals["total_path"],
             }
         )
 
     return Response(report_data)
-    return Response(report_data)
-    return Response(report_data)
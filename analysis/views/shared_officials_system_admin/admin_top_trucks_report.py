@@ -1,9 +1,7 @@
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Count, F, Q, Sum, Value
-from django.db.models.functions import Coalesce
+from django.db.models import Count
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -12,8 +10,8 @@ from analysis.serializers import (  # Assuming this serializer correctly maps th
     TopTrucksSerializer,
 )
 from analysis.views.helpers import (
-    annotate_revenue_on_checkins,
     parse_and_validate_date_range,
+    revenue_totals_by,
 )
 from declaracions.models import (  # We will primarily use Checkin, not Declaracion directly for aggregation
     Checkin,
@@ -30,9 +28,10 @@ def admin_top_trucks_report(request):
 
     For each of these top trucks, the report includes total check-ins, total
     unique declarations (paths), total incremental weight (kg), and total revenue.
-    This view uses `parse_and_validate_date_range` for robust date handling
-    and `annotate_revenue_on_checkins` for efficient database-level calculations
-    of incremental weight and revenue, replacing inefficient Python loops.
+    This view uses `parse_and_validate_date_range` for robust date handling.
+    Trucks are ranked with a grouped count query; the weight and revenue of the
+    10 selected trucks are then summed from the checkin revenue rollup and the
+    check-ins changed since its last refresh.
 
     Query Parameters:
     - selected_date_type (str): Specifies the date range validation type ('weekly', 'monthly', 'yearly'). Required.
@@ -89,97 +88,67 @@ def admin_top_trucks_report(request):
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     # 2. Build the base queryset for relevant check-ins
-    # Filter for successful check-ins within the date range, linked to a declaration and a truck.
-    base_checkins_filters = Q(
-        status__in=["pass", "paid", "success"],
-        checkin_time__range=[start_date, inclusive_end_date],
+    # Filter for check-ins within the date range, linked to a declaration and a truck.
+    truck_filters = dict(
         declaracion__isnull=False,  # Ensure it's a declaration-based checkin
         declaracion__truck__isnull=False,  # Ensure it's linked to a truck
     )
 
-    base_checkins_query = Checkin.objects.filter(base_checkins_filters)
+    # 3. Rank trucks by successful check-ins and unique declarations (paths)
+    top_truck_counts = list(
+        Checkin.objects.filter(
+            checkin_time__range=[start_date, inclusive_end_date],
+            status__in=Checkin.SUCCESSFUL_STATUSES,
+            **truck_filters,
+        )
+        .values("declaracion__truck")
+        .annotate(
+            total_checkins=Count("id"),
+            path_count=Count("declaracion_id", distinct=True),
+        )
+        .order_by("-total_checkins", "-path_count")[:10]
+    )
 
-    if not base_checkins_query.exists():
+    if not top_truck_counts:
         return Response([])
 
-    # 3. Annotate check-ins with incremental weight and revenue using the helper
-    checkins_with_revenue = annotate_revenue_on_checkins(base_checkins_query)
-
-    # 4. Aggregate data for top trucks using Python
-    # Dictionary to hold truck stats: {truck_id: {stats}}
-    truck_stats_map = {}
-
-    for checkin in checkins_with_revenue:
-        # Resolve truck details from the checkin's declaration
-        # Checkin -> Declaracion -> Truck
-        # Note: base_checkins_filters ensures declaracion and declaracion__truck are not null
-        
-        # Accessing related objects efficiently might require select_related in the query optimization step,
-        # but for now we rely on the queryset. 
-        # Ideally: checkins_with_revenue.select_related('declaracion__truck__owner')
-        
-        decl = checkin.declaracion
-        truck = decl.truck
-        owner = truck.owner if truck else None # Should be present due to filter
-        
-        t_id = truck.id
-        
-        if t_id not in truck_stats_map:
-            truck_stats_map[t_id] = {
-                "declaracion__truck__plate_number": truck.plate_number,
-                "declaracion__truck__truck_brand": truck.truck_brand,
-                "declaracion__truck__owner__first_name": owner.first_name if owner else "",
-                "declaracion__truck__owner__last_name": owner.last_name if owner else "",
-                "total_revenue": Decimal(0),
-                "total_kg": Decimal(0),
-                "total_checkins": 0,
-                "path_set": set() # track unique declaracion_ids
-            }
-        
-        rev = checkin.revenue or Decimal(0)
-        weight = checkin.incremental_weight or Decimal(0)
-        
-        truck_stats_map[t_id]["total_revenue"] += rev
-        truck_stats_map[t_id]["total_kg"] += weight
-        truck_stats_map[t_id]["total_checkins"] += 1
-        truck_stats_map[t_id]["path_set"].add(decl.id)
-
-    # Convert map to list and sort
-    truck_stats_list = []
-    for t_id, stats in truck_stats_map.items():
-        stats["path_count"] = len(stats["path_set"])
-        truck_stats_list.append(stats)
-        
-    # Sort by checkins (desc), then path_count (desc)
-    truck_stats_list.sort(key=lambda x: (x["total_checkins"], x["path_count"]), reverse=True)
-    
-    # Take top 10
-    truck_stats = truck_stats_list[:10]
-
-    # 5. Prepare the report data in the required format
+    top_truck_ids = [row["declaracion__truck"] for row in top_truck_counts]
+
+    # 4. Weight and revenue for the top trucks over the same check-ins, from the rollup
+    truck_totals = revenue_totals_by(
+        "declaracion__truck",
+        start_date,
+        inclusive_end_date,
+        declaracion__truck__in=top_truck_ids,
+        **truck_filters,
+    )
+    trucks = (
+        Truck.objects.select_related("owner")
+        .only("plate_number", "truck_brand", "owner__first_name", "owner__last_name")
+        .in_bulk(top_truck_ids)
+    )
+
+    # 5. Prepare the report data in the required format, keeping the ranking order
     report_data = []
-    for truck_entry in truck_stats:
-        owner_first_name = truck_entry["declaracion__truck__owner__first_name"]
-        owner_last_name = truck_entry["declaracion__truck__owner__last_name"]
+    for row in top_truck_counts:
+        truck = trucks[row["declaracion__truck"]]
+        totals = truck_totals[truck.id]
         owner_name = (
-            f"{owner_first_name} {owner_last_name}".strip()
-            if owner_first_name or owner_last_name
-            else "Unknown"
+            f"{truck.owner.first_name} {truck.owner.last_name}".strip() or "Unknown"
         )
 
         report_data.append(
             {
-                "plate_number": truck_entry["declaracion__truck__plate_number"],
-                "make": truck_entry["declaracion__truck__truck_brand"] or "Unknown",
+                "plate_number": truck.plate_number,
+                "make": truck.truck_brand or "Unknown",
                 "owner_name": owner_name,
-                "total_checkins": truck_entry["total_checkins"],
-                "path_count": truck_entry["path_count"],
-                "total_kg": float(round(truck_entry["total_kg"], 2)),
-                "total_revenue": float(round(truck_entry["total_revenue"], 2)),
+                "total_checkins": row["total_checkins"],
+                "path_count": row["path_count"],
+                "total_kg": float(round(totals["total_amount"], 2)),
+                "total_revenue": float(round(totals["total_revenue"], 2)),
             }
         )
 
     # 6. Serialize and return the report data (frontend compatible)
-    serializer = TopTrucksSerializer(data=report_data, many=True)
-    serializer.is_valid(raise_exception=True)  # Will raise 400 if validation fails
-    return Response(serializer.data)
+    # The rows are built server-side, so serialize for output only (no validation)
+    return Response(TopTrucksSerializer(report_data, many=True).data)
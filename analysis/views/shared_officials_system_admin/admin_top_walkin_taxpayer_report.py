@@ -1,20 +1,17 @@
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Count, F, Q, Sum
-from django.db.models.functions import Coalesce
+from django.db.models import Count
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
-    annotate_revenue_on_checkins,
     parse_and_validate_date_range,
+    revenue_totals_by,
 )
 from declaracions.models import Checkin
 from exporters.models import Exporter
-from localcheckings.models import JourneyWithoutTruck
 
 
 @api_view(["GET"])
@@ -28,8 +25,9 @@ def admin_top_walkin_taxpayer_report(request):
     For each of these top taxpayers, the report provides their total revenue
     and total incremental weight (amount) derived from their check-ins during
     the period. This view leverages `parse_and_validate_date_range` for robust
-    date handling and `annotate_revenue_on_checkins` for efficient database-level
-    calculation of incremental revenue and weight, replacing manual Python loops.
+    date handling. Journey counts are read from the check-ins; weight and
+    revenue are summed per exporter from the checkin revenue rollup and the
+    check-ins changed since its last refresh.
 
     Query Parameters:
     - selected_date_type (str): Specifies the date range validation type ('weekly', 'monthly', 'yearly'). Required.
@@ -84,69 +82,59 @@ def admin_top_walkin_taxpayer_report(request):
     except ValidationError as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    # 2. Build the base queryset for relevant "walk-in" check-ins
-    base_walkin_checkins_query = Checkin.objects.filter(
-        checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
+    # 2. Filters for the relevant "walk-in" check-ins
+    walkin_filters = dict(
         localJourney__isnull=False,  # Filter for local journeys only (walk-in)
         localJourney__exporter__isnull=False,  # Ensure an exporter is linked
     )
 
-    if not base_walkin_checkins_query.exists():
-        return Response([])
+    # 3. Count unique local journeys per exporter
+    path_counts = (
+        Checkin.objects.filter(
+            checkin_time__range=[start_date, inclusive_end_date],
+            status__in=Checkin.SUCCESSFUL_STATUSES,
+            **walkin_filters,
+        )
+        .values("localJourney__exporter")
+        .annotate(total_path=Count("localJourney_id", distinct=True))
+        .order_by()
+    )
 
-    # 3. Annotate check-ins with incremental weight and revenue using the helper
-    checkins_with_revenue_and_weight = annotate_revenue_on_checkins(
-        base_walkin_checkins_query
+    # 4. Weight and revenue per exporter over the same check-ins, from the rollup
+    exporter_totals = revenue_totals_by(
+        "localJourney__exporter", start_date, inclusive_end_date, **walkin_filters
     )
 
-    # 4. Aggregate data for top "Walk-in" taxpayers
-    top_walkin_taxpayers_data = (
-        checkins_with_revenue_and_weight.annotate(
-            # Coalesce to handle potential nulls in exporter details if necessary,
-            # though localJourney__exporter__isnull=False should prevent most.
-            exporter_id=F("localJourney__exporter__id"),
-            first_name=Coalesce("localJourney__exporter__first_name", V("")),
-            last_name=Coalesce("localJourney__exporter__last_name", V("")),
-            unique_id=Coalesce("localJourney__exporter__unique_id", V("")),
-            type_name=Coalesce("localJourney__exporter__type__name", V("Unknown")),
-        )
-        .values(
-            "exporter_id",
-            "first_name",
-            "last_name",
-            "unique_id",
-            "type_name",
-        )
-        .annotate(
-            total_revenue=Coalesce(Sum("revenue"), Decimal(0)),
-            total_amount=Coalesce(Sum("incremental_weight"), Decimal(0)),
-            total_path=Coalesce(
-                Count("localJourney_id", distinct=True), 0
-            ),  # Count unique local journeys
-        )
-        .filter(
-            total_path__gt=0
-        )  # Only include exporters with at least one local journey
-        .order_by("-total_path", "-total_revenue")[
-            :10
-        ]  # Order by journey count, then revenue
+    # 5. Rank exporters by unique local journeys, then revenue, and keep the top 10
+    top_exporters = sorted(
+        (
+            {**exporter_totals[row["localJourney__exporter"]], **row}
+            for row in path_counts
+        ),
+        key=lambda totals: (-totals["total_path"], -totals["total_revenue"]),
+    )[:10]
+
+    if not top_exporters:
+        return Response([])
+
+    exporters = (
+        Exporter.objects.select_related("type")
+        .only("unique_id", "first_name", "last_name", "type__name")
+        .in_bulk([row["localJourney__exporter"] for row in top_exporters])
     )
 
-    # 5. Prepare the report data in the required format
+    # 6. Prepare the report data in the required format
     report_data = []
-    for item in top_walkin_taxpayers_data:
-        # The original code had category logic here, but it wasn't used in the final
-        # output structure for 'admin_top_walkin_taxpayer_report'.
-        # Keeping the format exactly as requested by the user.
+    for totals in top_exporters:
+        exporter = exporters[totals["localJourney__exporter"]]
         report_data.append(
             {
-                "uniqe_id": item["unique_id"],
-                "type": item["type_name"],
-                "exporter_name": f"{item['first_name']} {item['last_name']}".strip(),
-                "total_amount": float(round(item["total_amount"], 2)),
-                "total_revenue": float(round(item["total_revenue"], 2)),
-                "total_path": item["total_path"],
+                "uniqe_id": exporter.unique_id or "",
+                "type": exporter.type.name if exporter.type else "Unknown",
+                "exporter_name": f"{exporter.first_name} {exporter.last_name}".strip(),
+                "total_amount": float(round(totals["total_amount"], 2)),
+                "total_revenue": float(round(totals["total_revenue"], 2)),
+                "total_path": totals["total_path"],
             }
         )
 
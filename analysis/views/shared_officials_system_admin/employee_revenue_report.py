@@ -11,23 +11,25 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
-    annotate_revenue_on_checkins,
+    cache_closed_range_report,
+    checkin_revenue_sources,
     parse_and_validate_date_range,
 )
-from declaracions.models import Checkin
 
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
+@cache_closed_range_report
 def employee_revenue_report(request):
     """
     Generates a report detailing the total revenue contributed by each employee
     (controller) within a specified date range.
 
-    This endpoint filters check-ins by the provided date range and successful status.
-    It then efficiently calculates incremental weight and revenue for each check-in
-    at the database level using `annotate_revenue_on_checkins`. Finally, it aggregates
-    the total revenue for each employee who processed a check-in during the period.
+    This endpoint filters check-ins by the provided date range and aggregates the
+    total revenue for each employee who processed a check-in during the period.
+    Per-checkin revenue is read from the nightly `CheckinRevenueRollup`
+    materialized view; check-ins made since its last refresh are computed live
+    and added in.
 
     Query Parameters:
     - start_date (str, YYYY-MM-DD): The start date for filtering check-ins. Required.
@@ -57,49 +59,52 @@ def employee_revenue_report(request):
     except ValidationError as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    # 2. Build filter criteria for the base queryset
+    # 2. Successful check-ins with their revenue: rollup rows up to its last
+    # refresh plus the newer check-ins computed live.
     # Ensure check-ins are linked to an employee to be included in this report
-    base_checkins_query = Checkin.objects.filter(
-        checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
+    revenue_sources = checkin_revenue_sources(
+        start_date,
+        inclusive_end_date,
         employee__isnull=False,  # Only include check-ins processed by an employee
     )
 
-    if not base_checkins_query.exists():
-        return Response([])
-
-    # 3. Annotate check-ins with incremental weight and revenue using the helper function
-    checkins_with_revenue = annotate_revenue_on_checkins(base_checkins_query)
-
-    # 4. Aggregate total revenue per employee directly in the database
-    employee_revenue_aggregates = (
-        checkins_with_revenue.annotate(
-            # Concatenate first_name and last_name to get the full employee name
-            full_employee_name=Coalesce(
-                Concat(F("employee__first_name"), V(" "), F("employee__last_name")),
-                F("employee__first_name"),  # Fallback if only first name exists
-                F("employee__last_name"),  # Fallback if only last name exists
-                V("Unknown Employee"),  # Default if no name parts exist
+    # 3. Aggregate total revenue per employee in the database, for each source
+    revenue_by_employee = {}
+    for checkins_with_revenue in revenue_sources:
+        employee_revenue_aggregates = (
+            checkins_with_revenue.annotate(
+                # Concatenate first_name and last_name to get the full employee name
+                full_employee_name=Coalesce(
+                    Concat(F("employee__first_name"), V(" "), F("employee__last_name")),
+                    F("employee__first_name"),  # Fallback if only first name exists
+                    F("employee__last_name"),  # Fallback if only last name exists
+                    V("Unknown Employee"),  # Default if no name parts exist
+                )
             )
+            .values(
+                "employee__id", "full_employee_name"
+            )  # Group by employee ID and their derived full name
+            .annotate(
+                total_employee_revenue=Coalesce(
+                    Sum("revenue"), Decimal(0)
+                )  # Sum of calculated revenue
+            )
+            .order_by()
         )
-        .values(
-            "employee__id", "full_employee_name"
-        )  # Group by employee ID and their derived full name
-        .annotate(
-            total_employee_revenue=Coalesce(
-                Sum("revenue"), Decimal(0)
-            )  # Sum of calculated revenue
-        )
-        .order_by("full_employee_name")  # Order for consistent output
-    )
+        for item in employee_revenue_aggregates:
+            employee = revenue_by_employee.setdefault(
+                item["employee__id"],
+                {"name": item["full_employee_name"], "value": Decimal(0)},
+            )
+            employee["value"] += item["total_employee_revenue"]
 
-    # 5. Format the response data (structure preserved for frontend)
+    # 4. Format the response data (structure preserved for frontend), ordered by
+    # name for consistent output
     response_data = [
-        {
-            "name": item["full_employee_name"],
-            "value": round(item["total_employee_revenue"], 2),
-        }
-        for item in employee_revenue_aggregates
+        {"name": employee["name"], "value": round(employee["value"], 2)}
+        for employee in sorted(
+            revenue_by_employee.values(), key=lambda employee: employee["name"]
+        )
     ]
 
     return Response(response_data)
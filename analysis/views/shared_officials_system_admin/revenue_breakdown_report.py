@@ -1,14 +1,15 @@
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import Count, F, Q, Sum
+from django.db.models import Count, Q, Sum
 from django.db.models.functions import Coalesce
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
-    annotate_revenue_on_checkins,
+    cache_closed_range_report,
+    checkin_revenue_sources,
     parse_and_validate_date_range,
 )
 from declaracions.models import Checkin
@@ -16,17 +17,18 @@ from declaracions.models import Checkin
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
+@cache_closed_range_report
 def revenue_breakdown_report(request):
     """
     Provides a breakdown of revenue and unique exporter counts, distinguishing
     between 'Regular Taxpayers' (associated with Declaracion) and
     'Walk-in Taxpayers' (associated with LocalJourneyWithoutTruck).
 
-    This endpoint filters check-ins by a specified date range and status.
-    It then calculates incremental weight and revenue for each check-in
-    efficiently at the database level using `annotate_revenue_on_checkins`.
-    Finally, it aggregates the total revenue and counts distinct exporters
-    for each category.
+    This endpoint filters check-ins by a specified date range and status, reading
+    their incremental revenue from the nightly `CheckinRevenueRollup`
+    materialized view (check-ins made since its last refresh are computed live
+    and added in). It then aggregates the total revenue and counts distinct
+    exporters for each category.
 
     Query Parameters:
     - start_date (str, YYYY-MM-DD): The start date for filtering check-ins. Required.
@@ -57,62 +59,37 @@ def revenue_breakdown_report(request):
     except ValidationError as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Common filter criteria for all relevant check-ins
-    common_checkin_filters = Q(
-        checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
-    )
-
+    # 2. Revenue for 'Regular Taxpayers' (Declaracion-based) and 'Walk-in
+    # Taxpayers' (LocalJourney-based): one aggregate over the rollup rows up to
+    # its last refresh and one over the newer check-ins computed live.
+    is_regular = Q(declaracion__isnull=False)
+    is_walkin = Q(localJourney__isnull=False)
     from_regular = Decimal(0)
     from_walkIn = Decimal(0)
-    regular_exporters_count = 0
-    walkin_exporters_count = 0
-
-    # 2. Process Revenue and Exporters for 'Regular Taxpayers' (Declaracion-based)
-    regular_checkins_query = Checkin.objects.filter(
-        common_checkin_filters, declaracion__isnull=False
-    )
-    if regular_checkins_query.exists():
-        # Annotate revenue on these specific check-ins
-        regular_checkins_with_revenue = annotate_revenue_on_checkins(
-            regular_checkins_query
+    for checkins_with_revenue in checkin_revenue_sources(
+        start_date, inclusive_end_date
+    ):
+        revenue = checkins_with_revenue.filter(is_regular | is_walkin).aggregate(
+            from_regular=Coalesce(Sum("revenue", filter=is_regular), Decimal(0)),
+            from_walkIn=Coalesce(Sum("revenue", filter=is_walkin), Decimal(0)),
         )
+        from_regular += revenue["from_regular"]
+        from_walkIn += revenue["from_walkIn"]
 
-        # Aggregate using Python
-        regular_exporter_ids = set()
-        for checkin in regular_checkins_with_revenue:
-            rev = checkin.revenue or Decimal(0)
-            from_regular += rev
-            
-            # Check exporter
-            # For regular, it's declaracion__exporter
-            if checkin.declaracion and checkin.declaracion.exporter_id:
-                regular_exporter_ids.add(checkin.declaracion.exporter_id)
-                
-        regular_exporters_count = len(regular_exporter_ids)
-
-    # 3. Process Revenue and Exporters for 'Walk-in Taxpayers' (LocalJourney-based)
-    walkin_checkins_query = Checkin.objects.filter(
-        common_checkin_filters, localJourney__isnull=False
+    # 3. Distinct exporters per category over the whole period. Counting needs
+    # no revenue, so it reads the check-ins directly.
+    exporters = Checkin.objects.filter(
+        is_regular | is_walkin,
+        checkin_time__range=[start_date, inclusive_end_date],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
+    ).aggregate(
+        regular_exporters=Count(
+            "declaracion__exporter_id", filter=is_regular, distinct=True
+        ),
+        walkin_exporters=Count(
+            "localJourney__exporter_id", filter=is_walkin, distinct=True
+        ),
     )
-    if walkin_checkins_query.exists():
-        # Annotate revenue on these specific check-ins
-        walkin_checkins_with_revenue = annotate_revenue_on_checkins(
-            walkin_checkins_query
-        )
-
-        # Aggregate using Python
-        walkin_exporter_ids = set()
-        for checkin in walkin_checkins_with_revenue:
-            rev = checkin.revenue or Decimal(0)
-            from_walkIn += rev
-            
-            # Check exporter
-            # For walk-in, it's localJourney__exporter
-            if checkin.localJourney and checkin.localJourney.exporter_id:
-                walkin_exporter_ids.add(checkin.localJourney.exporter_id)
-        
-        walkin_exporters_count = len(walkin_exporter_ids)
 
     # 4. Final Calculation and Response (structure preserved for frontend)
     total = from_regular + from_walkIn
@@ -120,8 +97,8 @@ def revenue_breakdown_report(request):
         "from_regular": float(from_regular),
         "from_walkIn": float(from_walkIn),
         "total": float(total),
-        "regular_exporters": regular_exporters_count,
-        "walkin_exporters": walkin_exporters_count,
+        "regular_exporters": exporters["regular_exporters"],
+        "walkin_exporters": exporters["walkin_exporters"],
     }
 
     return Response(result)
@@ -1,7 +1,8 @@
+from datetime import timedelta
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db.models import F, Q, Sum
+from django.db.models import Sum
 from django.db.models.functions import (
     Coalesce,
     ExtractDay,
@@ -13,21 +14,42 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from analysis.views.helpers import (
-    annotate_revenue_on_checkins,
+    cache_closed_range_report,
+    checkin_revenue_sources,
     parse_and_validate_date_range,
 )
-from declaracions.models import Checkin
+
+# Labels indexed by the 1-based ExtractWeekDay (1 = Sunday ... 7 = Saturday) and
+# ExtractMonth values, minus one
+WEEKDAY_LABELS = ("Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat")
+MONTH_LABELS = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
 
 
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
+@cache_closed_range_report
 def revenue_trends_report(request):
     """
     Generates a report on revenue trends, aggregated over time based on the
     `selected_date_type` (weekly, monthly, or yearly).
 
-    This endpoint retrieves check-ins within a specified date range and calculates
-    their incremental revenue using the `annotate_revenue_on_checkins` helper.
+    This endpoint retrieves check-ins within a specified date range, reading
+    their incremental revenue from the nightly `CheckinRevenueRollup`
+    materialized view (check-ins made since its last refresh are computed live
+    and added in).
     It then groups these revenues by day of the week, day of the month, or month
     of the year, and returns the total revenue for each period. This significantly
     improves performance by performing aggregations at the database level.
@@ -69,69 +91,65 @@ def revenue_trends_report(request):
     except ValidationError as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Base filter criteria for all relevant check-ins
-    base_checkins_query = Checkin.objects.filter(
-        checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
-    )
+    # 2. Successful check-ins of the period with their revenue: rollup rows up
+    # to its last refresh plus the newer check-ins computed live. Each bucket
+    # adds up the totals of both.
+    revenue_sources = checkin_revenue_sources(start_date, inclusive_end_date)
 
-    if not base_checkins_query.exists():
+    if not any(checkins.exists() for checkins in revenue_sources):
         return Response([])
 
-    # 2. Annotate check-ins with incremental weight and revenue using the helper function
-    # This replaces the manual Python loop for calculating these values.
-    checkins_with_revenue = annotate_revenue_on_checkins(base_checkins_query)
-
     report_data = []
 
     if selected_date_type == "weekly":
         # Group by day of the week (ExtractWeekDay returns 1 for Sunday, ..., 7 for Saturday)
-        weekly_aggregates = (
-            checkins_with_revenue.annotate(
-                day_of_week_db=ExtractWeekDay("checkin_time")
-            )
-            .values("day_of_week_db")
-            .annotate(total_revenue=Coalesce(Sum("revenue"), Decimal(0)))
-            .order_by("day_of_week_db")
-        )
-
-        days_labels_ordered = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
         # Initialize results for all 7 days with 0 revenue
         revenue_by_day = [Decimal(0)] * 7
 
-        for item in weekly_aggregates:
-            # Adjust day_of_week_db (1-7, Sun-Sat) to 0-6 (Sun-Sat) for list indexing
-            day_index = item["day_of_week_db"] - 1
-            if 0 <= day_index < 7:  # Defensive check
-                revenue_by_day[day_index] = item["total_revenue"]
+        for checkins_with_revenue in revenue_sources:
+            weekly_aggregates = (
+                checkins_with_revenue.annotate(
+                    day_of_week_db=ExtractWeekDay("checkin_time")
+                )
+                .values("day_of_week_db")
+                .annotate(total_revenue=Coalesce(Sum("revenue"), Decimal(0)))
+                .order_by("day_of_week_db")
+            )
+
+            for item in weekly_aggregates:
+                # Adjust day_of_week_db (1-7, Sun-Sat) to 0-6 (Sun-Sat) for indexing
+                day_index = item["day_of_week_db"] - 1
+                if 0 <= day_index < 7:  # Defensive check
+                    revenue_by_day[day_index] += item["total_revenue"]
 
         report_data = [
-            {"label": days_labels_ordered[i], "amount": float(revenue_by_day[i])}
-            for i in range(7)
+            {"label": label, "amount": float(amount)}
+            for label, amount in zip(WEEKDAY_LABELS, revenue_by_day)
         ]
 
     elif selected_date_type == "monthly":
         # Group by day of the month (1-31)
-        monthly_aggregates = (
-            checkins_with_revenue.annotate(day_of_month=ExtractDay("checkin_time"))
-            .values("day_of_month")
-            .annotate(total_revenue=Coalesce(Sum("revenue"), Decimal(0)))
-            .order_by("day_of_month")
-        )
-
         # Collect all unique days within the date range for consistent labels
         all_days_in_range = set()
         current_date_iter = start_date.date()
         while current_date_iter <= inclusive_end_date.date():
             all_days_in_range.add(current_date_iter.day)
-            current_date_iter += timezone.timedelta(days=1)
+            current_date_iter += timedelta(days=1)
 
         sorted_days = sorted(list(all_days_in_range))
         revenue_by_day_dict = {day: Decimal(0) for day in sorted_days}
 
-        for item in monthly_aggregates:
-            if item["day_of_month"] in revenue_by_day_dict:  # Defensive check
-                revenue_by_day_dict[item["day_of_month"]] = item["total_revenue"]
+        for checkins_with_revenue in revenue_sources:
+            monthly_aggregates = (
+                checkins_with_revenue.annotate(day_of_month=ExtractDay("checkin_time"))
+                .values("day_of_month")
+                .annotate(total_revenue=Coalesce(Sum("revenue"), Decimal(0)))
+                .order_by("day_of_month")
+            )
+
+            for item in monthly_aggregates:
+                if item["day_of_month"] in revenue_by_day_dict:  # Defensive check
+                    revenue_by_day_dict[item["day_of_month"]] += item["total_revenue"]
 
         report_data = [
             {"label": day, "amount": float(revenue_by_day_dict[day])}
@@ -140,39 +158,28 @@ def revenue_trends_report(request):
 
     elif selected_date_type == "yearly":
         # Group by month of the year (ExtractMonth returns 1 for Jan, ..., 12 for Dec)
-        yearly_aggregates = (
-            checkins_with_revenue.annotate(month_of_year=ExtractMonth("checkin_time"))
-            .values("month_of_year")
-            .annotate(total_revenue=Coalesce(Sum("revenue"), Decimal(0)))
-            .order_by("month_of_year")
-        )
-
-        month_names_ordered = [
-            "Jan",
-            "Feb",
-            "Mar",
-            "Apr",
-            "May",
-            "Jun",
-            "Jul",
-            "Aug",
-            "Sep",
-            "Oct",
-            "Nov",
-            "Dec",
-        ]
         # Initialize results for all 12 months with 0 revenue
         revenue_by_month = [Decimal(0)] * 12
 
-        for item in yearly_aggregates:
-            # Adjust month_of_year (1-12) to 0-11 for list indexing
-            month_index = item["month_of_year"] - 1
-            if 0 <= month_index < 12:  # Defensive check
-                revenue_by_month[month_index] = item["total_revenue"]
+        for checkins_with_revenue in revenue_sources:
+            yearly_aggregates = (
+                checkins_with_revenue.annotate(
+                    month_of_year=ExtractMonth("checkin_time")
+                )
+                .values("month_of_year")
+                .annotate(total_revenue=Coalesce(Sum("revenue"), Decimal(0)))
+                .order_by("month_of_year")
+            )
+
+            for item in yearly_aggregates:
+                # Adjust month_of_year (1-12) to 0-11 for list indexing
+                month_index = item["month_of_year"] - 1
+                if 0 <= month_index < 12:  # Defensive check
+                    revenue_by_month[month_index] += item["total_revenue"]
 
         report_data = [
-            {"label": month_names_ordered[i], "amount": float(revenue_by_month[i])}
-            for i in range(12)
+            {"label": label, "amount": float(amount)}
+            for label, amount in zip(MONTH_LABELS, revenue_by_month)
         ]
 
     return Response(report_data)
@@ -61,7 +61,7 @@ def station_revenue_report(request):
     # Ensure check-ins are linked to a station to be included in the report.
     base_checkins_query = Checkin.objects.filter(
         checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
         station__isnull=False,  # Exclude check-ins not linked to a workstation
     )
 
@@ -37,7 +37,7 @@ def stats_overview(request):
     """
     # 1. Fetch all relevant check-ins
     # Assuming "all" means all successful check-ins for the overview
-    base_checkins_query = Checkin.objects.filter(status__in=["pass", "paid", "success"])
+    base_checkins_query = Checkin.objects.filter(status__in=Checkin.SUCCESSFUL_STATUSES)
 
     # 2. Annotate check-ins with incremental weight and revenue using the helper
     checkins_with_revenue = annotate_revenue_on_checkins(base_checkins_query)
@@ -51,7 +51,7 @@ def stats_overview(request):
     unique_exporter_ids = set()
     active_station_ids = set()
 
-    for checkin in checkins_with_revenue:
+    for checkin in checkins_with_revenue.iterator(chunk_size=2000):
         # Sum revenue and weight
         rev = checkin.revenue or Decimal(0)
         w = checkin.incremental_weight or Decimal(0)
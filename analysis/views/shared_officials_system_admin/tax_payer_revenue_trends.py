@@ -76,7 +76,7 @@ def tax_payer_revenue_trends(request):
     # Build base filter criteria
     filter_criteria = {
         "checkin_time__range": [start_date, inclusive_end_date],
-        "status__in": ["pass", "paid", "success"],
+        "status__in": Checkin.SUCCESSFUL_STATUSES,
     }
 
     # Fetch relevant checkins
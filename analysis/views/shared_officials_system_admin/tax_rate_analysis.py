@@ -64,7 +64,7 @@ def tax_rate_analysis(request):
     # only successful check-ins contribute to revenue analysis.
     base_checkins_query = Checkin.objects.filter(
         checkin_time__range=[start_date, inclusive_end_date],
-        status__in=["pass", "paid", "success"],
+        status__in=Checkin.SUCCESSFUL_STATUSES,
     )
 
     if not base_checkins_query.exists():
@@ -127,7 +127,7 @@ def tax_rate_analysis(request):
     range_revenues_ordered = [Decimal(0)] * len(ranges)
     total_revenue = Decimal(0)
     
-    for checkin in checkins_with_revenue:
+    for checkin in checkins_with_revenue.iterator(chunk_size=2000):
         w_val = checkin.net_weight
         if w_val is None: 
             continue
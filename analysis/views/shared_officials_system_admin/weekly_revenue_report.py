@@ -29,7 +29,7 @@ def weekly_revenue_report(request):
 
     filters = {
         "checkin_time__range": [four_weeks_ago, end_of_last_week],
-        "status__in": ["pass", "paid", "success"],
+        "status__in": Checkin.SUCCESSFUL_STATUSES,
     }
 
     weekly_totals = (
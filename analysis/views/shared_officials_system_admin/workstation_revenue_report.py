@@ -1,5 +1,5 @@
 from django.core.exceptions import ValidationError
-from django.db.models import Sum
+from django.db.models import Q, Sum
 from rest_framework import permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -27,7 +27,7 @@ def workstation_revenue_report(request):
     except ValidationError as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    all_stations = WorkStation.objects.all()
+    all_stations = WorkStation.objects.only("name")
     labels = [station.name for station in all_stations]
     data = {
         station.name: {"total_revenue": 0, "total_amount": 0}
@@ -36,25 +36,25 @@ def workstation_revenue_report(request):
 
     filters = {
         "checkin_time__range": [start_date, end_date],
-        "status__in": ["pass", "paid", "success"],
+        "status__in": Checkin.SUCCESSFUL_STATUSES,
     }
 
-    revenue_data = (
+    # Totals are keyed by station_id, so no join to the station table is needed.
+    # The LAG window behind the revenue annotation cannot be grouped directly, so
+    # each station gets its own filtered Sum in a single aggregate query.
+    checkins_with_revenue = annotate_revenue_on_checkins(
         Checkin.objects.filter(**filters)
-        .select_related("station")
-        .annotate_revenue_on_checkins()
-        .values("station__name")
-        .annotate(
-            total_revenue=Sum("revenue"),
-            total_amount=Sum("incremental_weight"),
-        )
-        .order_by("station__name")
     )
+    aggregates = {}
+    for index, station in enumerate(all_stations):
+        aggregates[f"revenue_{index}"] = Sum("revenue", filter=Q(station_id=station.id))
+        aggregates[f"amount_{index}"] = Sum(
+            "incremental_weight", filter=Q(station_id=station.id)
+        )
+    totals = checkins_with_revenue.aggregate(**aggregates) if aggregates else {}
 
-    for item in revenue_data:
-        station_name = item["station__name"]
-        if station_name in data:
-            data[station_name]["total_revenue"] = round(item["total_revenue"] or 0, 2)
-            data[station_name]["total_amount"] = round(item["total_amount"] or 0, 2)
+    for index, station in enumerate(all_stations):
+        data[station.name]["total_revenue"] = round(totals[f"revenue_{index}"] or 0, 2)
+        data[station.name]["total_amount"] = round(totals[f"amount_{index}"] or 0, 2)
 
     return Response({"labels": labels, "data": data})
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DeclaracionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'declaracions'
+
+    def ready(self):
+        import declaracions.signals
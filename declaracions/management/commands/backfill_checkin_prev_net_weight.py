@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from declaracions.models import Checkin
+
+# Same rule as Checkin.save(): the previous check-in of the same declaracion or
+# local journey, in any status. Only rows whose value differs are rewritten.
+BACKFILL_PREV_NET_WEIGHT_SQL = """
+UPDATE {table} AS c
+SET prev_net_weight = p.prev_net_weight
+FROM (
+    SELECT
+        id,
+        LAG(net_weight) OVER (
+            PARTITION BY declaracion_id, "localJourney_id"
+            ORDER BY checkin_time
+        ) AS prev_net_weight
+    FROM {table}
+) AS p
+WHERE c.id = p.id
+  AND c.prev_net_weight IS DISTINCT FROM p.prev_net_weight
+"""
+
+
+class Command(BaseCommand):
+    help = "Recomputes Checkin.prev_net_weight for every check-in."
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS("Backfilling check-in previous weights...")
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                BACKFILL_PREV_NET_WEIGHT_SQL.format(table=Checkin._meta.db_table)
+            )
+            updated = cursor.rowcount
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} check-ins."))
@@ -1,6 +1,8 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import Q
+from django.utils import timezone
 
 from base.models import BaseModel
 
@@ -75,6 +77,10 @@ class PaymentMethod(BaseModel):
         return self.name
 
 
+# Statuses of a check-in that counts toward revenue and weight reports
+SUCCESSFUL_CHECKIN_STATUSES = ("pass", "paid", "success")
+
+
 class Checkin(BaseModel):
     STATUS_CHOICES = [
         ("pending", "Pending"),
@@ -83,6 +89,7 @@ class Checkin(BaseModel):
         ("success", "Success"),
         ("paid", "Paid"),
     ]
+    SUCCESSFUL_STATUSES = SUCCESSFUL_CHECKIN_STATUSES
 
     Tage = models.CharField(max_length=400, null=True, unique=True)
     receipt_number = models.CharField(
@@ -128,6 +135,17 @@ class Checkin(BaseModel):
         default=False,
         help_text="Set to True if this record was synced via QR code offline sync"
     )
+    prev_net_weight = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=(
+            "Net weight of the previous check-in of the same declaracion or local "
+            "journey (any station, any status); null for the first check-in"
+        ),
+    )
 
     class Meta:
         constraints = [
@@ -147,6 +165,151 @@ class Checkin(BaseModel):
                 condition=Q(declaracion__isnull=True),
             ),
         ]
+        indexes = [
+            # Report views only read successful check-ins; partial indexes keep
+            # the other statuses out of the scanned pages.
+            models.Index(
+                fields=["station", "checkin_time"],
+                name="checkin_active_by_station",
+                condition=Q(status__in=SUCCESSFUL_CHECKIN_STATUSES),
+            ),
+            models.Index(
+                fields=["declaracion", "checkin_time"],
+                name="checkin_active_by_decl",
+                condition=Q(status__in=SUCCESSFUL_CHECKIN_STATUSES),
+            ),
+            models.Index(
+                fields=["localJourney", "checkin_time"],
+                name="checkin_active_by_journey",
+                condition=Q(status__in=SUCCESSFUL_CHECKIN_STATUSES),
+            ),
+            models.Index(
+                fields=["checkin_time"],
+                name="checkin_active_by_time",
+                condition=Q(status__in=SUCCESSFUL_CHECKIN_STATUSES),
+            ),
+            # Controller-scoped reports filter on employee and a time range
+            models.Index(
+                fields=["employee", "checkin_time"],
+                name="checkin_active_by_employee",
+                condition=Q(status__in=SUCCESSFUL_CHECKIN_STATUSES),
+            ),
+            # Check-ins are appended in time order, which suits a compact BRIN
+            # index for wide checkin_time range scans.
+            BrinIndex(fields=["checkin_time"], name="checkin_time_brin"),
+            # Revenue reports re-read check-ins saved since the last rollup refresh
+            models.Index(fields=["updated_at"], name="checkin_updated_at"),
+        ]
+
+    # Fields whose change can move this check-in within its journey's sequence
+    JOURNEY_SEQUENCE_FIELDS = {
+        "net_weight",
+        "checkin_time",
+        "declaracion",
+        "localJourney",
+    }
+
+    @staticmethod
+    def journey_queryset(declaracion_id, local_journey_id):
+        """All check-ins of a declaracion or local journey (none if neither is set)."""
+        if declaracion_id is not None:
+            return Checkin.objects.filter(declaracion_id=declaracion_id)
+        if local_journey_id is not None:
+            return Checkin.objects.filter(localJourney_id=local_journey_id)
+        return Checkin.objects.none()
+
+    @staticmethod
+    def relink_next_checkin(journey_checkins, after):
+        """
+        Points the first of `journey_checkins` after `after` at the net weight of
+        the check-in now preceding it (null when there is none). Its incremental
+        weight changes with it, so updated_at is bumped for the revenue reports.
+        """
+        next_checkin = (
+            journey_checkins.filter(checkin_time__gt=after)
+            .order_by("checkin_time")
+            .values("pk", "checkin_time")
+            .first()
+        )
+        if next_checkin is None:
+            return
+        Checkin.objects.filter(pk=next_checkin["pk"]).update(
+            updated_at=timezone.now(),
+            prev_net_weight=journey_checkins.filter(
+                checkin_time__lt=next_checkin["checkin_time"]
+            )
+            .order_by("-checkin_time")
+            .values_list("net_weight", flat=True)
+            .first()
+        )
+
+    def journey_checkins(self):
+        """Other check-ins of the same declaracion or local journey."""
+        return self.journey_queryset(self.declaracion_id, self.localJourney_id).exclude(
+            pk=self.pk
+        )
+
+    def save(self, *args, **kwargs):
+        """
+        Keeps prev_net_weight of this check-in and of its neighbours in step with
+        the journey. QuerySet.update() and bulk_create() bypass this; the nightly
+        `backfill_checkin_prev_net_weight` run corrects rows written that way.
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not (
+            self.JOURNEY_SEQUENCE_FIELDS & set(update_fields)
+        ):
+            return super().save(*args, **kwargs)
+
+        # Position of the stored row, to relink its old successor if it moves
+        stored = None
+        if not self._state.adding:
+            stored = (
+                Checkin.objects.filter(pk=self.pk)
+                .values("declaracion_id", "localJourney_id", "checkin_time")
+                .first()
+            )
+
+        # Keep prev_net_weight in step with the journey so reports can take the
+        # incremental weight from this row instead of a LAG window on every read.
+        checkin_time = self.checkin_time or timezone.now()
+        journey_checkins = self.journey_checkins()
+        self.prev_net_weight = (
+            journey_checkins.filter(checkin_time__lt=checkin_time)
+            .order_by("-checkin_time")
+            .values_list("net_weight", flat=True)
+            .first()
+        )
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "prev_net_weight"}
+
+        super().save(*args, **kwargs)
+
+        # The next check-in of the journey now follows this one (see
+        # relink_next_checkin for updated_at)
+        next_checkin_id = (
+            journey_checkins.filter(checkin_time__gt=self.checkin_time)
+            .order_by("checkin_time")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if next_checkin_id is not None:
+            Checkin.objects.filter(pk=next_checkin_id).update(
+                prev_net_weight=self.net_weight, updated_at=timezone.now()
+            )
+
+        # The check-in that followed the old position now follows another one
+        if stored is not None and (
+            stored["checkin_time"] != self.checkin_time
+            or stored["declaracion_id"] != self.declaracion_id
+            or stored["localJourney_id"] != self.localJourney_id
+        ):
+            self.relink_next_checkin(
+                self.journey_queryset(
+                    stored["declaracion_id"], stored["localJourney_id"]
+                ),
+                stored["checkin_time"],
+            )
 
 
 class ManualPayment(BaseModel):
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Checkin
+
+
+@receiver(post_delete, sender=Checkin)
+def relink_checkin_after_delete(sender, instance, **kwargs):
+    """Point the check-in that followed a deleted one at its new predecessor."""
+    Checkin.relink_next_checkin(
+        Checkin.journey_queryset(instance.declaracion_id, instance.localJourney_id),
+        instance.checkin_time,
+    )
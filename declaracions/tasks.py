@@ -0,0 +1,21 @@
+import logging
+
+from celery import shared_task
+from django.core.management import call_command
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(acks_late=True)
+def backfill_checkin_prev_net_weight_task():
+    """
+    Nightly recompute of `Checkin.prev_net_weight`, for rows written through
+    QuerySet.update() or bulk_create(), which bypass `Checkin.save()`.
+    """
+    close_old_connections()
+    try:
+        call_command("backfill_checkin_prev_net_weight")
+        logger.info("Check-in previous weights backfilled")
+    finally:
+        close_old_connections()
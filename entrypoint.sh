@@ -3,6 +3,12 @@
 echo "Running migrations..."
 python manage.py migrate --noinput
 
+echo "Creating cache tables..."
+python manage.py createcachetable
+
+echo "Creating checkin rollups..."
+python manage.py refresh_checkin_rollups
+
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
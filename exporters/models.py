@@ -81,6 +81,12 @@ class Exporter(BaseModel):
         null=True,
     )
 
+    class Meta:
+        indexes = [
+            # Registration counts per taxpayer type over a created_at range
+            models.Index(fields=["type", "created_at"], name="exporter_type_created"),
+        ]
+
     def __str__(self):
         return f"{self.first_name} ({self.license_number})"
 